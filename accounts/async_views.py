@@ -0,0 +1,92 @@
+"""Async versions of the read-heavy project endpoints, for ASGI deployments.
+
+DRF has no async views, so these are plain Django ``async def`` views that
+return the same JSON as their counterparts in ``views.py`` and share their
+response and fragment caches. They are routed by ``crowdfunding/urls_asgi.py``
+(the ``crowdfunding.settings_asgi`` profile); everything else falls through
+to the sync views.
+
+Feed pages hydrate their categories concurrently with ``asyncio.gather``.
+Django still runs ORM queries through ``sync_to_async`` on the request's
+thread, so the queries themselves run one after another, while cache round
+trips (e.g. Redis) overlap. The event loop is never blocked, so one worker
+can hold many slow requests open without tying up a thread per request.
+"""
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .authentication import CachedJWTAuthentication
+from .feed import InvalidFeedRequest, aproject_feed, parse_feed_params
+from .projects import PROJECT_CATEGORIES, aserialize_projects, stamps
+from .response_cache import DataJsonResponse, cached_response
+from .serializers import ProfileSerializer, UserSerializer
+
+
+def _error(message, code):
+    return DataJsonResponse({"error": message}, status=code)
+
+
+async def feed_page_response(request, **filters):
+    try:
+        params = parse_feed_params(request.GET, **filters)
+    except InvalidFeedRequest as e:
+        return _error(str(e), status.HTTP_400_BAD_REQUEST)
+
+    results, next_cursor = await aproject_feed(**params)
+    return DataJsonResponse({"results": results, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
+@require_GET
+@cached_response("film", "music", "art")
+async def get_all_projects(request):
+    return await feed_page_response(request)
+
+
+@require_GET
+@cached_response("film")
+async def get_all_films(request):
+    return await feed_page_response(request, category="film")
+
+
+@require_GET
+@cached_response("music")
+async def get_all_music(request):
+    return await feed_page_response(request, category="music")
+
+
+@require_GET
+@cached_response("art")
+async def get_all_art(request):
+    return await feed_page_response(request, category="art")
+
+
+@require_GET
+@cached_response()
+async def get_project_by_id(request, category, id):
+    if category not in PROJECT_CATEGORIES:
+        return _error("Invalid category", status.HTTP_400_BAD_REQUEST)
+
+    serialized = await aserialize_projects(category, stamps(category, id=id))
+    if id not in serialized:
+        return _error("Project not found", status.HTTP_404_NOT_FOUND)
+
+    return DataJsonResponse(serialized[id], status=status.HTTP_200_OK)
+
+
+@require_GET
+async def me_view(request):
+    try:
+        authenticated = await CachedJWTAuthentication().aauthenticate(request)
+    except AuthenticationFailed as e:
+        detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+        return DataJsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+    if authenticated is None:
+        return DataJsonResponse({"detail": "Authentication credentials were not provided."},
+                                status=status.HTTP_401_UNAUTHORIZED)
+
+    user = authenticated[0]
+    return DataJsonResponse({
+        "user": UserSerializer(user).data,
+        "profile": ProfileSerializer(user.profile).data,
+    })
@@ -0,0 +1,202 @@
+"""Audio previews and waveform peaks.
+
+Like ``imaging.py``, free of Django imports: ``analyse_audio`` runs in
+spawned worker processes that never set Django up.
+
+With ``ffmpeg`` on the PATH any format it reads is decoded, and the preview
+is a mono MP3 at the requested bitrate. Without it, WAV files (PCM 8/16/24/32
+bit or IEEE float, including WAVE_FORMAT_EXTENSIBLE) are decoded here with
+NumPy, ``BLOCK_FRAMES`` at a time, and the preview is a mono 16-bit WAV at
+``preview_rate``; other formats raise ``UnsupportedAudio``.
+"""
+import io
+import os
+import shutil
+import struct
+import subprocess
+import wave
+from typing import NamedTuple
+
+import numpy as np
+
+from .imaging import file_digest
+
+
+# Peaks are measured on audio decoded at this rate: plenty for a waveform drawing.
+ANALYSIS_RATE = 8000
+
+# WAV frames decoded at a time: memory stays bounded whatever the file's length.
+BLOCK_FRAMES = 64 * 1024
+
+_PCM, _FLOAT, _EXTENSIBLE = 0x0001, 0x0003, 0xFFFE
+# (format tag, bytes per sample) the NumPy decoder handles
+_DECODABLE = {(_FLOAT, 4), (_FLOAT, 8), (_PCM, 1), (_PCM, 2), (_PCM, 3), (_PCM, 4)}
+
+
+class UnsupportedAudio(ValueError):
+    pass
+
+
+class WavFormat(NamedTuple):
+    tag: int
+    channels: int
+    rate: int
+    bits: int
+    frames: int
+
+    @property
+    def frame_size(self):
+        return self.channels * (self.bits // 8)
+
+
+def read_wav_header(f):
+    """Parse the RIFF header of the open file ``f`` and leave it at the first
+    sample; returns a ``WavFormat``."""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+        raise UnsupportedAudio("Not a WAV file")
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise UnsupportedAudio("WAV file without fmt/data chunks")
+        chunk_id, size = struct.unpack("<4sI", header)
+        if chunk_id == b"data":
+            break
+        if chunk_id == b"fmt ":
+            fmt = f.read(size)
+            f.seek(size & 1, io.SEEK_CUR)
+        else:
+            f.seek(size + (size & 1), io.SEEK_CUR)  # chunks are word aligned
+    if fmt is None or len(fmt) < 16:
+        raise UnsupportedAudio("WAV file without fmt/data chunks")
+
+    tag, channels, rate, _byte_rate, _align, bits = struct.unpack_from("<HHIIHH", fmt)
+    if tag == _EXTENSIBLE and len(fmt) >= 26:
+        tag = struct.unpack_from("<H", fmt, 24)[0]  # first two bytes of the SubFormat GUID
+    width = bits // 8
+    if not channels or not rate or (tag, width) not in _DECODABLE:
+        raise UnsupportedAudio(f"Unsupported WAV encoding (format {tag:#x}, {bits} bit)")
+    # Streamed writers may leave the size unset: trust the file's length.
+    available = os.fstat(f.fileno()).st_size - f.tell()
+    return WavFormat(tag, channels, rate, bits, min(size, available) // (channels * width))
+
+
+def decode_frames(raw, wav):
+    """Mono float32 samples in [-1, 1] from whole frames of ``wav`` data."""
+    width = wav.bits // 8
+    if wav.tag == _FLOAT:
+        samples = np.frombuffer(raw, dtype=f"<f{width}").astype(np.float32)
+    elif width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = bytes_[:, 0] | (bytes_[:, 1] << 8) | (bytes_[:, 2] << 16)
+        samples = (values - ((values & 0x800000) << 1)).astype(np.float32) / float(2 ** 23)
+    else:
+        samples = np.frombuffer(raw, dtype=f"<i{width}").astype(np.float32) / float(2 ** (wav.bits - 1))
+    return samples.reshape(-1, wav.channels).mean(axis=1)
+
+
+def wav_blocks(f, wav):
+    """Mono blocks of at most ``BLOCK_FRAMES`` samples from a file positioned
+    by ``read_wav_header``."""
+    remaining = wav.frames
+    while remaining:
+        raw = f.read(min(BLOCK_FRAMES, remaining) * wav.frame_size)
+        frames = len(raw) // wav.frame_size
+        if not frames:
+            return
+        yield decode_frames(raw[:frames * wav.frame_size], wav)
+        remaining -= frames
+
+
+class Peaks:
+    """Maxima of ``|sample|`` over ``count`` equal spans of ``total`` samples,
+    fed block by block."""
+
+    def __init__(self, count, total):
+        self.count, self.total, self.offset = count, total, 0
+        self.maxima = np.zeros(count, dtype=np.float32)
+
+    def add(self, block):
+        if not len(block):
+            return
+        spans = np.arange(self.offset, self.offset + len(block), dtype=np.int64) * self.count // self.total
+        np.maximum.at(self.maxima, spans, np.abs(block))
+        self.offset += len(block)
+
+    def values(self):
+        """As ints 0-255 of full scale."""
+        return np.clip(np.round(self.maxima * 255), 0, 255).astype(int).tolist()
+
+
+def resample(samples, rate, target):
+    """Linear resampling, with a box filter first when reducing the rate."""
+    if rate == target or not len(samples):
+        return samples
+    step = rate / target
+    if step > 1:
+        width = int(step)
+        samples = np.convolve(samples, np.full(width, 1 / width, dtype=np.float32), mode="same")
+    positions = np.arange(0, len(samples) - 1, step) if len(samples) > 1 else np.zeros(1)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def wav_bytes(samples, rate):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _ffmpeg(path, *arguments):
+    result = subprocess.run(
+        [shutil.which("ffmpeg"), "-v", "error", "-i", path, *arguments, "pipe:1"],
+        capture_output=True, check=False,
+    )
+    if result.returncode:
+        raise UnsupportedAudio(result.stderr.decode(errors="replace").strip() or "ffmpeg failed")
+    return result.stdout
+
+
+def analyse_audio(path, preview_seconds, preview_rate, preview_bitrate, peak_count):
+    """Preview clip and waveform for the audio file at ``path``.
+
+    Only the path crosses to the worker. Returns ``{"sha256", "extension",
+    "preview" (bytes), "duration" (seconds), "peaks"}``.
+    """
+    if shutil.which("ffmpeg"):
+        # ffmpeg reads the file itself; what comes back is mono at ANALYSIS_RATE.
+        pcm = _ffmpeg(path, "-ac", "1", "-ar", str(ANALYSIS_RATE), "-f", "s16le")
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768
+        duration = len(samples) / ANALYSIS_RATE
+        peaks = Peaks(peak_count, max(len(samples), 1))
+        peaks.add(samples)
+        preview = _ffmpeg(path, "-t", str(preview_seconds), "-vn", "-ac", "1", "-ar", str(preview_rate),
+                          "-b:a", f"{preview_bitrate}k", "-f", "mp3")
+        extension = "mp3"
+    else:
+        with open(path, "rb") as f:
+            wav = read_wav_header(f)
+            peaks = Peaks(peak_count, max(wav.frames, 1))
+            head, wanted = [], int(preview_seconds * wav.rate)
+            for block in wav_blocks(f, wav):
+                peaks.add(block)
+                if wanted > 0:
+                    head.append(block[:wanted])
+                    wanted -= len(head[-1])
+        duration = wav.frames / wav.rate
+        clip = np.concatenate(head) if head else np.zeros(0, dtype=np.float32)
+        preview = wav_bytes(resample(clip, wav.rate, preview_rate), preview_rate)
+        extension = "wav"
+    return {
+        "sha256": file_digest(path),
+        "extension": extension,
+        "preview": preview,
+        "duration": round(duration, 3),
+        "peaks": peaks.values(),
+    }
@@ -0,0 +1,140 @@
+"""Preview clips and waveform peaks for audio samples.
+
+After an ``AudioSample`` is saved (see ``signals.py``), ``schedule_preview``
+runs ``audio.analyse_audio`` on a process pool of ``AUDIO_PREVIEW_WORKERS``
+spawned workers (0 runs inline after commit). The preview clip is stored next
+to the original under a name that includes a hash of its content::
+
+    music_samples/previews/take.3f2a9c1e5b7d8a60.mp3
+
+and recorded with the duration and peaks on the row's ``preview`` JSON,
+together with the original's name. As with thumbnails, the serializer only
+exposes a preview whose source is still the sample's current file, and
+``generate_audio_previews`` backfills existing rows.
+"""
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .audio import analyse_audio
+from .models import AudioSample, MusicProject
+from .response_cache import bump_version
+from .thumbnails import media_url, source_path
+
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def preview_name(source, digest, extension):
+    directory, filename = posixpath.split(source)
+    stem = filename.rsplit(".", 1)[0]
+    return posixpath.join(directory, "previews", f"{stem}.{digest[:16]}.{extension}")
+
+
+def is_current(sample):
+    return bool(sample.file.name) and sample.preview.get("source") == sample.file.name
+
+
+def analysis_args():
+    return (settings.AUDIO_PREVIEW_SECONDS, settings.AUDIO_PREVIEW_SAMPLE_RATE,
+            settings.AUDIO_PREVIEW_BITRATE, settings.AUDIO_WAVEFORM_PEAKS)
+
+
+def store_preview(pk, source, result):
+    """Save the preview clip and record it on the sample, unless its file was
+    replaced in the meantime. Returns True if the row was updated."""
+    digest = result["sha256"]
+    name = preview_name(source, digest, result["extension"])
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(result["preview"]))
+    preview = {"source": source, "sha256": digest, "file": name,
+               "duration": result["duration"], "peaks": result["peaks"]}
+    updated = AudioSample.objects.filter(pk=pk, file=source).update(preview=preview)
+    if updated:
+        # The sample is part of its project's serialized fragment.
+        parent_id = AudioSample.objects.filter(pk=pk).values_list("project_id", flat=True).first()
+        MusicProject.objects.filter(pk=parent_id).update(updated_at=timezone.now())
+        bump_version("music")
+    return bool(updated)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers never inherit the server's threads or DB connections
+            _pool = ProcessPoolExecutor(settings.AUDIO_PREVIEW_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def generate(pk):
+    """Analyse and store one sample's preview, on this thread or the pool."""
+    source = AudioSample.objects.filter(pk=pk).values_list("file", flat=True).first()
+    path = source_path(source)
+    if path is None:
+        return
+
+    def finish(result):
+        try:
+            store_preview(pk, source, result)
+        finally:
+            if settings.AUDIO_PREVIEW_WORKERS:
+                connection.close()  # the pool's callback thread
+
+    if not settings.AUDIO_PREVIEW_WORKERS:
+        try:
+            finish(analyse_audio(path, *analysis_args()))
+        except Exception:  # an undecodable upload must not fail the request that saved it
+            logger.exception("Audio preview failed for AudioSample %s (%s)", pk, source)
+        return
+
+    def done(future):
+        try:
+            finish(future.result())
+        except Exception:
+            logger.exception("Audio preview failed for AudioSample %s (%s)", pk, source)
+
+    get_pool().submit(analyse_audio, path, *analysis_args()).add_done_callback(done)
+
+
+def schedule_preview(sample):
+    """Generate ``sample``'s preview once the current transaction commits."""
+    if is_current(sample):
+        return
+    pk = sample.pk
+    transaction.on_commit(lambda: generate(pk))
+
+
+def preview_fields(sample):
+    """``{"preview_url", "duration", "peaks"}`` for the current file, or Nones."""
+    recorded = sample.preview
+    if not recorded or recorded.get("source") != sample.file.name:
+        return {"preview_url": None, "duration": None, "peaks": None}
+    return {
+        "preview_url": media_url(recorded["file"]),
+        "duration": recorded["duration"],
+        "peaks": recorded["peaks"],
+    }
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting == "AUDIO_PREVIEW_WORKERS":
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
@@ -0,0 +1,211 @@
+"""JWT authentication that resolves the user (and profile) from a cache.
+
+``JWTAuthentication`` loads the User on every request and views then load
+``user.profile`` separately. ``CachedJWTAuthentication`` keeps the principal
+(the User with its profile attached) in two layers:
+
+* a per-process dict of at most ``AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES`` users,
+  each trusted for ``AUTH_PRINCIPAL_LOCAL_TTL`` seconds;
+* the shared Django cache, keyed by user id and a per-user version.
+
+Saving or deleting the user or profile, or blacklisting one of the user's
+tokens, bumps the version (see ``signals.py``), so every process reloads the
+principal from the database once its short local entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+_local = OrderedDict()  # str(user id) -> (expires_at, user), soonest to expire first
+_local_lock = threading.Lock()
+_stats = {"local": 0, "shared": 0, "database": 0}
+
+
+def _version_key(user_id):
+    return f"auth:principal:version:{user_id}"
+
+
+def _principal_key(user_id, version):
+    return f"auth:principal:{user_id}:{version}"
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_principal(user_id):
+    """Drop the cached principal for ``user_id`` everywhere (other processes
+    within ``AUTH_PRINCIPAL_LOCAL_TTL``)."""
+    user_id = str(user_id)
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, time.time_ns() // 1000, timeout=None):
+            cache.incr(key)
+    with _local_lock:
+        _local.pop(user_id, None)
+
+
+def principal_stats():
+    """Where principals were resolved from in this process."""
+    return dict(_stats)
+
+
+def _local_principal(user_id):
+    local = _local.get(user_id)
+    if local is not None and local[0] > time.monotonic():
+        _stats["local"] += 1
+        return local[1]
+    return None
+
+
+def _remember(user_id, user):
+    now = time.monotonic()
+    with _local_lock:
+        _local[user_id] = (now + settings.AUTH_PRINCIPAL_LOCAL_TTL, user)
+        _local.move_to_end(user_id)
+        # Every entry gets the same TTL, so the oldest entries expire first.
+        while _local:
+            expires_at, _user = next(iter(_local.values()))
+            if expires_at > now and len(_local) <= settings.AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES:
+                break
+            _local.popitem(last=False)
+    return user
+
+
+def _principal_queryset(user_model, user_id):
+    return user_model.objects.select_related("profile").filter(**{api_settings.USER_ID_FIELD: user_id})
+
+
+def load_principal(user_model, user_id):
+    """Return the user with its profile attached, or None if it does not exist."""
+    user_id = str(user_id)
+    user = _local_principal(user_id)
+    if user is not None:
+        return user
+
+    key = _principal_key(user_id, _version(user_id))
+    user = cache.get(key)
+    if user is not None:
+        _stats["shared"] += 1
+    else:
+        user = _principal_queryset(user_model, user_id).first()
+        if user is None:
+            return None
+        _stats["database"] += 1
+        cache.set(key, user, settings.AUTH_PRINCIPAL_CACHE_TIMEOUT)
+    return _remember(user_id, user)
+
+
+async def _aversion(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns() // 1000, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def aload_principal(user_model, user_id):
+    """Async ``load_principal``."""
+    user_id = str(user_id)
+    user = _local_principal(user_id)
+    if user is not None:
+        return user
+
+    key = _principal_key(user_id, await _aversion(user_id))
+    user = await cache.aget(key)
+    if user is not None:
+        _stats["shared"] += 1
+    else:
+        user = await _principal_queryset(user_model, user_id).afirst()
+        if user is None:
+            return None
+        _stats["database"] += 1
+        await cache.aset(key, user, settings.AUTH_PRINCIPAL_CACHE_TIMEOUT)
+    return _remember(user_id, user)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` with the user lookup served from ``load_principal``.
+
+    The returned user is shared between requests in a process: treat
+    ``request.user`` as read-only and reload it before modifying it.
+    """
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def get_user(self, validated_token):
+        return self._check_user(load_principal(self.user_model, self._user_id(validated_token)), validated_token)
+
+    async def aauthenticate(self, request):
+        """Async ``authenticate`` for plain Django async views (DRF has none):
+        ``(user, validated_token)`` or None; raises ``AuthenticationFailed``."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = await aload_principal(self.user_model, self._user_id(validated_token))
+        return self._check_user(user, validated_token), validated_token
+
+    def _check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def token_user_id(request):
+    """The user id in the request's access token, or None.
+
+    Only the signature, expiry and token type are checked: no database,
+    blacklist or principal lookup. Enough to route the request's reads (see
+    ``routers.py``) before, or without, authentication; never to authorize.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+@receiver(setting_changed)
+def reset_local_principals(setting, **kwargs):
+    if setting.startswith("AUTH_PRINCIPAL_") or setting == "CACHES":
+        with _local_lock:
+            _local.clear()
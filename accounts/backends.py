@@ -0,0 +1,37 @@
+"""Authentication backend that accepts a username or an email address."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """Resolve the login with one indexed query and hash the password once.
+
+    A username match wins over an email match. An email shared by several
+    accounts is ambiguous and treated like an unknown login. Unknown logins
+    still run the hasher once (on a throwaway user), so the response time
+    does not reveal whether an account exists.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        # login_view serializes the profile, so fetch it in the same query.
+        candidates = list(
+            UserModel._default_manager.filter(Q(username=username) | Q(email=username)).select_related("profile")
+        )
+        user = next((u for u in candidates if u.get_username() == username), None)
+        if user is None and len(candidates) == 1:
+            user = candidates[0]
+
+        if user is None:
+            # Same cost as a real check (see ModelBackend.authenticate).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,218 @@
+"""Fast refresh-token blacklist checks and blacklist table metrics.
+
+simplejwt checks every refresh/logout token with a join against
+``BlacklistedToken``, and rotation blacklists a token on every refresh, so
+the table keeps growing. ``FilteredRefreshToken`` answers the common case
+("not blacklisted") from an in-memory Bloom filter of blacklisted JTIs. A
+filter hit is only a "maybe" and is confirmed in the database.
+
+The filter stays exact by following a version counter in the shared cache,
+which is bumped after every blacklist commits (see ``signals.py``). When the
+counter moves, the rows added since the last load are read by primary key,
+together with the last ``TOKEN_BLACKLIST_FILTER_RESCAN`` ids before them:
+ids are allocated at insert but rows become visible at commit, so on
+PostgreSQL id 10 can commit after id 11 has been read.
+The whole filter is rebuilt every ``TOKEN_BLACKLIST_FILTER_REFRESH`` seconds,
+which drops expired tokens. Use a shared cache backend when running more
+than one process.
+
+``prune_token_blacklist`` deletes expired rows in bounded batches.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .gateway import LatencyHistogram
+
+
+VERSION_KEY = "auth:blacklist:version"
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing (Kirsch-Mitzenmacher) over one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_blacklist_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        if not cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None):
+            cache.incr(VERSION_KEY)
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._version = None
+        self._last_id = 0
+        self._seen = set()  # ids in the rescanned window already in the filter
+        self._built_at = 0.0
+        self.latency = LatencyHistogram()
+        self.stats = {"checks": 0, "filtered": 0, "database": 0, "false_positives": 0, "rebuilds": 0}
+
+    def _rebuild(self):
+        # Version, then high-water mark, then rows up to it: anything newer is
+        # picked up by _catch_up once the version moves.
+        self._version = _current_version()
+        self._last_id = BlacklistedToken.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        jtis = list(
+            BlacklistedToken.objects.filter(id__lte=self._last_id, token__expires_at__gt=timezone.now())
+            .values_list("token__jti", flat=True)
+        )
+        self._seen = set(
+            BlacklistedToken.objects.filter(id__gt=self._last_id - settings.TOKEN_BLACKLIST_FILTER_RESCAN,
+                                            id__lte=self._last_id).values_list("id", flat=True)
+        )
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(jtis)), settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._built_at = time.monotonic()
+        self.stats["rebuilds"] += 1
+
+    def _catch_up(self):
+        # Read the version first: a blacklist committed after this point
+        # bumps it again and is picked up on the next check.
+        version = _current_version()
+        if version == self._version:
+            return
+        self._version = version
+        window_start = self._last_id - settings.TOKEN_BLACKLIST_FILTER_RESCAN
+        rows = BlacklistedToken.objects.filter(id__gt=window_start).exclude(id__in=self._seen)
+        for row_id, jti in rows.values_list("id", "token__jti"):
+            self._bloom.add(jti)
+            self._seen.add(row_id)
+            self._last_id = max(self._last_id, row_id)
+        window_start = self._last_id - settings.TOKEN_BLACKLIST_FILTER_RESCAN
+        self._seen = {row_id for row_id in self._seen if row_id > window_start}
+
+    def sync(self):
+        with self._lock:
+            stale = time.monotonic() - self._built_at > settings.TOKEN_BLACKLIST_FILTER_REFRESH
+            if self._bloom is None or stale or self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+            else:
+                self._catch_up()
+
+    def add(self, jti):
+        """Record a token blacklisted by this process without waiting for a sync."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def is_blacklisted(self, jti):
+        started = time.perf_counter()
+        try:
+            self.sync()
+            self.stats["checks"] += 1
+            if jti not in self._bloom:
+                self.stats["filtered"] += 1
+                return False
+            self.stats["database"] += 1
+            found = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if not found:
+                self.stats["false_positives"] += 1
+            return found
+        finally:
+            self.latency.observe((time.perf_counter() - started) * 1000)
+
+    def metrics(self):
+        return {
+            **self.stats,
+            "filter_entries": self._bloom.count if self._bloom else 0,
+            "filter_bytes": len(self._bloom.bits) if self._bloom else 0,
+            "check_latency": self.latency.snapshot(),
+        }
+
+
+_filter = BlacklistFilter()
+
+
+def get_blacklist_filter():
+    return _filter
+
+
+def blacklist_metrics():
+    """Blacklist table sizes plus this process's filter and check-latency metrics."""
+    now = timezone.now()
+    return {
+        "outstanding_tokens": OutstandingToken.objects.count(),
+        "blacklisted_tokens": BlacklistedToken.objects.count(),
+        "expired_tokens": OutstandingToken.objects.filter(expires_at__lte=now).order_by().count(),
+        "filter": _filter.metrics(),
+    }
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check goes through the Bloom filter."""
+
+    def check_blacklist(self):
+        if _filter.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+def prune_expired_tokens(batch_size=1000, pause=0.0):
+    """Delete expired outstanding tokens and their blacklist rows.
+
+    Each batch is its own short transaction, so writers are never blocked
+    for longer than one batch. Returns ``(tokens deleted, batches)``.
+    """
+    deleted = batches = 0
+    cutoff = timezone.now()
+    while True:
+        with transaction.atomic():
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=cutoff)
+                .order_by("expires_at")  # walks the expiry index from the oldest
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # cascades to the blacklist rows with one DELETE ... IN (ids)
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return deleted, batches
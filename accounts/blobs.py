@@ -0,0 +1,87 @@
+"""Reference counts for stored media files.
+
+Every name stored in one of ``MEDIA_FIELDS`` counts as one reference to that
+file in ``MediaBlob``. Receivers in ``signals.py`` move the counts when a row is
+created, deleted or has its file replaced (``update_project``,
+``delete_project``, attaching an upload). A file whose count drops to zero
+stays on disk until ``gc_media`` collects it.
+
+Writes that send no signals (``bulk_create``, queryset ``update``) leave the
+counts behind, so ``gc_media`` first recounts from the tables with one
+grouped query per field.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import ArtworkImage, AudioSample, ChunkedUpload, FilmProject, MediaBlob, MusicProject
+from .thumbnails import THUMBNAIL_SOURCES, thumbnails_field
+
+
+# model -> its stored media fields
+MEDIA_FIELDS = {
+    FilmProject: ("poster_image",),
+    MusicProject: ("album_cover",),
+    AudioSample: ("file",),
+    ArtworkImage: ("image",),
+    ChunkedUpload: ("file",),  # completed but not yet attached
+}
+
+
+def adjust_references(changes):
+    """Apply ``{name: delta}`` to the reference counts."""
+    changes = {name: delta for name, delta in changes.items() if name and delta}
+    if not changes:
+        return
+    MediaBlob.objects.bulk_create([MediaBlob(name=name) for name in changes], ignore_conflicts=True)
+    for delta in set(changes.values()):
+        names = [name for name, d in changes.items() if d == delta]
+        MediaBlob.objects.filter(name__in=names).update(refcount=F("refcount") + delta)
+
+
+def media_names(instance):
+    return [getattr(instance, field).name for field in MEDIA_FIELDS[type(instance)]]
+
+
+def stored_names(sender, instance, update_fields=None):
+    """The media names ``instance``'s row holds in the database, or None when
+    the save cannot change them."""
+    fields = MEDIA_FIELDS[sender]
+    if instance._state.adding or (update_fields is not None and not set(fields) & set(update_fields)):
+        return None
+    stored = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    return list(stored) if stored else None
+
+
+def recount():
+    """Rebuild every reference count from the media fields; returns how many
+    names are referenced."""
+    counts = Counter()
+    for model, fields in MEDIA_FIELDS.items():
+        for field in fields:
+            rows = model.objects.exclude(**{field: ""}).values(field).annotate(n=Count("pk")).order_by()
+            for row in rows.iterator():
+                counts[row[field]] += row["n"]
+    with transaction.atomic():
+        MediaBlob.objects.exclude(refcount=0).update(refcount=0)
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name, refcount=n) for name, n in counts.items()],
+            update_conflicts=True, unique_fields=["name"], update_fields=["refcount"], batch_size=1000,
+        )
+    return len(counts)
+
+
+def referenced_derivatives():
+    """Names of the thumbnails and audio previews recorded on current rows."""
+    names = set()
+    for model in THUMBNAIL_SOURCES:
+        field = thumbnails_field(model)
+        for recorded in model.objects.exclude(**{field: {}}).values_list(field, flat=True).iterator():
+            for entries in recorded.values():
+                if isinstance(entries, dict):
+                    names.update(entries.values())
+    for recorded in AudioSample.objects.exclude(preview={}).values_list("preview", flat=True).iterator():
+        names.add(recorded.get("file"))
+    names.discard(None)
+    return names
@@ -0,0 +1,221 @@
+"""Cursor-paginated feed across the film, music and art tables.
+
+A page is one indexed ``ORDER BY <sort key> DESC, id DESC`` scan of
+``ProjectIndex`` followed by a batched hydrate of only the projects on that
+page through the per-project fragment cache (see ``projects.py``). Filters
+and sorts are evaluated in SQL against ``ProjectIndex`` indexes, so the
+number of queries and rows read never depends on the number of projects.
+"""
+import asyncio
+import base64
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from .models import ProjectIndex, funded_ratio
+from .projects import PROJECT_CATEGORIES, aserialize_projects, stamps, serialize_projects
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# ?sort= -> (ProjectIndex key ordered descending, cursor value decoder)
+FEED_SORTS = {
+    "newest": ("created_at", datetime.fromisoformat),
+    "most_funded": ("raised_amount", Decimal),
+    # furthest along among projects that have not reached their goal yet
+    "closest_to_goal": ("funded_ratio", float),
+}
+DEFAULT_SORT = "newest"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidFeedRequest(ValueError):
+    """Bad list query parameters; the message is safe to show to clients."""
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort, value, pk):
+    raw = json.dumps([sort, _cursor_value(value), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort=DEFAULT_SORT):
+    """Return ``(value, pk)``; a cursor issued for another sort is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor_sort != sort:
+            raise ValueError(f"cursor belongs to sort {cursor_sort!r}")
+        return FEED_SORTS[sort][1](value), int(pk)
+    except (TypeError, ValueError, KeyError, InvalidOperation) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def parse_page_size(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be >= 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _decimal(value):
+    try:
+        return Decimal(value)
+    except InvalidOperation as e:
+        raise ValueError(f"not a number: {value!r}") from e
+
+
+def _percent(value):
+    try:
+        percent = float(value)
+    except ValueError as e:
+        raise ValueError(f"not a number: {value!r}") from e
+    if not math.isfinite(percent):
+        raise ValueError(f"not a finite number: {value!r}")
+    return percent / 100
+
+
+def parse_feed_filters(params):
+    """Translate list query parameters into ``ProjectIndex`` lookups.
+
+    ``category``, ``creator`` (username), ``min_goal``/``max_goal`` and
+    ``min_funded``/``max_funded`` (percent of goal). Raises ``ValueError``.
+    """
+    filters = {}
+    category = params.get("category")
+    if category:
+        if category not in PROJECT_CATEGORIES:
+            raise ValueError(f"unknown category {category!r}")
+        filters["category"] = category
+    if params.get("creator"):
+        filters["creator__username"] = params["creator"]
+    if params.get("min_goal"):
+        filters["goal_amount__gte"] = _decimal(params["min_goal"])
+    if params.get("max_goal"):
+        filters["goal_amount__lte"] = _decimal(params["max_goal"])
+    if params.get("min_funded"):
+        filters["funded_ratio__gte"] = _percent(params["min_funded"])
+    if params.get("max_funded"):
+        filters["funded_ratio__lte"] = _percent(params["max_funded"])
+    return filters
+
+
+def parse_feed_params(params, **filters):
+    """``project_feed`` kwargs from ``?cursor=&limit=&sort=`` and the list filters.
+
+    ``filters`` passed by the view take precedence over query parameters.
+    Raises ``InvalidFeedRequest``.
+    """
+    try:
+        limit = parse_page_size(params.get("limit"))
+    except ValueError:
+        raise InvalidFeedRequest("Invalid limit")
+
+    sort = params.get("sort") or DEFAULT_SORT
+    if sort not in FEED_SORTS:
+        raise InvalidFeedRequest(f"Invalid sort, expected one of: {', '.join(FEED_SORTS)}")
+    try:
+        filters = {**parse_feed_filters(params), **filters}
+    except ValueError as e:
+        raise InvalidFeedRequest(f"Invalid filter: {e}")
+
+    cursor = params.get("cursor")
+    try:
+        cursor = decode_cursor(cursor, sort) if cursor else None
+    except InvalidCursor:
+        raise InvalidFeedRequest("Invalid cursor")
+    return {"cursor": cursor, "limit": limit, "sort": sort, **filters}
+
+
+def _group_by_category(rows):
+    ids_by_category = defaultdict(list)
+    for row in rows:
+        ids_by_category[row.category].append(row.project_id)
+    return ids_by_category
+
+
+def _in_row_order(rows, serialized_by_category):
+    serialized = {}
+    for category, by_pk in serialized_by_category.items():
+        for pk, data in by_pk.items():
+            serialized[(category, pk)] = {**data, "category": category, "unique_id": f"{category}-{pk}"}
+
+    # Rows whose project vanished between the scan and the hydrate are skipped.
+    return [
+        serialized[(row.category, row.project_id)]
+        for row in rows
+        if (row.category, row.project_id) in serialized
+    ]
+
+
+def hydrate(rows):
+    """Serialize the projects referenced by ``rows`` (ProjectIndex), in order."""
+    return _in_row_order(rows, {
+        category: serialize_projects(category, stamps(category, id__in=ids))
+        for category, ids in _group_by_category(rows).items()
+    })
+
+
+async def ahydrate(rows):
+    """Async ``hydrate``; the categories on the page are fetched concurrently."""
+    ids_by_category = _group_by_category(rows)
+    pages = await asyncio.gather(*(
+        aserialize_projects(category, stamps(category, id__in=ids))
+        for category, ids in ids_by_category.items()
+    ))
+    return _in_row_order(rows, dict(zip(ids_by_category, pages)))
+
+
+def feed_queryset(sort=DEFAULT_SORT, cursor=None, **filters):
+    """``ProjectIndex`` rows for one sort/filter combination, in page order."""
+    key = FEED_SORTS[sort][0]
+    index = ProjectIndex.objects.annotate(funded_ratio=funded_ratio()).filter(**filters)
+    if sort == "closest_to_goal":
+        index = index.filter(funded_ratio__lt=1)
+    index = index.order_by(f"-{key}", "-id")
+    if cursor is not None:
+        value, pk = cursor
+        index = index.filter(Q(**{f"{key}__lt": value}) | Q(**{key: value, "id__lt": pk}))
+    return index.only("id", "category", "project_id", "created_at", "raised_amount")
+
+
+def _page(rows, limit, sort):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, getattr(rows[-1], FEED_SORTS[sort][0]), rows[-1].pk)
+    return rows, next_cursor
+
+
+def project_feed(cursor=None, limit=DEFAULT_PAGE_SIZE, sort=DEFAULT_SORT, **filters):
+    """Return ``(results, next_cursor)`` for one page of the unified feed.
+
+    ``filters`` are applied to ``ProjectIndex``, which is annotated with
+    ``funded_ratio`` (e.g. ``creator=user``, ``funded_ratio__gte=0.5``).
+    """
+    rows, next_cursor = _page(list(feed_queryset(sort, cursor, **filters)[:limit + 1]), limit, sort)
+    return hydrate(rows), next_cursor
+
+
+async def aproject_feed(cursor=None, limit=DEFAULT_PAGE_SIZE, sort=DEFAULT_SORT, **filters):
+    """Async ``project_feed``."""
+    rows = [row async for row in feed_queryset(sort, cursor, **filters)[:limit + 1]]
+    rows, next_cursor = _page(rows, limit, sort)
+    return await ahydrate(rows), next_cursor
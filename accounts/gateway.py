@@ -0,0 +1,218 @@
+"""Process-wide payment gateway used by the Razorpay views.
+
+``get_gateway()`` returns one shared instance per configured backend instead
+of building a ``razorpay.Client`` (and a fresh HTTP session) per request:
+
+* ``"razorpay"`` wraps the real client around a pooled, keep-alive
+  ``requests`` session with connect/read timeouts and bounded retries with
+  jitter for failures where the request never reached Razorpay.
+* ``"fake"`` is an in-process stand-in that creates orders locally and
+  checks signatures with the same HMAC scheme, so the order path can be
+  load-tested offline.
+
+Every call is timed into a per-operation latency histogram
+(``gateway_metrics()``).
+"""
+import bisect
+import hashlib
+import hmac
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+try:
+    import razorpay
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:
+    razorpay = None
+
+
+class GatewayError(Exception):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    pass
+
+
+class SignatureError(GatewayError):
+    pass
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of call latencies in milliseconds."""
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.errors = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms, error=False):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+            self.total_ms += ms
+            self.errors += int(error)
+
+    def percentile(self, q):
+        """Upper bucket bound containing the ``q`` quantile (None when empty)."""
+        total = sum(self.counts)
+        if not total:
+            return None
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= q * total:
+                return self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else float("inf")
+
+    def snapshot(self):
+        total = sum(self.counts)
+        return {
+            "count": total,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / total if total else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([f"le_{b}" for b in self.BOUNDS_MS] + ["inf"], self.counts)),
+        }
+
+
+class BaseGateway:
+    def __init__(self):
+        self.histograms = {}
+        self._histograms_lock = threading.Lock()
+
+    def _histogram(self, operation):
+        with self._histograms_lock:
+            return self.histograms.setdefault(operation, LatencyHistogram())
+
+    def _timed(self, operation, fn):
+        started = time.perf_counter()
+        error = True
+        try:
+            result = fn()
+            error = False
+            return result
+        finally:
+            self._histogram(operation).observe((time.perf_counter() - started) * 1000, error=error)
+
+    def create_order(self, payload):
+        return self._timed("create_order", lambda: self._create_order(payload))
+
+    def verify_payment_signature(self, params):
+        return self._timed("verify_payment_signature", lambda: self._verify_payment_signature(params))
+
+    def metrics(self):
+        return {operation: histogram.snapshot() for operation, histogram in self.histograms.items()}
+
+
+class _TimeoutSession(requests.Session if razorpay else object):
+    """requests has no session-wide timeout; apply ours to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class RazorpayGateway(BaseGateway):
+    def __init__(self):
+        super().__init__()
+        if razorpay is None:
+            raise GatewayUnavailable("Razorpay library not installed on server")
+        session = _TimeoutSession((settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.RAZORPAY_POOL_SIZE)
+        session.mount("https://", adapter)
+        self.client = razorpay.Client(session=session, auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+    def _with_retries(self, fn):
+        # Only failures to connect are retried: the request never reached
+        # Razorpay, so retrying cannot create a second order.
+        attempts = settings.RAZORPAY_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                return fn()
+            except requests.ConnectionError:
+                if attempt == attempts - 1:
+                    raise
+                delay = settings.RAZORPAY_RETRY_BACKOFF * (2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def _create_order(self, payload):
+        return self._with_retries(lambda: self.client.order.create(data=payload))
+
+    def _verify_payment_signature(self, params):
+        try:
+            self.client.utility.verify_payment_signature(params)
+        except razorpay.errors.SignatureVerificationError as e:
+            raise SignatureError(str(e)) from e
+
+
+class FakeGateway(BaseGateway):
+    """Local stand-in for Razorpay with an optional simulated round-trip."""
+
+    def _create_order(self, payload):
+        latency_ms = settings.FAKE_GATEWAY_LATENCY_MS
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return {
+            "id": f"order_fake{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": payload["amount"],
+            "amount_paid": 0,
+            "amount_due": payload["amount"],
+            "currency": payload.get("currency", "INR"),
+            "receipt": payload.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "created_at": int(time.time()),
+        }
+
+    def _verify_payment_signature(self, params):
+        message = f"{params['razorpay_order_id']}|{params['razorpay_payment_id']}".encode()
+        expected = hmac.new(settings.RAZORPAY_KEY_SECRET.encode(), message, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, params.get("razorpay_signature") or ""):
+            raise SignatureError("Razorpay Signature Verification Failed")
+
+
+GATEWAY_BACKENDS = {
+    "razorpay": RazorpayGateway,
+    "fake": FakeGateway,
+}
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway():
+    """Shared gateway for ``settings.PAYMENT_GATEWAY_BACKEND``."""
+    backend = settings.PAYMENT_GATEWAY_BACKEND
+    gateway = _gateways.get(backend)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(backend)
+            if gateway is None:
+                gateway = _gateways[backend] = GATEWAY_BACKENDS[backend]()
+    return gateway
+
+
+def gateway_metrics():
+    return {backend: gateway.metrics() for backend, gateway in _gateways.items()}
+
+
+@receiver(setting_changed)
+def reset_gateways(setting, **kwargs):
+    if setting.startswith(("RAZORPAY_", "PAYMENT_GATEWAY_", "FAKE_GATEWAY_")):
+        _gateways.clear()
@@ -0,0 +1,145 @@
+"""Idempotency-Key support for non-idempotent POSTs (``create_order``).
+
+Results live in the shared cache so a retry that lands on another worker
+still replays the first response; ``cache.add`` on an in-flight marker makes
+exactly one worker run the operation while the others poll for its result.
+A per-process layer in front of it is bounded (least recently used keys are
+dropped first) and coalesces concurrent requests within a worker, so a
+client retrying a slow request never triggers a second gateway call. All
+entries expire after a TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different payload."""
+
+
+class IdempotencyBusy(Exception):
+    """Another worker is still running the request with this key."""
+
+
+class IdempotencyStore:
+    def __init__(self, max_entries, ttl, inflight_timeout=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.inflight_timeout = inflight_timeout
+        self._entries = OrderedDict()  # key -> (fingerprint, expires_at, result)
+        self._inflight = {}  # key -> (fingerprint, Future)
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, (_fingerprint, expires_at, _result) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def run(self, key, fingerprint, operation, cacheable=lambda result: True):
+        """Return ``(result, replayed)``; ``operation`` runs at most once per live key."""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                if entry[0] != fingerprint:
+                    raise IdempotencyConflict(key)
+                self._entries.move_to_end(key)
+                return entry[2], True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                future = Future()
+                self._inflight[key] = (fingerprint, future)
+            elif inflight[0] != fingerprint:
+                raise IdempotencyConflict(key)
+
+        if inflight is not None:
+            return inflight[1].result(), True
+
+        try:
+            result, replayed = self._run_shared(key, fingerprint, operation, cacheable)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable(result):
+                self._entries[key] = (fingerprint, time.monotonic() + self.ttl, result)
+                self._evict(time.monotonic())
+        future.set_result(result)
+        return result, replayed
+
+    def _run_shared(self, key, fingerprint, operation, cacheable):
+        result_key = f"idempotency:{key}"
+        marker_key = f"idempotency:{key}:inflight"
+        deadline = time.monotonic() + self.inflight_timeout
+        while True:
+            stored = cache.get(result_key)
+            if stored is not None:
+                if stored[0] != fingerprint:
+                    raise IdempotencyConflict(key)
+                return stored[1], True
+            if cache.add(marker_key, fingerprint, self.inflight_timeout):
+                break
+            holder = cache.get(marker_key)
+            if holder is not None and holder != fingerprint:
+                raise IdempotencyConflict(key)
+            if time.monotonic() >= deadline:
+                raise IdempotencyBusy(key)
+            time.sleep(0.05)
+
+        try:
+            # The previous holder may have stored its result between our
+            # last read and the add.
+            stored = cache.get(result_key)
+            if stored is not None:
+                if stored[0] != fingerprint:
+                    raise IdempotencyConflict(key)
+                return stored[1], True
+            result = operation()
+            if cacheable(result):
+                cache.set(result_key, (fingerprint, result), self.ttl)
+            return result, False
+        finally:
+            cache.delete(marker_key)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore(
+                    settings.IDEMPOTENCY_MAX_KEYS,
+                    settings.IDEMPOTENCY_KEY_TTL,
+                    settings.IDEMPOTENCY_INFLIGHT_TIMEOUT,
+                )
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith("IDEMPOTENCY_"):
+        _store = None
@@ -0,0 +1,55 @@
+"""Pillow work for image derivatives.
+
+Deliberately free of Django imports: ``render_thumbnails`` runs in spawned
+worker processes that never set Django up.
+"""
+import hashlib
+import io
+
+from PIL import Image, ImageOps
+
+
+# format name -> (Pillow format, file extension, save options)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"method": 4}),
+    "jpeg": ("JPEG", "jpg", {"optimize": True, "progressive": True}),
+}
+
+
+def file_digest(path):
+    """SHA-256 of the file at ``path``, read in blocks."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def render_thumbnails(path, widths, formats, quality):
+    """Encode the image at ``path`` at each width below the original (or once
+    at the original width if it is already smaller) in each of ``formats``.
+
+    Returns ``(sha256 of the file, [(width, format, bytes), ...])``. Only the
+    path crosses to the worker; the file is read here.
+    """
+    digest = file_digest(path)
+    with Image.open(path) as source:
+        # JPEG sources decode straight at a reduced scale when that is enough.
+        source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    targets = sorted({width for width in widths if width < image.width}) or [image.width]
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    outputs = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for name in formats:
+            pillow_format, _extension, options = FORMATS[name]
+            frame = resized
+            if pillow_format == "JPEG" and frame.mode == "RGBA":
+                frame = Image.new("RGB", frame.size, (255, 255, 255))
+                frame.paste(resized, mask=resized.getchannel("A"))
+            buffer = io.BytesIO()
+            frame.save(buffer, pillow_format, quality=quality, **options)
+            outputs.append((width, name, buffer.getvalue()))
+    return digest, outputs
@@ -0,0 +1,179 @@
+"""Per-request database and timing metrics.
+
+``RequestMetricsMiddleware`` wraps every database connection the request uses
+with ``execute_wrapper`` and records the number of queries, their total time,
+exact duplicates (same SQL and parameters) and repeated statements (same SQL,
+different parameters: the N+1 shape). Code adds its own spans with
+``timed(name)``; ``projects._serialize_fresh`` records ``serialize``.
+
+Each request is logged as one JSON line on the ``accounts.requests`` logger,
+at WARNING when it ran duplicate or repeated queries, and with
+``SERVER_TIMING_HEADER`` the numbers are returned as a ``Server-Timing``
+header. Under ASGI the async views run their queries on another thread, so
+only timings and sizes are recorded for them.
+
+``query_budget(n)`` asserts that a block or test runs at most ``n`` queries.
+"""
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import ContextDecorator, ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger("accounts.requests")
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Query and span totals; also usable as a ``connection.execute_wrapper``."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+        self.spans = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.statements[sql] += 1
+            self.executions[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        """Queries that repeated an earlier one exactly."""
+        return sum(n - 1 for n in self.executions.values() if n > 1)
+
+    def repeated(self, threshold):
+        return [{"sql": sql[:200], "count": n} for sql, n in self.statements.most_common() if n >= threshold]
+
+    def describe(self):
+        return "\n".join(f"{n}x {sql}" for sql, n in self.statements.most_common())
+
+
+@contextmanager
+def recording(metrics):
+    """Record every query on every connection of this thread into ``metrics``."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        yield metrics
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's ``name`` span."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.spans[name] += (time.perf_counter() - started) * 1000
+
+
+class query_budget(ContextDecorator):
+    """Fail with the offending statements if the block runs more than
+    ``max_queries`` queries (or more than ``max_duplicates`` exact repeats)."""
+
+    def __init__(self, max_queries, max_duplicates=None):
+        self.max_queries = max_queries
+        self.max_duplicates = max_duplicates
+
+    def __enter__(self):
+        self.metrics = RequestMetrics()
+        self._recording = recording(self.metrics)
+        return self._recording.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._recording.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+        if self.metrics.queries > self.max_queries:
+            raise AssertionError(
+                f"{self.metrics.queries} queries, over the budget of {self.max_queries}:\n{self.metrics.describe()}"
+            )
+        if self.max_duplicates is not None and self.metrics.duplicates > self.max_duplicates:
+            raise AssertionError(
+                f"{self.metrics.duplicates} duplicate queries, over the budget of {self.max_duplicates}:\n"
+                f"{self.metrics.describe()}"
+            )
+        return False
+
+
+def _server_timing(metrics, total_ms):
+    entries = [f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries"']
+    entries += [f"{name};dur={ms:.1f}" for name, ms in metrics.spans.items()]
+    entries.append(f"app;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with recording(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        repeated = metrics.repeated(settings.REQUEST_REPEATED_QUERY_THRESHOLD)
+        duplicates = metrics.duplicates
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 2),
+            "db_queries": metrics.queries,
+            "db_ms": round(metrics.db_ms, 2),
+            "duplicate_queries": duplicates,
+            "repeated_queries": repeated,
+            **{f"{name}_ms": round(ms, 2) for name, ms in metrics.spans.items()},
+            "response_bytes": None if response.streaming else len(response.content),
+        }
+        logger.log(logging.WARNING if duplicates or repeated else logging.INFO,
+                   json.dumps(record), extra={"metrics": record})
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = _server_timing(metrics, total_ms)
+        return response
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.project_index import backfill_project_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProjectIndex table from the film, music and art project tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = backfill_project_index(batch_size=options["batch_size"])
+        for category, count in written.items():
+            self.stdout.write(f"{category}: {count} rows indexed")
+        self.stdout.write(self.style.SUCCESS("ProjectIndex backfill complete."))
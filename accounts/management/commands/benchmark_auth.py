@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import CachedJWTAuthentication
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare identity queries and time per authenticated request (resolve the "
+        "JWT user, then read user.profile as me_view does) for JWTAuthentication "
+        "and CachedJWTAuthentication. The benchmark user is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        with transaction.atomic():
+            user = User.objects.create_user("bench_auth_user", "bench_auth@example.com", "benchmark-password-123")
+            request = RequestFactory().get("/api/projects/me/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+            for name, authenticator in (("JWTAuthentication", JWTAuthentication()),
+                                        ("CachedJWTAuthentication", CachedJWTAuthentication())):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(n):
+                        authenticated, _token = authenticator.authenticate(request)
+                        authenticated.profile.role
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:>24}: {len(queries) / n:.3f} queries/request, "
+                    f"{elapsed / n * 1e6:.0f}us/request"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,48 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from accounts.gateway import get_gateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark payments/create-order/ in-process. Uses the fake gateway by "
+        "default, so it runs offline; note that it writes Payment rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--backend", default="fake", choices=["fake", "razorpay"])
+        parser.add_argument("--latency-ms", type=float, default=0,
+                            help="Simulated gateway round-trip for the fake backend.")
+
+    def handle(self, *args, **options):
+        body = json.dumps({"amount": "100.00", "category": "film", "project_id": 1})
+
+        def send(_):
+            try:
+                return Client(SERVER_NAME="localhost").post(
+                    "/api/projects/payments/create-order/", body, content_type="application/json"
+                ).status_code
+            finally:
+                connection.close()
+
+        with override_settings(PAYMENT_GATEWAY_BACKEND=options["backend"],
+                               FAKE_GATEWAY_LATENCY_MS=options["latency_ms"]):
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                codes = list(pool.map(send, range(options["requests"])))
+            elapsed = time.monotonic() - started
+            metrics = get_gateway().metrics().get("create_order", {})
+
+        ok = codes.count(200)
+        self.stdout.write(f"{ok}/{len(codes)} orders in {elapsed:.2f}s ({len(codes) / elapsed:.1f} req/s)")
+        self.stdout.write(
+            "gateway create_order: p50<={p50_ms}ms p95<={p95_ms}ms p99<={p99_ms}ms errors={errors}".format(**metrics)
+        )
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+
+from accounts.feed import feed_queryset
+from accounts.models import Payment
+
+
+# The SQLite settings before the tuned profile: rollback journal, fsync on
+# every commit, no memory map.
+ROLLBACK_JOURNAL = "PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL;PRAGMA mmap_size=0;"
+ORDER_PREFIX = "bench-contention-"
+
+
+@contextmanager
+def sqlite_init_command(init_command):
+    """Open every new connection with ``init_command`` instead of the configured one."""
+    options = connection.settings_dict["OPTIONS"]
+    saved = options.get("init_command", "")
+    connection.close()
+    options["init_command"] = init_command
+    try:
+        # journal_mode can only change while no other connection is open, so
+        # switch it here before the workers connect.
+        connection.ensure_connection()
+        connection.close()
+        yield
+    finally:
+        options["init_command"] = saved
+        connection.close()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a mixed read/write workload (feed page reads, payment inserts and "
+        "settlements) from concurrent threads that keep their connections, and "
+        "report throughput, latency and lock errors. On SQLite the workload runs "
+        "under the old rollback journal and then the configured WAL profile. "
+        "Benchmark payments are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operations", type=int, default=4000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def run(self, options):
+        latencies = {"read": [], "write": []}
+        errors = {"read": 0, "write": 0}
+        lock = threading.Lock()
+        per_worker = options["operations"] // options["concurrency"]
+
+        def read():
+            list(feed_queryset("newest")[:21])
+            Payment.objects.filter(status="paid", project_category="film").aggregate(total=Sum("amount"))
+
+        def write():
+            with transaction.atomic():
+                payment = Payment.objects.create(
+                    project_category="film", project_id=1, amount=Decimal("100.00"),
+                    razorpay_order_id=f"{ORDER_PREFIX}{uuid.uuid4().hex}",
+                )
+                Payment.objects.filter(pk=payment.pk).update(status="paid")
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(per_worker):
+                    kind = "write" if rng.random() < options["write_ratio"] else "read"
+                    started = time.perf_counter()
+                    try:
+                        (write if kind == "write" else read)()
+                    except OperationalError:  # "database is locked" after the busy timeout
+                        with lock:
+                            errors[kind] += 1
+                        continue
+                    with lock:
+                        latencies[kind].append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(worker, range(options["seed"], options["seed"] + options["concurrency"])))
+        elapsed = time.perf_counter() - started
+        return latencies, errors, elapsed
+
+    def report(self, name, latencies, errors, elapsed):
+        done = len(latencies["read"]) + len(latencies["write"])
+        self.stdout.write(f"{name}: {done} ops in {elapsed:.2f}s ({done / elapsed:.0f} ops/s)")
+        for kind in ("read", "write"):
+            self.stdout.write(
+                f"  {kind:>5}: n={len(latencies[kind])} p50={_percentile(latencies[kind], 0.5):.1f}ms "
+                f"p95={_percentile(latencies[kind], 0.95):.1f}ms p99={_percentile(latencies[kind], 0.99):.1f}ms "
+                f"lock errors={errors[kind]}"
+            )
+
+    def handle(self, *args, **options):
+        try:
+            if connection.vendor == "sqlite":
+                with sqlite_init_command(ROLLBACK_JOURNAL):
+                    self.report("rollback journal", *self.run(options))
+                connection.close()
+                self.report("WAL profile", *self.run(options))
+            else:
+                self.report(connection.vendor, *self.run(options))
+        finally:
+            Payment.objects.filter(razorpay_order_id__startswith=ORDER_PREFIX).delete()
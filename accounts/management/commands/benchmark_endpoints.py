@@ -0,0 +1,268 @@
+import hashlib
+import hmac
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from itertools import count
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import uploads
+from accounts.models import ArtProject, FilmProject, Payment, ProjectIndex
+from accounts.management.commands.seed_dataset import PASSWORD, USER_PREFIX
+
+
+def _png_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (90, 90, 90)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _image_upload(name):
+    return SimpleUploadedFile(name, _png_bytes(), content_type="image/png")
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in accounts/urls.py against the current (seeded) "
+        "database: latency percentiles, queries per request and peak traced memory, "
+        "written to a JSON report. --compare prints the change against an earlier "
+        "report. Writes run inside a transaction that is rolled back and uploads go "
+        "to a temporary MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--output", default="benchmark_report.json")
+        parser.add_argument("--compare", help="Earlier report to diff against.")
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before every request.")
+
+    def route_specs(self, user):
+        """Per route name: (method, url kwargs or None, request kwargs factory).
+
+        The factory gets the iteration number and returns the Client.generic
+        keyword arguments, so write routes can use fresh data every time.
+        """
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        film = FilmProject.objects.filter(creator=user).order_by("-id").first()
+        any_film = FilmProject.objects.order_by("-id").first()
+        word = (any_film.title.split() or ["film"])[0].lower()
+        webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET.encode()
+
+        def json_body(data, **extra):
+            return {"data": json.dumps(data), "content_type": "application/json", **extra}
+
+        def logout(i):
+            return json_body({"refresh": str(RefreshToken.for_user(user))}, **auth)
+
+        def delete(i):
+            project = ArtProject.objects.create(title=f"Delete me {i}", description="d", goal_amount=100, creator=user)
+            return {"kwargs": {"category": "art", "id": project.pk}, **auth}
+
+        def verify(i):
+            payment = Payment.objects.create(user=user, project_category="film", project_id=any_film.pk,
+                                             amount=100, razorpay_order_id=f"order_bench{i}")
+            payment_id = f"pay_bench{i}"
+            signature = hmac.new(settings.RAZORPAY_KEY_SECRET.encode(),
+                                 f"order_bench{i}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+            return json_body({"razorpay_order_id": f"order_bench{i}", "razorpay_payment_id": payment_id,
+                              "razorpay_signature": signature, "payment_id": payment.pk})
+
+        def webhook(i):
+            body = json.dumps({"event": "payment.captured", "payload": {"n": i}}).encode()
+            return {"data": body, "content_type": "application/json",
+                    "HTTP_X_RAZORPAY_SIGNATURE": hmac.new(webhook_secret, body, hashlib.sha256).hexdigest(),
+                    "HTTP_X_RAZORPAY_EVENT_ID": f"evt_bench{i}"}
+
+        def create(category, upload_field):
+            def factory(i):
+                data = {"title": f"Bench {category} {i}", "description": "d", "goal_amount": "1000.00",
+                        "reward_tiers": json.dumps([{"amount": 100, "reward": "thanks"}])}
+                if upload_field:
+                    data[upload_field] = _image_upload(f"bench{i}.png")
+                return {"data": data, **auth}
+            return factory
+
+        png = _png_bytes()
+        png_sha256 = hashlib.sha256(png).hexdigest()
+        art = ArtProject.objects.create(title="Bench uploads", description="d", goal_amount=100, creator=user)
+
+        def chunked(i, state):
+            """An artwork upload started (and optionally sent/completed) for iteration ``i``."""
+            upload = uploads.start_upload(user, "artwork", f"bench{i}.png", len(png), png_sha256)
+            if state != "started":
+                uploads.append_chunk(upload, 0, len(png), io.BytesIO(png))
+            if state == "complete":
+                uploads.complete_upload(upload)
+            return upload
+
+        def put_chunk(i):
+            return {"kwargs": {"token": chunked(i, "started").token}, "data": png,
+                    "content_type": "application/octet-stream",
+                    "HTTP_CONTENT_RANGE": f"bytes 0-{len(png) - 1}/{len(png)}", **auth}
+
+        film_kwargs = {"category": "film", "id": film.pk} if film else None
+        return {
+            "register": ("POST", None, lambda i: json_body({
+                "username": f"bench_register_{i}", "email": f"bench_register_{i}@example.com",
+                "password": "bench-password-123"})),
+            "login": ("POST", None, lambda i: json_body({"username": user.email, "password": PASSWORD})),
+            "logout": ("POST", None, logout),
+            "me": ("GET", None, lambda i: auth),
+            "get_all_projects": ("GET", None, lambda i: {"data": {"limit": 20}}),
+            "search_projects": ("GET", None, lambda i: {"data": {"q": word}}),
+            "get_project_by_id": ("GET", {"category": "film", "id": any_film.pk}, lambda i: {}),
+            "get_my_projects": ("GET", None, lambda i: auth),
+            "update_project": ("PUT", film_kwargs, lambda i: json_body({"title": f"Renamed {i}"}, **auth)),
+            "delete_project": ("DELETE", {}, delete),
+            "create_film_project": ("POST", None, create("film", "poster_image")),
+            "create_music_project": ("POST", None, create("music", "album_cover")),
+            "create_art_project": ("POST", None, create("art", None)),
+            "get_all_films": ("GET", None, lambda i: {"data": {"limit": 20}}),
+            "get_all_music": ("GET", None, lambda i: {"data": {"sort": "most_funded"}}),
+            "get_all_art": ("GET", None, lambda i: {"data": {"sort": "closest_to_goal"}}),
+            "create_order": ("POST", None, lambda i: json_body(
+                {"amount": "100.00", "category": "film", "project_id": any_film.pk}, **auth)),
+            "verify_payment": ("POST", None, verify),
+            "razorpay_webhook": ("POST", None, webhook),
+            "attach_media": ("POST", {}, lambda i: {"kwargs": {"category": "art", "id": art.pk}, **json_body(
+                {"uploads": [str(chunked(i, "complete").token)]}, **auth)}),
+            "start_upload": ("POST", None, lambda i: json_body(
+                {"kind": "artwork", "filename": f"bench{i}.png", "size": len(png), "sha256": png_sha256}, **auth)),
+            "upload_detail": ("PUT", {}, put_chunk),
+            "complete_upload": ("POST", {}, lambda i: {"kwargs": {"token": chunked(i, "sent").token}, **auth}),
+        }
+
+    def request(self, client, method, name, url_kwargs, factory, i):
+        extra = factory(i)
+        kwargs = extra.pop("kwargs", url_kwargs) or None
+        data = extra.pop("data", None)
+        path = reverse(name, kwargs=kwargs)
+        if method == "GET":
+            return client.get(path, data, **extra)
+        if method == "POST" and not isinstance(data, (str, bytes)):
+            return client.post(path, data or {}, **extra)  # multipart
+        return client.generic(method, path, data or b"", **extra)
+
+    def bench_route(self, client, name, spec, iterations, cold, serial):
+        method, url_kwargs, factory = spec
+        latencies, statuses = [], {}
+        for _ in range(iterations + 1):
+            i = next(serial)
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = self.request(client, method, name, url_kwargs, factory, i)
+            elapsed = (time.perf_counter() - started) * 1000
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            latencies.append(elapsed)
+        latencies = sorted(latencies[1:])  # the first request warms caches and imports
+
+        # One more request, instrumented: queries and peak Python allocations.
+        i = next(serial)
+        if cold:
+            cache.clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            self.request(client, method, name, url_kwargs, factory, i)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            "method": method,
+            "statuses": {str(code): n for code, n in sorted(statuses.items())},
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "p50_ms": round(_percentile(latencies, 0.5), 3),
+            "p95_ms": round(_percentile(latencies, 0.95), 3),
+            "p99_ms": round(_percentile(latencies, 0.99), 3),
+            "queries": len(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    def compare(self, report, path):
+        with open(path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f"\nAgainst {path} (commit {baseline.get('commit')}):")
+        for name, now in report["routes"].items():
+            before = baseline.get("routes", {}).get(name)
+            if not before or "p50_ms" not in before or "p50_ms" not in now:
+                continue
+            change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            line = (f"{name:>22}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f}ms ({change:+.0f}%), "
+                    f"queries {before['queries']} -> {now['queries']}")
+            self.stdout.write(self.style.WARNING(line) if change > 20 or now["queries"] > before["queries"] else line)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username__startswith=USER_PREFIX, profile__role="creator").order_by("id").first()
+        if user is None or not ProjectIndex.objects.exists():
+            raise CommandError("No seeded data: run `manage.py seed_dataset` first.")
+
+        routes = {}
+        serial = count()
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, CHUNKED_UPLOAD_DIR=f"{media_root}/parts",
+                                  PAYMENT_GATEWAY_BACKEND="fake",
+                                  ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]), \
+                transaction.atomic():
+            client = Client()
+            specs = self.route_specs(user)
+            for pattern in get_resolver("accounts.urls").url_patterns:
+                spec = specs.get(pattern.name)
+                if spec is None or spec[1] is None and "<" in str(pattern.pattern):
+                    routes[pattern.name] = {"skipped": "no request spec for this route"}
+                    self.stdout.write(self.style.WARNING(f"{pattern.name:>22}: skipped (no request spec)"))
+                    continue
+                result = routes[pattern.name] = self.bench_route(
+                    client, pattern.name, spec, options["iterations"], options["cold"], serial)
+                self.stdout.write(
+                    f"{pattern.name:>22}: {result['method']:<6} p50={result['p50_ms']:.2f}ms "
+                    f"p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms queries={result['queries']} "
+                    f"peak={result['peak_memory_kb']:.0f}KB statuses={result['statuses']}"
+                )
+            transaction.set_rollback(True)
+
+        report = {
+            "commit": _git_commit(),
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "iterations": options["iterations"],
+            "cold_cache": options["cold"],
+            "dataset": {"projects": ProjectIndex.objects.count(), "payments": Payment.objects.count(),
+                        "users": User.objects.count()},
+            "routes": routes,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        if options["compare"]:
+            self.compare(report, options["compare"])
@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.backends import EmailOrUsernameBackend
+
+
+def legacy_login(login, password):
+    """The old login_view path: try as a username, then look up by email and retry."""
+    backend = ModelBackend()
+    user = backend.authenticate(None, username=login, password=password)
+    if user is None:
+        try:
+            u = User.objects.get(email=login)
+            user = backend.authenticate(None, username=u.username, password=password)
+        except User.DoesNotExist:
+            user = None
+    return user
+
+
+def current_login(login, password):
+    return EmailOrUsernameBackend().authenticate(None, username=login, password=password)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare login throughput of the old two-step email path with "
+        "EmailOrUsernameBackend. The benchmark user is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=10, help="Logins per case.")
+
+    def handle(self, *args, **options):
+        password = "benchmark-password-123"
+        cases = {
+            "username": "bench_login_user",
+            "email": "bench_login@example.com",
+            "unknown": "nobody@example.com",
+        }
+        with transaction.atomic():
+            User.objects.create_user(cases["username"], cases["email"], password)
+            for case, login in cases.items():
+                rates = {}
+                for name, fn in (("before", legacy_login), ("after", current_login)):
+                    started = time.perf_counter()
+                    for _ in range(options["logins"]):
+                        fn(login, password)
+                    rates[name] = options["logins"] / (time.perf_counter() - started)
+                self.stdout.write(
+                    f"{case:>8}: before {rates['before']:.1f} logins/s, after {rates['after']:.1f} logins/s "
+                    f"({rates['after'] / rates['before']:.2f}x)"
+                )
+            transaction.set_rollback(True)
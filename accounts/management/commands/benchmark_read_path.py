@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+
+def _report(stdout, name, codes, latencies, elapsed):
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]  # noqa: E731
+    stdout.write(
+        f"{name}: {codes.count(200)}/{len(codes)} ok in {elapsed:.2f}s ({len(codes) / elapsed:.1f} req/s) "
+        f"p50={pct(0.5):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a read endpoint in-process through the WSGI stack (sync views, "
+        "one thread per in-flight request) and the ASGI stack (async views on one "
+        "event loop) at the same concurrency. Seed projects first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/projects/")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--bust-cache", action="store_true",
+                            help="Vary the query string so every request misses the response cache.")
+
+    def url(self, options, i):
+        if not options["bust_cache"]:
+            return options["path"]
+        return f"{options['path']}{'&' if '?' in options['path'] else '?'}_={i}"
+
+    def run_wsgi(self, options):
+        def send(i):
+            started = time.perf_counter()
+            try:
+                code = Client().get(self.url(options, i)).status_code
+            finally:
+                connection.close()
+            return code, (time.perf_counter() - started) * 1000
+
+        with override_settings(ROOT_URLCONF="crowdfunding.urls"):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(send, range(options["requests"])))
+            elapsed = time.perf_counter() - started
+        return [r[0] for r in results], [r[1] for r in results], elapsed
+
+    async def run_asgi(self, options):
+        client = AsyncClient()
+        gate = asyncio.Semaphore(options["concurrency"])
+
+        async def send(i):
+            async with gate:
+                started = time.perf_counter()
+                response = await client.get(self.url(options, i))
+                return response.status_code, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(send(i) for i in range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        return [r[0] for r in results], [r[1] for r in results], elapsed
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['requests']} GET {options['path']} at concurrency {options['concurrency']}")
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            _report(self.stdout, "WSGI (sync views)", *self.run_wsgi(options))
+            with override_settings(ROOT_URLCONF="crowdfunding.urls_asgi"):
+                _report(self.stdout, "ASGI (async views)", *asyncio.run(self.run_asgi(options)))
@@ -0,0 +1,75 @@
+import itertools
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from accounts.search import CATEGORY_CODES, backend_for, doc_key, query_terms
+
+
+class Command(BaseCommand):
+    help = (
+        "Load N synthetic documents into the search index inside a transaction that is "
+        "rolled back, run random prefix queries and report latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        backend = backend_for()
+        if backend is None:
+            raise CommandError("Full-text search needs SQLite (FTS5) or PostgreSQL.")
+        rng = random.Random(options["seed"])
+        vocabulary = sorted({
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+            for _ in range(options["vocabulary"])
+        })
+        rng.shuffle(vocabulary)
+        # Zipf-like word frequencies, as in natural text.
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+        def words(k):
+            return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=k))
+
+        categories = list(CATEGORY_CODES)
+        with transaction.atomic(), connection.cursor() as cursor:
+            started = time.perf_counter()
+            batch = []
+            for i in range(options["projects"]):
+                category = categories[i % 3]
+                pk = 10_000_000 + i  # clear of real ids
+                batch.append((doc_key(category, pk), f"{category}-{pk}", words(4), words(40), words(1), words(6)))
+                if len(batch) == 5000:
+                    backend.insert(cursor, batch)
+                    batch = []
+            if batch:
+                backend.insert(cursor, batch)
+            self.stdout.write(f"Indexed {options['projects']} documents in {time.perf_counter() - started:.1f}s")
+
+            timings = []
+            for _ in range(options["queries"]):
+                # one or two terms from the long tail, sometimes truncated to a prefix
+                terms = [rng.choice(vocabulary[50:]) for _ in range(rng.randint(1, 2))]
+                terms = [t[: rng.randint(3, len(t))] for t in terms]
+                started = time.perf_counter()
+                backend.search(cursor, query_terms(" ".join(terms)), options["limit"] + 1)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        pct = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]  # noqa: E731
+        self.stdout.write(
+            f"{len(timings)} queries: mean={statistics.mean(timings):.2f}ms p50={pct(0.5):.2f}ms "
+            f"p95={pct(0.95):.2f}ms p99={pct(0.99):.2f}ms"
+        )
+        verdict = self.style.SUCCESS if pct(0.95) < 10 else self.style.WARNING
+        self.stdout.write(verdict(f"p95 {'under' if pct(0.95) < 10 else 'over'} the 10ms budget"))
@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.blobs import recount, referenced_derivatives
+from accounts.models import MediaBlob
+
+
+DERIVATIVE_DIRS = {"thumbs", "previews"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove media files nothing refers to any more: blobs and legacy uploads "
+        "left by edited or deleted projects, stale thumbnails and audio previews. "
+        "Reference counts are rebuilt first, then MEDIA_ROOT is walked and checked "
+        "in batches. Files newer than the grace period are always kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--grace-hours", type=float, default=24,
+                            help="Keep files modified this recently (uploads whose rows are not committed yet).")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be removed.")
+
+    def walk(self, root):
+        """``(storage name, path)`` for every file under ``root``, streamed."""
+        for directory, _subdirectories, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+    def remove(self, name, path, size):
+        if not self.dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+        self.counts["removed"] += 1
+        self.counts["bytes"] += size
+        if self.verbosity > 1:
+            self.stdout.write(f"{'would remove' if self.dry_run else 'removed'} {name}")
+
+    def sweep(self, batch):
+        """Remove the files in ``batch`` ([(name, path, size)]) with no references."""
+        names = [name for name, _path, _size in batch]
+        kept = set(MediaBlob.objects.filter(name__in=names, refcount__gt=0).values_list("name", flat=True))
+        removed = []
+        for name, path, size in batch:
+            if name not in kept:
+                self.remove(name, path, size)
+                removed.append(name)
+        if removed and not self.dry_run:
+            MediaBlob.objects.filter(name__in=removed, refcount__lte=0).delete()
+        batch.clear()
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.dry_run, self.verbosity = options["dry_run"], options["verbosity"]
+        self.counts = {"scanned": 0, "recent": 0, "removed": 0, "bytes": 0}
+        referenced = recount()
+        derivatives = referenced_derivatives()
+        cutoff = time.time() - options["grace_hours"] * 3600
+
+        batch = []
+        for name, path in self.walk(settings.MEDIA_ROOT):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            self.counts["scanned"] += 1
+            if stat.st_mtime >= cutoff:
+                self.counts["recent"] += 1
+            elif DERIVATIVE_DIRS & set(name.split("/")[:-1]):
+                if name not in derivatives:
+                    self.remove(name, path, stat.st_size)
+            else:
+                batch.append((name, path, stat.st_size))
+                if len(batch) >= options["batch_size"]:
+                    self.sweep(batch)
+        self.sweep(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would remove' if self.dry_run else 'Removed'} {self.counts['removed']} of "
+            f"{self.counts['scanned']} files ({self.counts['bytes'] / 1024 / 1024:.1f} MB); "
+            f"{referenced} names referenced, {self.counts['recent']} recent files kept "
+            f"({time.perf_counter() - started:.1f}s)"
+        ))
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from accounts.audio import analyse_audio
+from accounts.audio_previews import analysis_args, is_current, store_preview
+from accounts.models import AudioSample
+from accounts.thumbnails import source_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute missing preview clips and waveform peaks for audio samples on a "
+        "process pool. Each row is recorded as soon as its file is done, so an "
+        "interrupted run resumes where it stopped; rows sharing a file analyse it once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--force", action="store_true", help="Recompute rows that are already up to date.")
+
+    def pending(self, force):
+        """``{source name: [pk, ...]}`` for samples whose preview is missing or stale."""
+        by_source = defaultdict(list)
+        for sample in AudioSample.objects.only("pk", "file", "preview").order_by("pk").iterator(chunk_size=2000):
+            if sample.file.name and (force or not is_current(sample)):
+                by_source[sample.file.name].append(sample.pk)
+        return by_source
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        by_source = self.pending(options["force"])
+        counts = {"rows": 0, "files": 0, "missing": 0, "failed": 0}
+        args = analysis_args()
+
+        with ProcessPoolExecutor(options["workers"], mp_context=multiprocessing.get_context("spawn")) as pool:
+            queue = iter(by_source.items())
+            in_flight = {}
+
+            def submit_next():
+                for source, pks in queue:
+                    path = source_path(source)
+                    if path is None:
+                        counts["missing"] += len(pks)
+                        continue
+                    in_flight[pool.submit(analyse_audio, path, *args)] = (source, pks)
+                    return True
+                return False
+
+            # Keep a bounded number of files in flight.
+            while len(in_flight) < 2 * options["workers"] and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source, pks = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        counts["failed"] += len(pks)
+                        self.stderr.write(f"{source}: {e}")
+                    else:
+                        counts["files"] += 1
+                        counts["rows"] += sum(store_preview(pk, source, result) for pk in pks)
+                    submit_next()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Previews for {counts['rows']} samples from {counts['files']} files in "
+            f"{time.perf_counter() - started:.1f}s ({counts['missing']} samples with missing files, "
+            f"{counts['failed']} failed)"
+        ))
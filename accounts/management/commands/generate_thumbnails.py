@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from accounts.imaging import render_thumbnails
+from accounts.thumbnails import THUMBNAIL_SOURCES, is_current, render_args, source_path, store_thumbnails, thumbnails_field
+
+
+class Command(BaseCommand):
+    help = (
+        "Render missing thumbnails for film posters, album covers and artwork images "
+        "on a process pool. Each row is recorded as soon as its image is done, so an "
+        "interrupted run resumes where it stopped; rows sharing an image render it once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--force", action="store_true", help="Re-render rows that are already up to date.")
+
+    def pending(self, force):
+        """``{(model, source name): [pk, ...]}`` for rows whose thumbnails are missing or stale."""
+        by_source = defaultdict(list)
+        for model, (image_field, _category) in THUMBNAIL_SOURCES.items():
+            rows = model.objects.only("pk", image_field, thumbnails_field(model)).order_by("pk")
+            for instance in rows.iterator(chunk_size=2000):
+                source = getattr(instance, image_field).name
+                if source and (force or not is_current(instance)):
+                    by_source[model, source].append(instance.pk)
+        return by_source
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        by_source = self.pending(options["force"])
+        counts = {"rows": 0, "images": 0, "missing": 0, "failed": 0}
+        args = render_args()
+
+        with ProcessPoolExecutor(options["workers"], mp_context=multiprocessing.get_context("spawn")) as pool:
+            queue = iter(by_source.items())
+            in_flight = {}
+
+            def submit_next():
+                for (model, source), pks in queue:
+                    path = source_path(source)
+                    if path is None:
+                        counts["missing"] += len(pks)
+                        continue
+                    in_flight[pool.submit(render_thumbnails, path, *args)] = (model, source, pks)
+                    return True
+                return False
+
+            # Keep a bounded number of images in flight.
+            while len(in_flight) < 2 * options["workers"] and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model, source, pks = in_flight.pop(future)
+                    try:
+                        digest, rendered = future.result()
+                    except Exception as e:
+                        counts["failed"] += len(pks)
+                        self.stderr.write(f"{source}: {e}")
+                    else:
+                        counts["images"] += 1
+                        counts["rows"] += sum(store_thumbnails(model, pk, source, digest, rendered) for pk in pks)
+                    submit_next()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Thumbnails for {counts['rows']} rows from {counts['images']} images in "
+            f"{time.perf_counter() - started:.1f}s ({counts['missing']} rows with missing files, "
+            f"{counts['failed']} failed)"
+        ))
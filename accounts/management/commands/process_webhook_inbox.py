@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.webhooks import drain_batch, inbox_backlog
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook events in batches and report lag and throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--once", action="store_true", help="Drain the current backlog and exit.")
+        parser.add_argument("--idle-sleep", type=float, default=1.0, help="Seconds to wait when the inbox is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        started = time.monotonic()
+        while True:
+            metrics = drain_batch(batch_size=options["batch_size"])
+            handled = metrics["processed"] + metrics["failed"]
+            total += handled
+            if handled:
+                self.stdout.write(
+                    "processed={processed} failed={failed} lag={lag_seconds:.3f}s "
+                    "batch={elapsed_seconds:.3f}s rate={events_per_second:.1f}/s".format(**metrics)
+                    + f" backlog={inbox_backlog()}"
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(f"Drained {total} events in {elapsed:.2f}s ({rate:.1f}/s)."))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.blacklist import blacklist_metrics, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding/blacklisted refresh tokens in short batches "
+        "and report table sizes. Safe to run from cron while the site is live."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.05,
+                            help="Seconds to sleep between batches so writers get the lock.")
+
+    def handle(self, *args, **options):
+        before = blacklist_metrics()
+        started = time.monotonic()
+        deleted, batches = prune_expired_tokens(batch_size=options["batch_size"], pause=options["pause"])
+        elapsed = time.monotonic() - started
+        after = blacklist_metrics()
+        for name in ("outstanding_tokens", "blacklisted_tokens", "expired_tokens"):
+            self.stdout.write(f"{name}: {before[name]} -> {after[name]}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} expired tokens in {batches} batches ({elapsed:.2f}s)."
+        ))
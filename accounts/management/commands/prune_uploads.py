@@ -0,0 +1,40 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import ChunkedUpload
+from accounts.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete chunked uploads that were never attached to a project within "
+        "UPLOAD_TTL_HOURS with their part files, and sweep part files left without "
+        "an upload row. Stored files are released for gc_media. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=None,
+                            help="Age limit (defaults to UPLOAD_TTL_HOURS).")
+
+    def handle(self, *args, **options):
+        hours = settings.UPLOAD_TTL_HOURS if options["hours"] is None else options["hours"]
+        pruned = prune_uploads(timedelta(hours=hours))
+
+        orphans = 0
+        directory = settings.CHUNKED_UPLOAD_DIR
+        if os.path.isdir(directory):
+            known = {token.hex for token in ChunkedUpload.objects.values_list("token", flat=True).iterator()}
+            cutoff = time.time() - hours * 3600
+            for entry in os.scandir(directory):
+                token = entry.name.removesuffix(".part")
+                if entry.is_file() and token not in known and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {pruned} stale uploads and {orphans} orphaned part files."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.search import backend_for, rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text project search index from the project tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if backend_for() is None:
+            raise CommandError("Full-text search needs SQLite (FTS5) or PostgreSQL.")
+        counts = rebuild(batch_size=options["batch_size"])
+        for category, count in counts.items():
+            self.stdout.write(f"{category}: {count} documents")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
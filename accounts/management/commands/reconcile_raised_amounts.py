@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.payments import reconcile_raised_amounts
+from accounts.projects import PROJECT_CATEGORIES
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every project's raised_amount from paid Payment totals. "
+        "Totals are written as absolute values, so run it when no payments are settling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing it.")
+
+    def handle(self, *args, **options):
+        for category in PROJECT_CATEGORIES:
+            changed = reconcile_raised_amounts(
+                category, batch_size=options["batch_size"], dry_run=options["dry_run"]
+            )
+            verb = "would change" if options["dry_run"] else "corrected"
+            self.stdout.write(f"{category}: {verb} {changed} project totals")
+        self.stdout.write(self.style.SUCCESS("Reconciliation complete."))
@@ -0,0 +1,196 @@
+import io
+import math
+import random
+import struct
+import time
+import wave
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import ArtProject, ArtworkImage, AudioSample, FilmProject, MusicProject, Payment, Profile
+from accounts.project_index import backfill_project_index
+from accounts.response_cache import CATEGORIES, bump_version
+from accounts.search import backend_for, rebuild as rebuild_search_index
+
+
+USER_PREFIX = "seed_user_"
+ORDER_PREFIX = "seed_order_"
+PASSWORD = "seed-password-123"
+PAYMENT_STATES = (("paid", 60), ("created", 15), ("failed", 15), ("refunded", 10))
+WORDS = (
+    "indie documentary animated short feature album vinyl live session mural sculpture "
+    "gallery portrait festival debut tour studio acoustic orchestral jazz folk electronic "
+    "ceramic print installation community river city night journey memory light ocean "
+    "forest archive story voices harbor desert winter garden machine echo"
+).split()
+REWARDS = ("thank-you note", "digital download", "signed poster", "early access", "credit in the film",
+           "limited print", "studio visit", "private screening")
+
+
+def placeholder_image(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def placeholder_audio(seconds=0.5, rate=8000, hz=440):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(b"".join(
+            struct.pack("<h", int(12000 * math.sin(2 * math.pi * hz * i / rate))) for i in range(int(seconds * rate))
+        ))
+    return buffer.getvalue()
+
+
+def ensure_media():
+    """Write the shared placeholder files once and return their storage names."""
+    files = {
+        "poster": ("film_posters/seed_poster.png", lambda: placeholder_image((180, 40, 40))),
+        "cover": ("music_covers/seed_cover.png", lambda: placeholder_image((40, 40, 180))),
+        "artwork": ("artworks/seed_artwork.png", lambda: placeholder_image((40, 160, 60))),
+        "sample": ("music_samples/seed_sample.wav", placeholder_audio),
+    }
+    names = {}
+    for kind, (name, content) in files.items():
+        names[kind] = name if default_storage.exists(name) else default_storage.save(name, ContentFile(content()))
+    return names
+
+
+@contextmanager
+def explicit_created_at(*models):
+    """Let bulk_create keep the created_at values we set instead of now()."""
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible dataset: users with profiles, film/music/art projects "
+        "with reward tiers, audio samples, artwork images and payments in mixed states, "
+        "all with bulk_create and shared placeholder media. Refreshes ProjectIndex and "
+        "the search index afterwards. --clear removes a previous seed first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--projects", type=int, default=1000, help="Projects per category.")
+        parser.add_argument("--payments", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--clear", action="store_true")
+
+    def clear(self):
+        Payment.objects.filter(razorpay_order_id__startswith=ORDER_PREFIX).delete()
+        deleted, _ = User.objects.filter(username__startswith=USER_PREFIX).delete()  # cascades to projects
+        self.stdout.write(f"Removed {deleted} seeded rows")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        if options["clear"]:
+            self.clear()
+        media = ensure_media()
+        now = timezone.now()
+
+        def text(k):
+            return " ".join(rng.choices(WORDS, k=k))
+
+        def created_at():
+            return now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+
+        with transaction.atomic():
+            first = User.objects.filter(username__startswith=USER_PREFIX).count()
+            password = make_password(PASSWORD)  # hashed once and shared
+            users = User.objects.bulk_create([
+                User(username=f"{USER_PREFIX}{i}", email=f"{USER_PREFIX}{i}@example.com", password=password,
+                     first_name=rng.choice(WORDS).title())
+                for i in range(first, first + options["users"])
+            ], batch_size=batch_size)
+            # bulk_create skips the post_save signal that normally creates profiles
+            roles = ["creator" if rng.random() < 0.2 else "backer" for _ in users]
+            Profile.objects.bulk_create([
+                Profile(user=user, display_name=user.first_name, role=role) for user, role in zip(users, roles)
+            ], batch_size=batch_size)
+            creators = [user for user, role in zip(users, roles) if role == "creator"] or users
+
+            # Draw payments first so every project's raised_amount matches its paid payments.
+            per_category = options["projects"]
+            payments, raised = [], {}
+            for i in range(options["payments"]):
+                category, index = rng.choice(CATEGORIES), rng.randrange(per_category)
+                state = rng.choices([s for s, _ in PAYMENT_STATES], weights=[w for _, w in PAYMENT_STATES])[0]
+                amount = Decimal(rng.choice((100, 250, 500, 1000, 2500)))
+                payments.append((category, index, state, amount, i))
+                if state == "paid":
+                    raised[category, index] = raised.get((category, index), 0) + amount
+
+            def project_fields(category, i):
+                return dict(
+                    title=text(3).title(), description=text(40), creator=rng.choice(creators),
+                    goal_amount=Decimal(rng.choice((5000, 10000, 25000, 50000, 100000))),
+                    raised_amount=raised.get((category, i), Decimal(0)), created_at=created_at(),
+                    reward_tiers=[{"amount": amount, "reward": rng.choice(REWARDS)}
+                                  for amount in sorted(rng.sample((100, 250, 500, 1000, 5000), k=rng.randint(1, 3)))],
+                )
+
+            with explicit_created_at(FilmProject, MusicProject, ArtProject):
+                projects = {
+                    "film": FilmProject.objects.bulk_create([
+                        FilmProject(poster_image=media["poster"], **project_fields("film", i)) for i in range(per_category)
+                    ], batch_size=batch_size),
+                    "music": MusicProject.objects.bulk_create([
+                        MusicProject(album_cover=media["cover"], **project_fields("music", i)) for i in range(per_category)
+                    ], batch_size=batch_size),
+                    "art": ArtProject.objects.bulk_create([
+                        ArtProject(**project_fields("art", i)) for i in range(per_category)
+                    ], batch_size=batch_size),
+                }
+            AudioSample.objects.bulk_create([
+                AudioSample(project=project, file=media["sample"])
+                for project in projects["music"] for _ in range(rng.randint(1, 3))
+            ], batch_size=batch_size)
+            ArtworkImage.objects.bulk_create([
+                ArtworkImage(project=project, image=media["artwork"])
+                for project in projects["art"] for _ in range(rng.randint(1, 4))
+            ], batch_size=batch_size)
+
+            with explicit_created_at(Payment):
+                Payment.objects.bulk_create([
+                    Payment(
+                        user=rng.choice(users), project_category=category, project_id=projects[category][index].pk,
+                        amount=amount, status=state, created_at=created_at(),
+                        razorpay_order_id=f"{ORDER_PREFIX}{first}_{i}",
+                        razorpay_payment_id=f"pay_seed{first}_{i}" if state in ("paid", "refunded") else None,
+                    )
+                    for category, index, state, amount, i in payments
+                ], batch_size=batch_size)
+
+        backfill_project_index(batch_size=batch_size)
+        if backend_for() is not None:
+            rebuild_search_index(batch_size=batch_size)
+        for category in CATEGORIES:
+            bump_version(category)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {3 * per_category} projects and {len(payments)} payments "
+            f"in {time.perf_counter() - started:.1f}s (password for every user: {PASSWORD})"
+        ))
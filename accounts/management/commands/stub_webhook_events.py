@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+
+WEBHOOK_PATH = "/api/projects/payments/webhook/"
+
+
+def captured_event(order_id, amount_paise):
+    return {
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {
+            "id": f"pay_{uuid.uuid4().hex[:14]}",
+            "order_id": order_id,
+            "amount": amount_paise,
+        }}},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the webhook endpoint with signed payment.captured events. "
+        "Posts in-process by default, or to --url against a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duplicates", type=float, default=0.1,
+                            help="Fraction of events delivered twice, like Razorpay retries.")
+        parser.add_argument("--url", help="e.g. http://127.0.0.1:8000" + WEBHOOK_PATH)
+
+    def handle(self, *args, **options):
+        secret = settings.RAZORPAY_WEBHOOK_SECRET.encode()
+        deliveries = []
+        for i in range(options["count"]):
+            body = json.dumps(captured_event(f"order_stub_{i}", 10000)).encode()
+            event_id = f"evt_stub_{uuid.uuid4().hex}"
+            deliveries.append((event_id, body, hmac.new(secret, body, hashlib.sha256).hexdigest()))
+        deliveries += deliveries[: int(len(deliveries) * options["duplicates"])]
+
+        send = self._http_sender(options["url"]) if options["url"] else self._in_process_sender()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            codes = list(pool.map(send, deliveries))
+        elapsed = time.monotonic() - started
+
+        ok = sum(1 for code in codes if code == 200)
+        self.stdout.write(
+            f"Sent {len(codes)} deliveries ({ok} acked) in {elapsed:.2f}s, "
+            f"{len(codes) / elapsed:.1f} req/s"
+        )
+
+    def _http_sender(self, url):
+        def send(delivery):
+            event_id, body, signature = delivery
+            request = Request(url, data=body, method="POST", headers={
+                "Content-Type": "application/json",
+                "X-Razorpay-Signature": signature,
+                "X-Razorpay-Event-Id": event_id,
+            })
+            with urlopen(request, timeout=10) as response:
+                return response.status
+        return send
+
+    def _in_process_sender(self):
+        def send(delivery):
+            event_id, body, signature = delivery
+            try:
+                return Client(SERVER_NAME="localhost").post(
+                    WEBHOOK_PATH, body, content_type="application/json",
+                    HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+                ).status_code
+            finally:
+                connection.close()
+        return send
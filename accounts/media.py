@@ -0,0 +1,155 @@
+"""Serving MEDIA_ROOT with byte ranges, validators and sendfile.
+
+``serve_media`` answers ``GET``/``HEAD`` for uploaded files with ``ETag``,
+``Last-Modified`` and ``Cache-Control``, turns matching conditional requests
+into ``304``/``412`` and honours a single ``Range`` (guarded by ``If-Range``)
+with ``206``, so seeking in an audio preview fetches only the bytes needed.
+
+How the bytes leave the process depends on ``MEDIA_ACCEL``:
+
+* ``"x-accel"``: an empty response with ``X-Accel-Redirect`` pointing at
+  ``MEDIA_ACCEL_PREFIX`` + the path; nginx sends the file (and does ranges)
+  from an ``internal`` location aliased to MEDIA_ROOT.
+* ``"x-sendfile"``: the same with ``X-Sendfile`` and the absolute path, for
+  Apache's mod_xsendfile or lighttpd.
+* unset: a ``FileResponse`` over the open file (or the requested slice of
+  it). WSGI servers that provide ``wsgi.file_wrapper`` (gunicorn, uWSGI)
+  then copy it with ``os.sendfile`` from the file's offset for the response's
+  ``Content-Length``, without reading it into Python.
+"""
+import io
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange(io.RawIOBase):
+    """Bytes ``start``-``end`` (inclusive) of an open file.
+
+    ``tell()``, ``seek()`` and ``fileno()`` use the underlying file's
+    offsets, so a sendfile file wrapper starts at the right place; seeks are
+    clamped to the range and reads stop at ``end``.
+    """
+
+    def __init__(self, file, start, end):
+        self.file, self.start, self.stop = file, start, end + 1
+        self.name = file.name
+        file.seek(start)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        target = {io.SEEK_SET: offset, io.SEEK_CUR: self.file.tell() + offset,
+                  io.SEEK_END: self.stop + offset}[whence]
+        return self.file.seek(min(max(target, self.start), self.stop))
+
+    def read(self, size=-1):
+        remaining = self.stop - self.file.tell()
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.file.read(max(size, 0))
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def etag_for(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def requested_range(request, size, etag, last_modified):
+    """``(start, end)`` for a satisfiable single ``Range``, ``None`` to send
+    the whole file, or ``False`` when the range cannot be satisfied."""
+    header = request.headers.get("Range")
+    if not header:
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None  # the client's partial copy is of another version
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None  # unsupported (e.g. several ranges): the full file is a valid answer
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        return (max(size - suffix, 0), size - 1) if suffix and size else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def accel_response(relative_path, absolute_path):
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == "x-accel":
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(relative_path)
+    else:
+        response["X-Sendfile"] = absolute_path
+    del response["Content-Type"]  # the server sets it from the file
+    return response
+
+
+def serve_media(request, path):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404("Not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Not found")
+
+    etag, last_modified = etag_for(stat), int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        if settings.MEDIA_ACCEL:
+            response = accel_response(posixpath.normpath(path), full_path)
+        else:
+            byte_range = requested_range(request, stat.st_size, etag, last_modified)
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+            if request.method == "HEAD":
+                response = HttpResponse(content_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream")
+                response["Content-Length"] = byte_range[1] - byte_range[0] + 1 if byte_range else stat.st_size
+            else:
+                file = open(full_path, "rb")
+                if byte_range:
+                    file = FileRange(file, *byte_range)
+                response = FileResponse(file)
+                del response["Content-Disposition"]
+            if byte_range:
+                response.status_code = 206
+                response["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{stat.st_size}"
+        response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_payment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unique_id', models.CharField(max_length=40, unique=True)),
+                ('category', models.CharField(choices=[('film', 'Film'), ('music', 'Music'), ('art', 'Art')], max_length=10)),
+                ('project_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('title', models.CharField(max_length=200)),
+                ('goal_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('raised_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_index', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='projectindex_feed_idx'), models.Index(fields=['creator', '-created_at', '-id'], name='projectindex_creator_idx')],
+            },
+        ),
+    ]
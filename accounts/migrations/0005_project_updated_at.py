@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_projectindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artproject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='filmproject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='musicproject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_webhookevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artproject',
+            index=models.Index(fields=['-created_at', '-id'], name='artproject_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artproject',
+            index=models.Index(fields=['creator', '-created_at'], name='artproject_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='filmproject',
+            index=models.Index(fields=['-created_at', '-id'], name='filmproject_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='filmproject',
+            index=models.Index(fields=['creator', '-created_at'], name='filmproject_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='musicproject',
+            index=models.Index(fields=['-created_at', '-id'], name='musicproject_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='musicproject',
+            index=models.Index(fields=['creator', '-created_at'], name='musicproject_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['razorpay_order_id'], name='payment_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['razorpay_payment_id'], name='payment_rzp_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['project_category', 'project_id', 'status'], name='payment_project_status_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    from accounts.search import backend_for
+
+    backend = backend_for(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.create(cursor)
+
+
+def drop_search_table(apps, schema_editor):
+    from accounts.search import backend_for
+
+    backend = backend_for(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+    """Full-text search table (FTS5 on SQLite, tsvector + GIN on PostgreSQL).
+
+    Populate it for existing projects with `python manage.py rebuild_search_index`.
+    """
+
+    dependencies = [
+        ('accounts', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
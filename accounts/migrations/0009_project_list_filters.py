@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:05
+
+import django.core.validators
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_project_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artproject',
+            name='goal_amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+        ),
+        migrations.AlterField(
+            model_name='filmproject',
+            name='goal_amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+        ),
+        migrations.AlterField(
+            model_name='musicproject',
+            name='goal_amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='projectindex_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(fields=['-raised_amount', '-id'], name='projectindex_raised_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(fields=['category', '-raised_amount', '-id'], name='projectindex_cat_raised_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('raised_amount', models.FloatField()), '/', django.db.models.functions.comparison.Cast('goal_amount', models.FloatField())), descending=True), models.OrderBy(models.F('id'), descending=True), name='projectindex_funded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(models.F('category'), models.OrderBy(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('raised_amount', models.FloatField()), '/', django.db.models.functions.comparison.Cast('goal_amount', models.FloatField())), descending=True), models.OrderBy(models.F('id'), descending=True), name='projectindex_cat_funded_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index auth_user.email for EmailOrUsernameBackend's login lookup.
+
+    auth.User belongs to django.contrib.auth, so the index is created with SQL
+    rather than a model Meta option.
+    """
+
+    dependencies = [
+        ('accounts', '0009_project_list_filters'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS accounts_user_email_idx ON auth_user (email)',
+            'DROP INDEX IF EXISTS accounts_user_email_idx',
+        ),
+    ]
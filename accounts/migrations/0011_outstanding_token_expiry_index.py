@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index OutstandingToken.expires_at so prune_token_blacklist finds expired
+    rows without scanning the table. The model belongs to simplejwt's
+    token_blacklist app, hence SQL rather than a Meta option.
+    """
+
+    dependencies = [
+        ('accounts', '0010_user_email_index'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS accounts_outstandingtoken_expires_idx '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX IF EXISTS accounts_outstandingtoken_expires_idx',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_outstanding_token_expiry_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artworkimage',
+            name='image_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='filmproject',
+            name='poster_image_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='musicproject',
+            name='album_cover_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
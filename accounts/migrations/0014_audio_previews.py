@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiosample',
+            name='preview',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:53
+
+import accounts.storage
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_references(apps, schema_editor):
+    counts = Counter()
+    for model_name, field in (("FilmProject", "poster_image"), ("MusicProject", "album_cover"),
+                              ("AudioSample", "file"), ("ArtworkImage", "image"), ("ChunkedUpload", "file")):
+        model = apps.get_model("accounts", model_name)
+        for row in model.objects.exclude(**{field: ""}).values(field).annotate(n=Count("pk")).order_by():
+            counts[row[field]] += row["n"]
+    MediaBlob = apps.get_model("accounts", "MediaBlob")
+    MediaBlob.objects.bulk_create([MediaBlob(name=name, refcount=n) for name, n in counts.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_audio_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='artworkimage',
+            name='image',
+            field=models.ImageField(max_length=255, storage=accounts.storage.select_media_storage, upload_to='artworks/'),
+        ),
+        migrations.AlterField(
+            model_name='audiosample',
+            name='file',
+            field=models.FileField(max_length=255, storage=accounts.storage.select_media_storage, upload_to='music_samples/'),
+        ),
+        migrations.AlterField(
+            model_name='chunkedupload',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, storage=accounts.storage.select_media_storage, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='filmproject',
+            name='poster_image',
+            field=models.ImageField(max_length=255, storage=accounts.storage.select_media_storage, upload_to='film_posters/'),
+        ),
+        migrations.AlterField(
+            model_name='musicproject',
+            name='album_cover',
+            field=models.ImageField(max_length=255, storage=accounts.storage.select_media_storage, upload_to='music_covers/'),
+        ),
+        migrations.RunPython(count_existing_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:28
+
+import accounts.models
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_content_addressed_media'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='projectindex',
+            name='projectindex_funded_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='projectindex',
+            name='projectindex_cat_funded_idx',
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('raised_amount', models.FloatField()), '/', accounts.models.NullIfZero(django.db.models.functions.comparison.Cast('goal_amount', models.FloatField()))), descending=True), models.OrderBy(models.F('id'), descending=True), name='projectindex_funded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectindex',
+            index=models.Index(models.F('category'), models.OrderBy(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('raised_amount', models.FloatField()), '/', accounts.models.NullIfZero(django.db.models.functions.comparison.Cast('goal_amount', models.FloatField()))), descending=True), models.OrderBy(models.F('id'), descending=True), name='projectindex_cat_funded_idx'),
+        ),
+    ]
@@ -1,7 +1,33 @@
+import uuid
+from decimal import Decimal
+
 from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import F, FloatField, Func
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
 
+from .storage import select_media_storage
+
+
+class NullIfZero(Func):
+    """``NULLIF(expression, 0)`` with the zero written into the SQL: SQLite
+    only matches an expression index against a query without bound
+    parameters in the expression."""
+
+    template = "NULLIF(%(expressions)s, 0)"
+    arity = 1
+
+
+def funded_ratio():
+    """``raised_amount / goal_amount`` as a float, NULL for a zero goal.
+
+    Filters and sorts must use this exact expression for the database to
+    match it against the ProjectIndex expression indexes.
+    """
+    return Cast("raised_amount", FloatField()) / NullIfZero(Cast("goal_amount", FloatField()))
+
 
 class Profile(models.Model):
     ROLE_CHOICES = (
@@ -26,14 +52,20 @@ class Profile(models.Model):
 class BaseProject(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
-    goal_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # A positive goal keeps raised/goal defined for the funded-ratio indexes.
+    goal_amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))])
     raised_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="%(class)s_projects")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # part of the serialized fragment cache key
 
     class Meta:
         abstract = True  # No table created
         ordering = ["-created_at"]  # Default: newest first
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="%(class)s_created_idx"),
+            models.Index(fields=["creator", "-created_at"], name="%(class)s_creator_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -42,20 +74,23 @@ class BaseProject(models.Model):
 # 🎬 2️⃣ Film Project
 class FilmProject(BaseProject):
     trailer_url = models.URLField(blank=True, null=True)  # YouTube or uploaded video
-    poster_image = models.ImageField(upload_to="film_posters/", max_length=255)
+    poster_image = models.ImageField(upload_to="film_posters/", max_length=255, storage=select_media_storage)
+    poster_image_thumbnails = models.JSONField(default=dict, blank=True)  # written by accounts/thumbnails.py
     reward_tiers = models.JSONField(default=list)  # e.g., [{"amount":500, "reward":"early access"}]
 
 
 # 🎵 3️⃣ Music Project
 class MusicProject(BaseProject):
-    album_cover = models.ImageField(upload_to="music_covers/", max_length=255)
+    album_cover = models.ImageField(upload_to="music_covers/", max_length=255, storage=select_media_storage)
+    album_cover_thumbnails = models.JSONField(default=dict, blank=True)
     reward_tiers = models.JSONField(default=list)
     short_video_url = models.URLField(blank=True, null=True)  # Optional to match Art
 
 
 class AudioSample(models.Model):
     project = models.ForeignKey(MusicProject, related_name="audio_samples", on_delete=models.CASCADE)
-    file = models.FileField(upload_to="music_samples/", max_length=255)
+    file = models.FileField(upload_to="music_samples/", max_length=255, storage=select_media_storage)
+    preview = models.JSONField(default=dict, blank=True)  # preview clip and waveform, see accounts/audio_previews.py
 
     def __str__(self):
         return f"Audio sample for {self.project.title}"
@@ -69,12 +104,51 @@ class ArtProject(BaseProject):
 
 class ArtworkImage(models.Model):
     project = models.ForeignKey(ArtProject, related_name="artwork_images", on_delete=models.CASCADE)
-    image = models.ImageField(upload_to="artworks/", max_length=255)
+    image = models.ImageField(upload_to="artworks/", max_length=255, storage=select_media_storage)
+    image_thumbnails = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Artwork for {self.project.title}"
 
 
+class ProjectIndex(models.Model):
+    """Slim, denormalized row per project across all three category tables.
+
+    Kept in sync by the create/update/delete views and rebuilt with
+    `python manage.py backfill_project_index`. Cross-category listings scan
+    this table and then hydrate only the rows on the current page.
+    """
+    CATEGORY_CHOICES = (
+        ("film", "Film"),
+        ("music", "Music"),
+        ("art", "Art"),
+    )
+
+    unique_id = models.CharField(max_length=40, unique=True)  # e.g. "film-12"
+    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    project_id = models.BigIntegerField()
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="project_index")
+    created_at = models.DateTimeField()
+    title = models.CharField(max_length=200)
+    goal_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    raised_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="projectindex_feed_idx"),
+            models.Index(fields=["creator", "-created_at", "-id"], name="projectindex_creator_idx"),
+            # list filters and sorts (see feed.FEED_SORTS)
+            models.Index(fields=["category", "-created_at", "-id"], name="projectindex_category_idx"),
+            models.Index(fields=["-raised_amount", "-id"], name="projectindex_raised_idx"),
+            models.Index(fields=["category", "-raised_amount", "-id"], name="projectindex_cat_raised_idx"),
+            models.Index(funded_ratio().desc(), F("id").desc(), name="projectindex_funded_idx"),
+            models.Index(F("category"), funded_ratio().desc(), F("id").desc(), name="projectindex_cat_funded_idx"),
+        ]
+
+    def __str__(self):
+        return self.unique_id
+
+
 class Payment(models.Model):
     """Simple model to record donations/payments processed via Razorpay.
 
@@ -97,5 +171,86 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="created")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # webhook / verify settlement and refund lookups
+            models.Index(fields=["razorpay_order_id"], name="payment_order_idx"),
+            models.Index(fields=["razorpay_payment_id"], name="payment_rzp_payment_idx"),
+            # per-project settlement and reporting
+            models.Index(fields=["project_category", "project_id", "status"], name="payment_project_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payment({self.id}) {self.amount} {self.status}"
+
+class WebhookEvent(models.Model):
+    """Raw Razorpay webhook delivery, stored before any processing.
+
+    The webhook view only verifies the signature and appends here; the
+    `process_webhook_inbox` command applies events in batches. `event_id`
+    is unique so redelivered events are dropped on insert.
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    body = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["processed_at", "id"], name="webhookevent_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"WebhookEvent({self.event_id})"
+
+
+class ChunkedUpload(models.Model):
+    """An audio sample or artwork image uploaded in chunks (see ``uploads.py``).
+
+    Chunks are appended to a part file outside MEDIA_ROOT. Completing the
+    upload checks its size and SHA-256 and moves it to storage (``file``);
+    attaching it to a project creates the AudioSample/ArtworkImage row.
+    """
+    KIND_CHOICES = (
+        ("audio", "Audio sample"),
+        ("artwork", "Artwork image"),
+    )
+    STATUS_CHOICES = (
+        ("uploading", "Uploading"),
+        ("complete", "Complete"),
+        ("attached", "Attached"),
+    )
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chunked_uploads")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="uploading")
+    file = models.FileField(max_length=255, blank=True, storage=select_media_storage)  # storage name once complete
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # prune_uploads: abandoned uploads, oldest first
+            models.Index(fields=["status", "created_at"], name="chunkedupload_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"ChunkedUpload({self.token}) {self.filename} {self.status}"
+
+
+class MediaBlob(models.Model):
+    """A stored media file and how many rows refer to it.
+
+    Kept up to date by the signals in ``blobs.py``; ``gc_media`` recounts
+    from the media fields before removing blobs nobody refers to.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+
     def __str__(self):
-        return f"Payment({self.id}) {self.amount} {self.status}"
\ No newline at end of file
+        return f"MediaBlob({self.name}) x{self.refcount}"
@@ -0,0 +1,111 @@
+"""Payment settlement: applies Payment state transitions to project totals.
+
+Every transition is a conditional ``UPDATE ... WHERE status IN (...)`` so that,
+however many verify calls and webhook deliveries race for the same payment,
+exactly one of them wins and credits (or, for a refund, debits) the project
+with an ``F()`` expression on the table picked from ``project_category``.
+"""
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import Payment, ProjectIndex
+from .projects import PROJECT_CATEGORIES
+from .response_cache import bump_version
+
+
+# States a payment may be settled from. "failed" is included because the
+# gateway can still capture a payment whose client-side verify failed.
+SETTLEABLE_STATES = ("created", "failed")
+
+
+def _adjust_raised(payment, delta):
+    entry = PROJECT_CATEGORIES.get(payment.project_category)
+    if entry is None or payment.project_id is None:
+        return
+    model = entry[0]
+    model.objects.filter(pk=payment.project_id).update(
+        raised_amount=F("raised_amount") + delta,
+        updated_at=Now(),
+    )
+    ProjectIndex.objects.filter(unique_id=f"{payment.project_category}-{payment.project_id}").update(
+        raised_amount=F("raised_amount") + delta,
+    )
+    # Queryset updates send no signals, so invalidate cached responses here.
+    transaction.on_commit(lambda: bump_version(payment.project_category))
+
+
+def _transition(payment_id, from_states, to_state, delta_sign, filters=None, fields=None):
+    with transaction.atomic():
+        updated = Payment.objects.filter(pk=payment_id, status__in=from_states, **(filters or {})).update(
+            status=to_state, **(fields or {})
+        )
+        if not updated:
+            return False
+        payment = Payment.objects.only("project_category", "project_id", "amount").get(pk=payment_id)
+        _adjust_raised(payment, delta_sign * payment.amount)
+    return True
+
+
+def settle_payment(payment_id, razorpay_order_id=None, **fields):
+    """Mark a payment as paid and credit its project. Returns False if it was
+    already settled (or does not match ``razorpay_order_id``).
+
+    Extra ``fields`` (e.g. ``razorpay_payment_id``, ``amount``) are written in
+    the same conditional update.
+    """
+    filters = {"razorpay_order_id": razorpay_order_id} if razorpay_order_id else None
+    return _transition(payment_id, SETTLEABLE_STATES, "paid", 1, filters=filters, fields=fields)
+
+
+def settle_order(razorpay_order_id, **fields):
+    """Settle every unsettled payment for a Razorpay order; returns how many were applied."""
+    candidates = Payment.objects.filter(
+        razorpay_order_id=razorpay_order_id, status__in=SETTLEABLE_STATES
+    ).values_list("pk", flat=True)
+    return sum(settle_payment(pk, **fields) for pk in list(candidates))
+
+
+def refund_payment(payment_id):
+    """Move a paid payment to refunded and debit its project, once."""
+    return _transition(payment_id, ("paid",), "refunded", -1)
+
+
+def fail_payment(payment_id):
+    """Mark a payment that has not been settled as failed."""
+    return bool(Payment.objects.filter(pk=payment_id, status="created").update(status="failed"))
+
+
+def reconcile_raised_amounts(category, batch_size=500, dry_run=False):
+    """Recompute ``raised_amount`` for every project of ``category`` from paid
+    ``Payment`` totals. Returns the number of projects whose total changed.
+    """
+    model = PROJECT_CATEGORIES[category][0]
+    totals = dict(
+        Payment.objects.filter(status="paid", project_category=category, project_id__isnull=False)
+        .values("project_id")
+        .annotate(total=Sum("amount"))
+        .values_list("project_id", "total")
+    )
+
+    changed = []
+    now = timezone.now()
+    for project in model.objects.only("id", "raised_amount").order_by("pk").iterator(chunk_size=batch_size):
+        expected = totals.get(project.pk, 0)
+        if project.raised_amount != expected:
+            project.raised_amount = expected
+            project.updated_at = now
+            changed.append(project)
+
+    if changed and not dry_run:
+        with transaction.atomic():
+            model.objects.bulk_update(changed, ["raised_amount", "updated_at"], batch_size=batch_size)
+            for start in range(0, len(changed), batch_size):
+                expected = {f"{category}-{p.pk}": p.raised_amount for p in changed[start:start + batch_size]}
+                rows = list(ProjectIndex.objects.filter(unique_id__in=expected).only("id", "unique_id"))
+                for row in rows:
+                    row.raised_amount = expected[row.unique_id]
+                ProjectIndex.objects.bulk_update(rows, ["raised_amount"])
+        bump_version(category)
+    return len(changed)
@@ -0,0 +1,69 @@
+"""Write-side maintenance of the denormalized ``ProjectIndex`` table."""
+from .projects import PROJECT_CATEGORIES
+from .models import ProjectIndex
+from .response_cache import bump_version
+
+
+INDEXED_FIELDS = ["category", "project_id", "creator", "created_at", "title", "goal_amount", "raised_amount"]
+
+
+def index_row(category, project):
+    return ProjectIndex(
+        unique_id=f"{category}-{project.pk}",
+        category=category,
+        project_id=project.pk,
+        creator_id=project.creator_id,
+        created_at=project.created_at,
+        title=project.title,
+        goal_amount=project.goal_amount,
+        raised_amount=project.raised_amount,
+    )
+
+
+def sync_project_index(category, project):
+    """Insert or refresh the index row for ``project`` after a create/update."""
+    row = index_row(category, project)
+    attnames = [ProjectIndex._meta.get_field(name).attname for name in INDEXED_FIELDS]
+    ProjectIndex.objects.update_or_create(
+        unique_id=row.unique_id,
+        defaults={attname: getattr(row, attname) for attname in attnames},
+    )
+
+
+def remove_from_project_index(category, project_id):
+    ProjectIndex.objects.filter(unique_id=f"{category}-{project_id}").delete()
+
+
+def backfill_project_index(batch_size=1000):
+    """Upsert an index row for every project and drop rows whose project is gone.
+
+    Returns the number of rows written per category.
+    """
+    written = {}
+    for category, (model, _serializer, _prefetch) in PROJECT_CATEGORIES.items():
+        written[category] = 0
+        batch = []
+        for project in model.objects.order_by("pk").iterator(chunk_size=batch_size):
+            batch.append(index_row(category, project))
+            if len(batch) >= batch_size:
+                written[category] += _upsert(batch)
+                batch = []
+        if batch:
+            written[category] += _upsert(batch)
+
+        stale = ProjectIndex.objects.filter(category=category).exclude(
+            project_id__in=model.objects.values("pk")
+        )
+        stale.delete()
+        bump_version(category)  # bulk_create does not send post_save
+    return written
+
+
+def _upsert(rows):
+    ProjectIndex.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["unique_id"],
+        update_fields=INDEXED_FIELDS,
+    )
+    return len(rows)
@@ -0,0 +1,91 @@
+"""Project category registry and the per-project serialized fragment cache.
+
+Serializing a project with its ModelSerializer is the expensive part of every
+list response, so each project's serialized dict is cached under a key that
+contains its ``updated_at`` stamp. A list is built from one cheap
+``(id, updated_at)`` query, one ``get_many`` and a serializer run for only the
+missing or stale projects. Saving a project (or its audio samples / artwork
+images, which touch the parent's ``updated_at``) changes the stamp, so
+invalidation is per project and stale fragments simply age out.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import timed
+from .models import FilmProject, MusicProject, ArtProject
+from .serializers import FilmProjectSerializer, MusicProjectSerializer, ArtProjectSerializer
+
+
+# category -> (model, serializer, prefetch lookups)
+PROJECT_CATEGORIES = {
+    "film": (FilmProject, FilmProjectSerializer, ()),
+    "music": (MusicProject, MusicProjectSerializer, ("audio_samples",)),
+    "art": (ArtProject, ArtProjectSerializer, ("artwork_images",)),
+}
+
+
+def category_queryset(category, **filters):
+    model, _serializer, prefetch = PROJECT_CATEGORIES[category]
+    return (
+        model.objects.filter(**filters)
+        .select_related("creator")
+        .prefetch_related(*prefetch)
+    )
+
+
+def stamps(category, **filters):
+    """Cheap ``(id, updated_at)`` rows used to build fragment keys."""
+    model = PROJECT_CATEGORIES[category][0]
+    # Unordered: callers that need an order ask for it, the rest skip the sort.
+    return model.objects.filter(**filters).order_by().values_list("id", "updated_at")
+
+
+def fragment_key(category, pk, updated_at):
+    return f"projects:fragment:{category}:{pk}:{updated_at.timestamp()}"
+
+
+def _serialize_fresh(category, projects, result):
+    """Serialize loaded ``projects`` into ``result``; return their fragment entries."""
+    serializer_class = PROJECT_CATEGORIES[category][1]
+    projects = list(projects)  # load before timing the serializer
+    fresh = {}
+    with timed("serialize"):
+        for project in projects:
+            result[project.pk] = dict(serializer_class(project).data)
+            # Keyed by the freshly loaded stamp, so a write that landed after
+            # the stamp query is never cached under an older key.
+            fresh[fragment_key(category, project.pk, project.updated_at)] = result[project.pk]
+    return fresh
+
+
+def serialize_projects(category, rows):
+    """Return ``{id: serialized dict}`` for ``rows`` of ``(id, updated_at)``.
+
+    Cached fragments are fetched with a single ``get_many``; only the misses
+    are loaded (with their creator and media prefetched) and serialized.
+    """
+    keys = {pk: fragment_key(category, pk, updated_at) for pk, updated_at in rows}
+    cached = cache.get_many(keys.values())
+    result = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in result]
+    if missing:
+        fresh = _serialize_fresh(category, category_queryset(category, id__in=missing), result)
+        cache.set_many(fresh, settings.PROJECT_FRAGMENT_CACHE_TIMEOUT)
+    return result
+
+
+async def aserialize_projects(category, rows):
+    """Async ``serialize_projects``; ``rows`` may be a ``stamps()`` queryset."""
+    if hasattr(rows, "__aiter__"):
+        rows = [row async for row in rows]
+    keys = {pk: fragment_key(category, pk, updated_at) for pk, updated_at in rows}
+    cached = await cache.aget_many(keys.values())
+    result = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in result]
+    if missing:
+        projects = [project async for project in category_queryset(category, id__in=missing)]
+        fresh = _serialize_fresh(category, projects, result)
+        await cache.aset_many(fresh, settings.PROJECT_FRAGMENT_CACHE_TIMEOUT)
+    return result
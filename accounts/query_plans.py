@@ -0,0 +1,72 @@
+"""Query-plan regression checks for the hot ORM queries behind ``views.py``.
+
+``HOT_QUERIES`` builds the querysets the request paths actually run;
+``find_scans`` runs EXPLAIN (``EXPLAIN QUERY PLAN`` on SQLite) on each and
+reports any that read a whole table instead of searching an index. The test
+suite calls ``assert_no_scans`` so a dropped or unusable index fails CI.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Sum
+
+from .feed import FEED_SORTS, feed_queryset
+from .models import Payment, ProjectIndex, WebhookEvent
+from .projects import PROJECT_CATEGORIES, stamps
+
+
+# SQLite: "SCAN accounts_payment" is a full table scan, while
+# "SCAN t USING INDEX i" walks an index in order (e.g. ORDER BY ... LIMIT).
+SQLITE_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)")
+SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def _hot_queries():
+    queries = {
+        "feed page": ProjectIndex.objects.order_by("-created_at", "-id")[:21],
+        "my projects page": ProjectIndex.objects.filter(creator_id=1).order_by("-created_at", "-id")[:21],
+        "project index row": ProjectIndex.objects.filter(unique_id="film-1"),
+        "settle by order": Payment.objects.filter(razorpay_order_id="order_1", status__in=("created", "failed")),
+        "settle by id": Payment.objects.filter(pk=1, status__in=("created", "failed")),
+        "refund lookup": Payment.objects.filter(razorpay_payment_id="pay_1", status="paid"),
+        "project payments": Payment.objects.filter(project_category="film", project_id=1, status="paid"),
+        "reconcile totals": Payment.objects.filter(status="paid", project_category="film", project_id__isnull=False)
+        .values("project_id").annotate(total=Sum("amount")),
+        "webhook inbox": WebhookEvent.objects.filter(processed_at__isnull=True, attempts__lt=5).order_by("id")[:100],
+    }
+    for sort in FEED_SORTS:
+        queries[f"feed by {sort}"] = feed_queryset(sort)[:21]
+        queries[f"category list by {sort}"] = feed_queryset(sort, category="film")[:21]
+    for category in PROJECT_CATEGORIES:
+        queries[f"{category} detail stamp"] = stamps(category, id=1)
+        queries[f"{category} hydrate page"] = stamps(category, id__in=[1, 2, 3])
+    return queries
+
+
+def scans_in_plan(plan):
+    if connection.vendor == "postgresql":
+        return POSTGRES_SCAN.findall(plan)
+    if connection.vendor == "sqlite":
+        found = SQLITE_SCAN.findall(plan)
+        if SQLITE_SORT.search(plan):
+            found.append("temp b-tree sort")
+        return found
+    return []
+
+
+def find_scans(queries=None):
+    """Return ``{query name: (scanned tables, plan)}`` for queries that scan."""
+    problems = {}
+    for name, queryset in (queries or _hot_queries()).items():
+        plan = queryset.explain()
+        scanned = scans_in_plan(plan)
+        if scanned:
+            problems[name] = (scanned, plan)
+    return problems
+
+
+def assert_no_scans(testcase, queries=None):
+    problems = find_scans(queries)
+    message = "\n\n".join(f"{name}: scans {tables}\n{plan}" for name, (tables, plan) in problems.items())
+    testcase.assertFalse(problems, f"Hot queries fell back to a scan:\n{message}")
@@ -0,0 +1,192 @@
+"""Versioned response cache for the public project list/detail endpoints.
+
+Every category has a version counter stored in the configured Django cache.
+A cached response is keyed by the request path, the query string and the
+versions of the categories it depends on, so bumping a counter (done from the
+post_save/post_delete receivers in ``signals.py``) makes every dependent entry
+unreachable without having to know which keys exist. Use a shared backend
+(e.g. Redis) when running more than one process, otherwise each process only
+sees its own bumps.
+
+With read replicas, requests that read the primary to see their own writes
+(see ``routers.py``) bypass the cache both ways. Other misses are computed on
+a replica, which may not have caught up with the versions in the key yet, so
+those entries expire after ``DB_REPLICA_STICKY_SECONDS`` at most.
+"""
+import hashlib
+import inspect
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import routing_state
+
+
+CATEGORIES = ("film", "music", "art")
+KEY_PREFIX = "projects"
+STATS_KEYS = {"hits": f"{KEY_PREFIX}:stats:hits", "misses": f"{KEY_PREFIX}:stats:misses"}
+
+
+def _version_key(category):
+    return f"{KEY_PREFIX}:version:{category}"
+
+
+def _initial_version():
+    # Time-based so a counter that was evicted never restarts at a value an
+    # older, still-cached response was stored under.
+    return time.time_ns() // 1000
+
+
+def get_versions(categories):
+    keys = [_version_key(c) for c in categories]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # add() keeps a value another process may have just set
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aget_versions(categories):
+    keys = [_version_key(c) for c in categories]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _initial_version(), timeout=None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def bump_version(category):
+    if category not in CATEGORIES:
+        return
+    key = _version_key(category)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _initial_version(), timeout=None):
+            cache.incr(key)
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def _acount(name):
+    key = STATS_KEYS[name]
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def cache_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    return {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def _entry_timeout():
+    state = routing_state()
+    if state is not None and state.used_replica:
+        return min(settings.PROJECT_RESPONSE_CACHE_TIMEOUT, settings.DB_REPLICA_STICKY_SECONDS)
+    return settings.PROJECT_RESPONSE_CACHE_TIMEOUT
+
+
+def _response_key(request, versions):
+    query = request.META.get("QUERY_STRING", "")
+    digest = hashlib.sha1(f"{request.path}?{query}".encode()).hexdigest()
+    return f"{KEY_PREFIX}:response:{digest}:" + ".".join(str(v) for v in versions)
+
+
+class DataJsonResponse(JsonResponse):
+    """JsonResponse that keeps its ``data``, like DRF's ``Response``, so async
+    views (which cannot use DRF) can be cached by ``cached_response``."""
+
+    def __init__(self, data, **kwargs):
+        super().__init__(data, safe=False, **kwargs)
+        self.data = data
+
+
+def cached_response(*categories):
+    """Cache a GET view's 200 response until one of ``categories`` changes.
+
+    With no arguments the category is taken from the view's ``category`` URL
+    kwarg. Apply below ``@api_view`` so the view returns a DRF ``Response``;
+    ``async def`` views must return a ``DataJsonResponse``.
+    """
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            return _async_cached(view, categories)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            depends_on = categories or (kwargs.get("category"),)
+            if request.method != "GET" or not set(depends_on) <= set(CATEGORIES):
+                return view(request, *args, **kwargs)
+
+            state = routing_state()
+            if state is not None and state.reads_own_writes():
+                response = view(request, *args, **kwargs)
+                response["X-Cache"] = "BYPASS"
+                return response
+
+            key = _response_key(request, get_versions(depends_on))
+            data = cache.get(key)
+            if data is not None:
+                _count("hits")
+                response = Response(data, status=status.HTTP_200_OK)
+                response["X-Cache"] = "HIT"
+                return response
+
+            _count("misses")
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, _entry_timeout())
+            response["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_cached(view, categories):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        depends_on = categories or (kwargs.get("category"),)
+        if request.method != "GET" or not set(depends_on) <= set(CATEGORIES):
+            return await view(request, *args, **kwargs)
+
+        state = routing_state()
+        if state is not None and await state.areads_own_writes():
+            response = await view(request, *args, **kwargs)
+            response["X-Cache"] = "BYPASS"
+            return response
+
+        # Same key and payload as the sync views, so WSGI and ASGI workers
+        # sharing a cache serve each other's entries.
+        key = _response_key(request, await aget_versions(depends_on))
+        data = await cache.aget(key)
+        if data is not None:
+            await _acount("hits")
+            response = DataJsonResponse(data, status=status.HTTP_200_OK)
+            response["X-Cache"] = "HIT"
+            return response
+
+        await _acount("misses")
+        response = await view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, _entry_timeout())
+        response["X-Cache"] = "MISS"
+        return response
+    return wrapper
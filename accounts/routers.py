@@ -0,0 +1,185 @@
+"""Send project and media reads to read replicas.
+
+``ReplicaRouter`` routes reads of the project, media and ``ProjectIndex``
+models to one of ``DATABASE_REPLICAS`` (picked once per request). Everything
+else, and every write, goes to the primary. Routing only applies inside a
+request, so management commands and background work always read the primary.
+
+Read-your-writes: a request that is not GET/HEAD/OPTIONS, or that has
+written, reads the primary for the rest of the request. ``ReplicaRoutingMiddleware``
+then pins the authenticated user to the primary for
+``DB_REPLICA_STICKY_SECONDS`` through a cache key, so the user's next requests
+see their change while the replicas catch up. Use a shared cache backend when
+running more than one process. The pin is looked up for the user DRF
+authenticated or, failing that (async views, reads before authentication),
+for the subject of the request's access token.
+
+The shared response cache (``response_cache.py``) neither serves nor stores
+for requests that read the primary this way. Other misses are computed on a
+replica and kept no longer than ``DB_REPLICA_STICKY_SECONDS``, the lag the
+pin already assumes.
+
+Two local SQLite files are enough to try it::
+
+    python manage.py migrate
+    sqlite3 db.sqlite3 ".backup replica.sqlite3"
+    DB_REPLICAS=replica.sqlite3 python manage.py runserver
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from .authentication import token_user_id
+
+
+DEFAULT_DB = "default"
+REPLICATED_MODELS = frozenset(
+    ("accounts", name)
+    for name in ("filmproject", "musicproject", "artproject", "audiosample", "artworkimage", "projectindex")
+)
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def pin_user(user_id):
+    """Read the primary for ``user_id``'s requests for ``DB_REPLICA_STICKY_SECONDS``."""
+    cache.set(_pin_key(user_id), 1, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def _user_to_pin(state, response):
+    if state.wrote and settings.DATABASE_REPLICAS and response.status_code < 400:
+        return state.user_id()
+    return None
+
+
+class RoutingState:
+    def __init__(self, request):
+        self.request = request
+        self.wrote = request.method not in SAFE_METHODS
+        self.replica = None
+        self.used_replica = False
+
+    def user_id(self):
+        # request.user is the DRF-authenticated user once a sync view has run
+        # authentication; async views never set it.
+        user = getattr(self.request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return self.token_user_id()
+
+    def token_user_id(self):
+        if not hasattr(self.request, "_db_token_user"):
+            self.request._db_token_user = token_user_id(self.request)
+        return self.request._db_token_user
+
+    def _pinned(self):
+        pinned = getattr(self.request, "_db_pinned", None)
+        if pinned is None:
+            user_id = self.user_id()
+            if user_id is None:
+                return False
+            pinned = self.request._db_pinned = cache.get(_pin_key(user_id)) is not None
+        return pinned
+
+    async def _apinned(self):
+        # Only the token: on the event loop request.user would load the
+        # session user synchronously, and async views authenticate by JWT.
+        pinned = getattr(self.request, "_db_pinned", None)
+        if pinned is None:
+            user_id = self.token_user_id()
+            if user_id is None:
+                return False
+            pinned = self.request._db_pinned = await cache.aget(_pin_key(user_id)) is not None
+        return pinned
+
+    def reads_own_writes(self):
+        """True when the request reads the primary to see its user's writes."""
+        return bool(settings.DATABASE_REPLICAS) and (self.wrote or self._pinned())
+
+    async def areads_own_writes(self):
+        return bool(settings.DATABASE_REPLICAS) and (self.wrote or await self._apinned())
+
+    def read_db(self):
+        if self.wrote or self._pinned():
+            return DEFAULT_DB
+        if self.replica is None:
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+        self.used_replica = True
+        return self.replica
+
+
+_state = ContextVar("replica_routing", default=None)
+
+
+@contextmanager
+def replica_routing(request):
+    """Route reads for the duration of ``request``."""
+    token = _state.set(RoutingState(request))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def routing_state():
+    """The current request's ``RoutingState``, or None outside a request."""
+    return _state.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not settings.DATABASE_REPLICAS:
+            return None
+        if (model._meta.app_label, model._meta.model_name) not in REPLICATED_MODELS:
+            return None
+        return state.read_db()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Route the request's reads and pin users to the primary after they write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_routing(request) as state:
+            response = self.get_response(request)
+        user_id = _user_to_pin(state, response)
+        if user_id is not None:
+            pin_user(user_id)
+        return response
+
+    async def __acall__(self, request):
+        with replica_routing(request) as state:
+            response = await self.get_response(request)
+        user_id = _user_to_pin(state, response)
+        if user_id is not None:
+            await cache.aset(_pin_key(user_id), 1, settings.DB_REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,240 @@
+"""Full-text search over projects of every category.
+
+Each project has one document (title, description, creator username and
+reward-tier text) in ``accounts_project_search``: an FTS5 virtual table on
+SQLite, or a ``tsvector`` column with a GIN index on PostgreSQL. Documents are
+written from the project post_save/post_delete receivers and can be rebuilt
+with ``manage.py rebuild_search_index``. Queries match every term as a
+prefix, rank by relevance (title weighted highest) and page with a
+``(score, unique_id)`` keyset cursor.
+"""
+import base64
+import json
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+
+from .projects import PROJECT_CATEGORIES
+
+
+TABLE = "accounts_project_search"
+MAX_TERMS = 8
+# Stable integer key per project so SQLite can address FTS rows by rowid.
+CATEGORY_CODES = {"film": 1, "music": 2, "art": 3}
+
+
+# Quacks like a ProjectIndex row for ``feed.hydrate``.
+SearchHit = namedtuple("SearchHit", "category project_id unique_id score")
+
+
+class InvalidSearchCursor(ValueError):
+    pass
+
+
+def encode_cursor(score, unique_id):
+    raw = json.dumps([score, unique_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, unique_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), str(unique_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidSearchCursor(str(e)) from e
+
+
+def query_terms(q):
+    return re.findall(r"\w+", (q or "").lower())[:MAX_TERMS]
+
+
+def rewards_text(reward_tiers):
+    parts = []
+    for tier in reward_tiers or []:
+        values = tier.values() if isinstance(tier, dict) else [tier]
+        parts.extend(str(v) for v in values if isinstance(v, (str, int, float)))
+    return " ".join(parts)
+
+
+def doc_key(category, pk):
+    return pk * 4 + CATEGORY_CODES[category]
+
+
+def unique_id_for(key):
+    category = next(c for c, code in CATEGORY_CODES.items() if code == key % 4)
+    return f"{category}-{key // 4}"
+
+
+def document(category, project):
+    """``(key, unique_id, title, description, creator, rewards)`` for one project."""
+    return (
+        doc_key(category, project.pk),
+        f"{category}-{project.pk}",
+        project.title,
+        project.description,
+        project.creator.username,
+        rewards_text(getattr(project, "reward_tiers", None)),
+    )
+
+
+class SQLiteSearch:
+    # bm25 weights follow the column order: unique_id, title, description, creator, rewards
+    SCORE = f"-bm25({TABLE}, 0.0, 10.0, 2.0, 5.0, 3.0)"
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "unique_id UNINDEXED, title, description, creator, rewards, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+    def upsert(self, cursor, documents):
+        # FTS5 has no upsert; replace by rowid, which is an index lookup.
+        self.delete(cursor, [d[0] for d in documents])
+        self.insert(cursor, documents)
+
+    def insert(self, cursor, documents):
+        """Bulk-load documents that are known not to be indexed yet."""
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, unique_id, title, description, creator, rewards) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            documents,
+        )
+
+    def delete(self, cursor, keys):
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(key,) for key in keys])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {TABLE}")
+
+    def search(self, cursor, terms, limit, after=None):
+        match = " ".join('"{}"*'.format(term.replace('"', "")) for term in terms)
+        sql = f"SELECT unique_id, {self.SCORE} AS score FROM {TABLE} WHERE {TABLE} MATCH %s"
+        params = [match]
+        if after is not None:
+            sql += " AND (score < %s OR (score = %s AND unique_id > %s))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score DESC, unique_id LIMIT %s"
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+class PostgresSearch:
+    VECTOR = (
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'C') || "
+        "setweight(to_tsvector('simple', %s), 'B') || setweight(to_tsvector('simple', %s), 'B')"
+    )
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "unique_id varchar(40) PRIMARY KEY, document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)")
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (unique_id, document) VALUES (%s, {self.VECTOR}) "
+            "ON CONFLICT (unique_id) DO UPDATE SET document = EXCLUDED.document",
+            [d[1:] for d in documents],
+        )
+
+    insert = upsert
+
+    def delete(self, cursor, keys):
+        cursor.execute(f"DELETE FROM {TABLE} WHERE unique_id = ANY(%s)", [[unique_id_for(key) for key in keys]])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {TABLE}")
+
+    def search(self, cursor, terms, limit, after=None):
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        sql = (
+            f"SELECT unique_id, score FROM ("
+            f"SELECT unique_id, ts_rank_cd(document, q) AS score FROM {TABLE}, to_tsquery('simple', %s) q "
+            f"WHERE document @@ q) ranked"
+        )
+        params = [tsquery]
+        if after is not None:
+            sql += " WHERE (score < %s OR (score = %s AND unique_id > %s))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score DESC, unique_id LIMIT %s"
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+SEARCH_BACKENDS = {
+    "sqlite": SQLiteSearch,
+    "postgresql": PostgresSearch,
+}
+
+
+def backend_for(db_connection=None):
+    """Search backend for the connection's vendor, or None when unsupported."""
+    backend = SEARCH_BACKENDS.get((db_connection or connection).vendor)
+    return backend() if backend else None
+
+
+def index_projects(category, projects):
+    backend = backend_for()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, [document(category, project) for project in projects])
+
+
+def remove_project(category, pk):
+    backend = backend_for()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, [doc_key(category, pk)])
+
+
+def rebuild(batch_size=1000):
+    """Re-index every project; returns the number of documents per category."""
+    backend = backend_for()
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.clear(cursor)
+        for category, (model, _serializer, _prefetch) in PROJECT_CATEGORIES.items():
+            counts[category] = 0
+            batch = []
+            for project in model.objects.select_related("creator").order_by("pk").iterator(chunk_size=batch_size):
+                batch.append(document(category, project))
+                if len(batch) >= batch_size:
+                    backend.insert(cursor, batch)
+                    counts[category] += len(batch)
+                    batch = []
+            if batch:
+                backend.insert(cursor, batch)
+                counts[category] += len(batch)
+    return counts
+
+
+def search(q, limit, after=None):
+    """Return ``([SearchHit, ...], next_cursor)`` for one page, best match first."""
+    terms = query_terms(q)
+    backend = backend_for()
+    if not terms or backend is None:
+        return [], None
+    with connection.cursor() as cursor:
+        rows = backend.search(cursor, terms, limit + 1, after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+    hits = []
+    for unique_id, score in rows:
+        category, pk = unique_id.split("-", 1)
+        hits.append(SearchHit(category, int(pk), unique_id, score))
+    return hits, next_cursor
@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .blacklist import FilteredRefreshToken
 from .models import Profile, BaseProject, FilmProject, MusicProject, ArtProject, ArtworkImage, AudioSample
+from .thumbnails import srcsets, thumbnail_urls
+from .audio_previews import preview_fields
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -28,21 +33,36 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         role = validated_data.pop('role', 'backer')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # create_user() without its save, so the post_save signal can create
+        # the profile with the requested role in a single insert
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', ''),
         )
-        # profile created by signal; set role
-        user.profile.role = role
-        user.profile.save()
+        user.set_password(validated_data['password'])
+        user._profile_role = role
+        with transaction.atomic():
+            user.save()
         return user
 
-class FilmProjectSerializer(serializers.ModelSerializer):
+class ThumbnailFieldsMixin:
+    """``<image>_thumbnails`` ({format: [{width, url}]}) and ``<image>_srcset``
+    ({format: srcset}) for the model's thumbnailed image field."""
+
+    def get_thumbnails(self, obj):
+        return thumbnail_urls(obj)
+
+    def get_srcset(self, obj):
+        return srcsets(thumbnail_urls(obj))
+
+
+class FilmProjectSerializer(ThumbnailFieldsMixin, serializers.ModelSerializer):
     creator_name = serializers.CharField(source='creator.username', read_only=True)
     poster_image = serializers.ImageField(use_url=True)
+    poster_image_thumbnails = serializers.SerializerMethodField(method_name='get_thumbnails')
+    poster_image_srcset = serializers.SerializerMethodField(method_name='get_srcset')
     reward_tiers = serializers.JSONField(required=False, help_text="List of {place, reward} objects")
 
     
@@ -58,6 +78,8 @@ class FilmProjectSerializer(serializers.ModelSerializer):
             'created_at',
             'trailer_url',
             'poster_image',
+            'poster_image_thumbnails',
+            'poster_image_srcset',
             'reward_tiers',
         ]
 
@@ -65,15 +87,32 @@ class FilmProjectSerializer(serializers.ModelSerializer):
 
 # Music Serializer
 class AudioSampleSerializer(serializers.ModelSerializer):
+    # Players draw the waveform and stream the short preview without
+    # downloading the original file.
+    preview_url = serializers.SerializerMethodField()
+    duration = serializers.SerializerMethodField()
+    peaks = serializers.SerializerMethodField()
+
     class Meta:
         model = AudioSample
-        fields = ['id', 'file']
+        fields = ['id', 'file', 'preview_url', 'duration', 'peaks']
+
+    def get_preview_url(self, obj):
+        return preview_fields(obj)["preview_url"]
 
+    def get_duration(self, obj):
+        return preview_fields(obj)["duration"]
 
-class MusicProjectSerializer(serializers.ModelSerializer):
+    def get_peaks(self, obj):
+        return preview_fields(obj)["peaks"]
+
+
+class MusicProjectSerializer(ThumbnailFieldsMixin, serializers.ModelSerializer):
     creator_name = serializers.CharField(source='creator.username', read_only=True)
     audio_samples = AudioSampleSerializer(many=True, read_only=True)
     album_cover = serializers.ImageField(use_url=True)
+    album_cover_thumbnails = serializers.SerializerMethodField(method_name='get_thumbnails')
+    album_cover_srcset = serializers.SerializerMethodField(method_name='get_srcset')
     reward_tiers = serializers.JSONField(required=False, help_text="List of {place, reward} objects")
 
     class Meta:
@@ -87,6 +126,8 @@ class MusicProjectSerializer(serializers.ModelSerializer):
             'creator_name',
             'created_at',
             'album_cover',
+            'album_cover_thumbnails',
+            'album_cover_srcset',
             'audio_samples',
             'short_video_url',
             'reward_tiers',
@@ -95,10 +136,13 @@ class MusicProjectSerializer(serializers.ModelSerializer):
 
 
 # Art Serializer
-class ArtworkImageSerializer(serializers.ModelSerializer):
+class ArtworkImageSerializer(ThumbnailFieldsMixin, serializers.ModelSerializer):
+    image_thumbnails = serializers.SerializerMethodField(method_name='get_thumbnails')
+    image_srcset = serializers.SerializerMethodField(method_name='get_srcset')
+
     class Meta:
         model = ArtworkImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_thumbnails', 'image_srcset']
 
 
 class ArtProjectSerializer(serializers.ModelSerializer):
@@ -143,3 +187,8 @@ class ProjectSerializer(serializers.Serializer):
     )
     short_video_url = serializers.CharField(required=False, allow_null=True)
     reward_tiers = serializers.JSONField(required=False)
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    # Rotation checks the old token against the blacklist on every refresh.
+    token_class = FilteredRefreshToken
@@ -1,15 +1,155 @@
-from django.db.models.signals import post_save
+from collections import Counter
+
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from django.db import transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
-from .models import Profile
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .authentication import invalidate_principal
+from .blacklist import bump_blacklist_version, get_blacklist_filter
+from .models import Profile, FilmProject, MusicProject, ArtProject, AudioSample, ArtworkImage, Payment, ProjectIndex
+from .response_cache import bump_version
+from .search import index_projects, remove_project
+from .thumbnails import THUMBNAIL_SOURCES, schedule_thumbnails
+from .audio_previews import schedule_preview
+from .blobs import MEDIA_FIELDS, adjust_references, media_names, stored_names
 
 
 @receiver(post_save, sender=User)
-def create_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    # Only on creation: saving a User (e.g. a last_login update) must not
+    # rewrite its profile. Profile changes are saved by whoever makes them.
+    # RegisterSerializer sets _profile_role so the role is part of the insert.
+    if created and not raw:
+        role = getattr(instance, "_profile_role", None)
+        Profile.objects.create(user=instance, **({"role": role} if role else {}))
 
 
+# Drop cached JWT principals (user + profile) when they change: now, and again
+# on commit so a request racing the write cannot re-cache the old row under
+# the new version.
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=BlacklistedToken)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    if sender is User:
+        user_id = instance.pk
+    elif sender is Profile:
+        user_id = instance.user_id
+    else:
+        user_id = instance.token.user_id
+    if user_id is not None:
+        invalidate_principal(user_id)
+        transaction.on_commit(lambda: invalidate_principal(user_id))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def track_blacklisted_token(sender, instance, created, **kwargs):
+    # This process knows at once; the others catch up when the version moves,
+    # which must happen only after the row is visible to them.
+    if created:
+        get_blacklist_filter().add(instance.token.jti)
+        transaction.on_commit(bump_blacklist_version)
+
+
+# Invalidate cached project responses whenever the data behind them changes.
+PROJECT_CATEGORY_SENDERS = {
+    FilmProject: "film",
+    MusicProject: "music",
+    ArtProject: "art",
+    AudioSample: "music",
+    ArtworkImage: "art",
+}
+
+
+def bump_project_cache_version(sender, instance, **kwargs):
+    if sender in PROJECT_CATEGORY_SENDERS:
+        bump_version(PROJECT_CATEGORY_SENDERS[sender])
+    elif sender is Payment:
+        bump_version(instance.project_category)
+    elif sender is ProjectIndex:
+        # The feed reads the index, which is synced after the project save.
+        bump_version(instance.category)
+
+
+# Connected per sender rather than to every model, so deletes of unrelated
+# models (e.g. pruning expired tokens) keep Django's single-query fast path.
+for _sender in (*PROJECT_CATEGORY_SENDERS, Payment, ProjectIndex):
+    post_save.connect(bump_project_cache_version, sender=_sender)
+    post_delete.connect(bump_project_cache_version, sender=_sender)
+
+
+@receiver(post_save, sender=AudioSample)
+@receiver(post_delete, sender=AudioSample)
+@receiver(post_save, sender=ArtworkImage)
+@receiver(post_delete, sender=ArtworkImage)
+def touch_parent_project(sender, instance, **kwargs):
+    # Media is part of the parent's serialized fragment, so move its stamp.
+    parent_model = MusicProject if sender is AudioSample else ArtProject
+    parent_model.objects.filter(pk=instance.project_id).update(updated_at=timezone.now())
+
+
+# Keep the full-text search index in step with project writes.
+SEARCHABLE_SENDERS = {
+    FilmProject: "film",
+    MusicProject: "music",
+    ArtProject: "art",
+}
+
+
+def index_project_for_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_projects(SEARCHABLE_SENDERS[sender], [instance])
+
+
+def unindex_project_for_search(sender, instance, **kwargs):
+    remove_project(SEARCHABLE_SENDERS[sender], instance.pk)
+
+
+for _sender in SEARCHABLE_SENDERS:
+    post_save.connect(index_project_for_search, sender=_sender)
+    post_delete.connect(unindex_project_for_search, sender=_sender)
+
+
+# Render thumbnails for new or replaced images once the write commits.
+def generate_image_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_thumbnails(instance)
+
+
+for _sender in THUMBNAIL_SOURCES:
+    post_save.connect(generate_image_thumbnails, sender=_sender)
+
+
+# Preview clip and waveform peaks for new or replaced audio samples.
+@receiver(post_save, sender=AudioSample)
+def generate_audio_preview(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_preview(instance)
+
+
+# Reference counts of stored media files (accounts/blobs.py).
+def remember_stored_media(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_media = None if raw else stored_names(sender, instance, update_fields)
+
+
+def count_saved_media(sender, instance, created, raw=False, **kwargs):
+    before = getattr(instance, "_stored_media", None)
+    if raw or not created and before is None:
+        return
+    changes = Counter(media_names(instance))
+    changes.subtract(before or [])
+    adjust_references(changes)
+
+
+def count_deleted_media(sender, instance, **kwargs):
+    adjust_references({name: -n for name, n in Counter(media_names(instance)).items()})
+
+
+for _sender in MEDIA_FIELDS:
+    pre_save.connect(remember_stored_media, sender=_sender)
+    post_save.connect(count_saved_media, sender=_sender)
+    post_delete.connect(count_deleted_media, sender=_sender)
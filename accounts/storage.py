@@ -0,0 +1,58 @@
+"""Content-addressed storage for uploaded project media.
+
+Posters, album covers, audio samples and artwork images are stored under
+the SHA-256 of their content rather than their upload name::
+
+    blobs/3f/2a/3f2a9c1e...e5b7d8a60.png
+
+so a file uploaded again (for another project, or the same one after an
+edit) is written once and every row refers to the same blob. How many rows
+refer to each blob is kept in ``MediaBlob`` (see ``blobs.py``); blobs nobody
+refers to any more are removed by ``manage.py gc_media``.
+
+The storage itself never touches the database.
+"""
+import os
+import posixpath
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+from .imaging import file_digest
+
+
+BLOB_DIR = "blobs"
+
+
+def blob_name(digest, extension):
+    return posixpath.join(BLOB_DIR, digest[:2], digest[2:4], f"{digest}{extension.lower()}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        return name  # _save picks the final name from the content
+
+    def _save(self, name, content):
+        # Written once under a unique name, hashed from disk and renamed into
+        # place: the content is read a single time (it need not be seekable),
+        # readers never see a partial blob and two uploads of the same file
+        # both succeed.
+        temporary = super()._save(posixpath.join(BLOB_DIR, "tmp", uuid.uuid4().hex), content)
+        name = blob_name(file_digest(self.path(temporary)), os.path.splitext(name)[1])
+        if self.exists(name):
+            # Already stored. Touching it keeps gc_media's grace period from
+            # collecting a blob that was unreferenced until this upload.
+            os.remove(self.path(temporary))
+            os.utime(self.path(name))
+            return name
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+def select_media_storage():
+    """Storage for the media fields (a callable, so migrations do not pin it)."""
+    return media_storage
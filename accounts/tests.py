@@ -1,3 +1,1485 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files import File, locks
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import numpy as np
+from PIL import Image as PILImage
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import FilmProject, MusicProject, ArtProject, AudioSample, ArtworkImage, ChunkedUpload, MediaBlob, ProjectIndex, Payment, WebhookEvent
+from .audio import analyse_audio
+from .payments import refund_payment, settle_payment
+from .webhooks import drain_batch
+from .gateway import LatencyHistogram, get_gateway
+from .idempotency import IdempotencyBusy, IdempotencyConflict, IdempotencyStore
+from .query_plans import assert_no_scans, find_scans
+from .project_index import backfill_project_index
+from .projects import fragment_key
+from .response_cache import bump_version, cache_stats
+from . import authentication as principals
+from .authentication import load_principal, principal_stats
+from .blacklist import BlacklistFilter, BloomFilter, bump_blacklist_version, get_blacklist_filter
+from .routers import ReplicaRouter, pin_user, replica_routing
+from .instrumentation import query_budget
+from .thumbnails import derivative_name
+from .media import serve_media
+from .storage import blob_name, select_media_storage
+from . import uploads
+
+
+def make_projects(creator, per_category, same_instant=False):
+    """Create ``per_category`` film/music/art projects with distinct created_at values."""
+    now = timezone.now()
+    projects = []
+    for i in range(per_category):
+        film = FilmProject.objects.create(
+            title=f"Film {i}", description="d", goal_amount=1000, creator=creator,
+            poster_image="film_posters/poster.png",
+        )
+        music = MusicProject.objects.create(
+            title=f"Music {i}", description="d", goal_amount=1000, creator=creator,
+            album_cover="music_covers/cover.png",
+        )
+        AudioSample.objects.create(project=music, file="music_samples/sample.mp3")
+        art = ArtProject.objects.create(title=f"Art {i}", description="d", goal_amount=1000, creator=creator)
+        ArtworkImage.objects.create(project=art, image="artworks/art.png")
+        for offset, project in enumerate((film, music, art)):
+            created_at = now if same_instant else now - timedelta(minutes=3 * i + offset)
+            type(project).objects.filter(pk=project.pk).update(created_at=created_at)
+            projects.append(project)
+    backfill_project_index()
+    return projects
+
+
+def auth_header(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+class ProjectFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+
+    def walk_feed(self, limit):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/projects/", params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.json()["results"])
+            cursor = response.json()["next_cursor"]
+            if not cursor:
+                return seen
+
+    def test_pages_cover_every_project_once_newest_first(self):
+        make_projects(self.user, 4)
+        seen = self.walk_feed(limit=5)
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len({p["unique_id"] for p in seen}), 12)
+        created = [p["created_at"] for p in seen]
+        self.assertEqual(created, sorted(created, reverse=True))
+        self.assertEqual(seen[0]["unique_id"], f"film-{FilmProject.objects.get(title='Film 0').id}")
+        self.assertEqual(seen[1]["category"], "music")
+
+    def test_rows_created_in_the_same_instant_are_not_skipped(self):
+        make_projects(self.user, 3, same_instant=True)
+        seen = self.walk_feed(limit=2)
+        self.assertEqual(len({p["unique_id"] for p in seen}), 9)
+
+    def test_query_count_does_not_grow_with_project_count(self):
+        make_projects(self.user, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/api/projects/", {"limit": 50})
+        make_projects(self.user, 10)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get("/api/projects/", {"limit": 50})
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_cursor_and_limit_are_rejected(self):
+        self.assertEqual(self.client.get("/api/projects/", {"cursor": "garbage"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/projects/", {"limit": "0"}).status_code, 400)
+
+
+class ProjectListFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.other = User.objects.create_user("other", "other@example.com", "password123")
+        # (goal, raised) per film; created newest first
+        for i, (goal, raised) in enumerate([(1000, 100), (1000, 900), (200, 250), (5000, 2500)]):
+            film = FilmProject.objects.create(
+                title=f"Film {i}", description="d", goal_amount=goal, raised_amount=raised,
+                creator=self.user if i < 3 else self.other, poster_image="film_posters/poster.png",
+            )
+            FilmProject.objects.filter(pk=film.pk).update(created_at=timezone.now() - timedelta(minutes=i))
+        ArtProject.objects.create(title="Art 0", description="d", goal_amount=100, raised_amount=99, creator=self.user)
+        backfill_project_index()
+
+    def titles(self, path="/api/projects/", **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [p["title"] for p in response.json()["results"]]
+
+    def test_sorts(self):
+        self.assertEqual(self.titles("/api/projects/films/"), ["Film 0", "Film 1", "Film 2", "Film 3"])
+        self.assertEqual(self.titles("/api/projects/films/", sort="most_funded"), ["Film 3", "Film 1", "Film 2", "Film 0"])
+        # fully funded Film 2 is excluded; Art 0 is at 99%
+        self.assertEqual(self.titles(sort="closest_to_goal"), ["Art 0", "Film 1", "Film 3", "Film 0"])
+
+    def test_filters(self):
+        self.assertEqual(self.titles(category="art"), ["Art 0"])
+        self.assertEqual(self.titles("/api/projects/films/", creator="other"), ["Film 3"])
+        self.assertEqual(self.titles("/api/projects/films/", min_goal="500", max_goal="1000"), ["Film 0", "Film 1"])
+        self.assertEqual(self.titles(min_funded="50", max_funded="95", sort="most_funded"), ["Film 3", "Film 1"])
+        self.assertEqual(self.client.get("/api/projects/", {"min_goal": "lots"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/projects/", {"sort": "cheapest"}).status_code, 400)
+        for value in ("nan", "inf", "-Infinity", "half"):
+            self.assertEqual(self.client.get("/api/projects/", {"min_funded": value}).status_code, 400, value)
+
+    def test_zero_goal_rows_do_not_break_funded_sorts(self):
+        # Rows from before the goal validator existed.
+        film = FilmProject.objects.get(title="Film 0")
+        FilmProject.objects.filter(pk=film.pk).update(goal_amount=0)
+        ProjectIndex.objects.filter(category="film", project_id=film.pk).update(goal_amount=0)
+        self.assertEqual(self.titles(sort="closest_to_goal"), ["Art 0", "Film 1", "Film 3"])
+        self.assertEqual(self.titles(min_funded="0", sort="most_funded"), ["Film 3", "Film 1", "Film 2", "Art 0"])
+
+    def test_cursor_follows_the_sort(self):
+        first = self.client.get("/api/projects/", {"sort": "closest_to_goal", "limit": 2}).json()
+        rest = self.client.get(
+            "/api/projects/", {"sort": "closest_to_goal", "limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        self.assertEqual([p["title"] for p in first["results"] + rest["results"]], ["Art 0", "Film 1", "Film 3", "Film 0"])
+        self.assertIsNone(rest["next_cursor"])
+        response = self.client.get("/api/projects/", {"sort": "newest", "cursor": first["next_cursor"]})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProjectIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.other = User.objects.create_user("other", "other@example.com", "password123")
+
+    def test_update_and_delete_views_keep_index_in_sync(self):
+        film = make_projects(self.user, 1)[0]
+        response = self.client.put(
+            f"/api/projects/my/film/{film.id}/update/",
+            {"title": "Renamed", "goal_amount": "2500.00"},
+            content_type="application/json",
+            **auth_header(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        row = ProjectIndex.objects.get(unique_id=f"film-{film.id}")
+        self.assertEqual((row.title, str(row.goal_amount)), ("Renamed", "2500.00"))
+
+        response = self.client.delete(f"/api/projects/my/film/{film.id}/delete/", **auth_header(self.user))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ProjectIndex.objects.filter(unique_id=f"film-{film.id}").exists())
+
+    def test_my_projects_only_lists_own_projects(self):
+        make_projects(self.user, 2)
+        make_projects(self.other, 1)
+        response = self.client.get("/api/projects/my/", **auth_header(self.other))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 3)
+        self.assertEqual({p["creator_name"] for p in response.json()["results"]}, {"other"})
+
+    def test_backfill_is_idempotent_and_drops_stale_rows(self):
+        make_projects(self.user, 2)
+        ArtProject.objects.filter(title="Art 0").delete()
+        call_command("backfill_project_index", stdout=StringIO())
+        call_command("backfill_project_index", stdout=StringIO())
+        self.assertEqual(ProjectIndex.objects.count(), 5)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.projects = make_projects(self.user, 1)
+
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual(self.client.get("/api/projects/films/")["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/projects/films/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_writes_invalidate_only_dependent_categories(self):
+        music = self.projects[1]
+        for path in ("/api/projects/films/", "/api/projects/music/", f"/api/projects/music/{music.id}/"):
+            self.client.get(path)
+        AudioSample.objects.create(project=music, file="music_samples/other.mp3")
+
+        self.assertEqual(self.client.get("/api/projects/films/")["X-Cache"], "HIT")
+        response = self.client.get(f"/api/projects/music/{music.id}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["audio_samples"]), 2)
+
+    def test_feed_is_invalidated_by_new_projects(self):
+        self.client.get("/api/projects/")
+        make_projects(self.user, 1)
+        response = self.client.get("/api/projects/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 6)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        make_projects(self.user, 3)
+
+    def test_only_changed_projects_are_reserialized(self):
+        self.client.get("/api/projects/music/")
+        changed = MusicProject.objects.get(title="Music 1")
+        changed.title = "Music 1 (remastered)"
+        changed.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/projects/music/")
+        self.assertIn("Music 1 (remastered)", [p["title"] for p in response.json()["results"]])
+        # index page, stamps, the one stale project, its prefetched audio samples
+        self.assertEqual(len(queries), 4)
+        self.assertIn(f"IN ({changed.pk})", queries[2]["sql"])
+
+    def test_new_media_moves_the_parent_stamp(self):
+        art = ArtProject.objects.get(title="Art 0")
+        old_key = fragment_key("art", art.pk, art.updated_at)
+        ArtworkImage.objects.create(project=art, image="artworks/new.png")
+        art.refresh_from_db()
+        self.assertNotEqual(fragment_key("art", art.pk, art.updated_at), old_key)
+        response = self.client.get(f"/api/projects/art/{art.id}/")
+        self.assertEqual(len(response.json()["artwork_images"]), 2)
+
+
+def verify_payload(payment):
+    signature = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        f"{payment.razorpay_order_id}|pay_{payment.id}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return {
+        "razorpay_order_id": payment.razorpay_order_id,
+        "razorpay_payment_id": f"pay_{payment.id}",
+        "razorpay_signature": signature,
+        "payment_id": payment.id,
+    }
+
+
+def webhook_body(payment, event="payment.captured"):
+    entity = {"id": f"pay_{payment.id}", "order_id": payment.razorpay_order_id, "amount": int(payment.amount * 100)}
+    if event == "refund.processed":
+        return json.dumps({"event": event, "payload": {"refund": {"entity": {"payment_id": f"pay_{payment.id}"}}}}).encode()
+    return json.dumps({"event": event, "payload": {"payment": {"entity": entity}}}).encode()
+
+
+def webhook_signature(body):
+    return hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def post_webhook(client, body, event_id=None):
+    extra = {"HTTP_X_RAZORPAY_EVENT_ID": event_id} if event_id else {}
+    return client.post("/api/projects/payments/webhook/", body, content_type="application/json",
+                       HTTP_X_RAZORPAY_SIGNATURE=webhook_signature(body), **extra)
+
+
+class PaymentSettlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.film = make_projects(self.user, 1)[0]
+        self.payment = Payment.objects.create(
+            project_category="film", project_id=self.film.id, amount=Decimal("250.00"), razorpay_order_id="order_1"
+        )
+
+    def test_settling_twice_credits_once_and_refund_debits(self):
+        self.assertTrue(settle_payment(self.payment.id))
+        self.assertFalse(settle_payment(self.payment.id))
+        self.film.refresh_from_db()
+        self.assertEqual(self.film.raised_amount, Decimal("250.00"))
+        self.assertEqual(ProjectIndex.objects.get(unique_id=f"film-{self.film.id}").raised_amount, Decimal("250.00"))
+
+        self.assertTrue(refund_payment(self.payment.id))
+        self.assertFalse(refund_payment(self.payment.id))
+        self.film.refresh_from_db()
+        self.assertEqual(self.film.raised_amount, Decimal("0.00"))
+
+    def test_verify_rejects_payment_from_another_order(self):
+        other = Payment.objects.create(project_category="film", project_id=self.film.id, amount=100, razorpay_order_id="order_2")
+        payload = verify_payload(other)
+        payload["payment_id"] = self.payment.id
+        self.client.post("/api/projects/payments/verify/", payload, content_type="application/json")
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "created")
+
+    def test_refund_webhook_and_reconcile_command(self):
+        post_webhook(self.client, webhook_body(self.payment))
+        post_webhook(self.client, webhook_body(self.payment, event="refund.processed"))
+        drain_batch()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "refunded")
+
+        Payment.objects.filter(pk=self.payment.pk).update(status="paid")
+        call_command("reconcile_raised_amounts", stdout=StringIO())
+        self.film.refresh_from_db()
+        self.assertEqual(self.film.raised_amount, Decimal("250.00"))
+
+
+class ConcurrentSettlementTests(TransactionTestCase):
+    """Hundreds of racing verifies and webhooks must credit each payment once."""
+
+    def test_concurrent_verifies_and_webhooks_credit_exactly_once(self):
+        user = User.objects.create_user("creator", "creator@example.com", "password123")
+        film = make_projects(user, 1)[0]
+        payments = [
+            Payment.objects.create(project_category="film", project_id=film.id, amount=Decimal("10.00"),
+                                   razorpay_order_id=f"order_{i}")
+            for i in range(60)
+        ]
+
+        def deliver(job):
+            kind, payment = job
+            client = Client()
+            try:
+                if kind == "verify":
+                    return client.post("/api/projects/payments/verify/", verify_payload(payment),
+                                       content_type="application/json").status_code
+                if kind == "drain":
+                    drain_batch(batch_size=20)
+                    return 200
+                return post_webhook(client, webhook_body(payment)).status_code
+            finally:
+                connection.close()
+
+        jobs = [(kind, p) for p in payments for kind in ("verify", "webhook", "drain", "verify", "webhook")]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            codes = list(pool.map(deliver, jobs))
+        while drain_batch()["processed"]:
+            pass
+
+        self.assertEqual(set(codes), {200})
+        film.refresh_from_db()
+        self.assertEqual(film.raised_amount, Decimal("600.00"))
+        self.assertEqual(Payment.objects.filter(status="paid").count(), 60)
+
+
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.film = make_projects(self.user, 1)[0]
+        self.payment = Payment.objects.create(
+            project_category="film", project_id=self.film.id, amount=Decimal("40.00"), razorpay_order_id="order_1"
+        )
+
+    def test_webhook_only_enqueues_and_drops_duplicates(self):
+        body = webhook_body(self.payment)
+        for _ in range(3):
+            self.assertEqual(post_webhook(self.client, body, event_id="evt_1").status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "created")
+
+        out = StringIO()
+        call_command("process_webhook_inbox", "--once", stdout=out)
+        self.assertIn("processed=1 failed=0", out.getvalue())
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+
+    def test_bad_signature_is_not_stored(self):
+        response = self.client.post("/api/projects/payments/webhook/", b"{}", content_type="application/json",
+                                    HTTP_X_RAZORPAY_SIGNATURE="nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_failing_event_is_recorded_without_blocking_the_batch(self):
+        WebhookEvent.objects.create(event_id="evt_bad", body="not json")
+        post_webhook(self.client, webhook_body(self.payment), event_id="evt_good")
+        metrics = drain_batch()
+        self.assertEqual((metrics["processed"], metrics["failed"]), (1, 1))
+        bad = WebhookEvent.objects.get(event_id="evt_bad")
+        self.assertEqual((bad.attempts, bad.processed_at), (1, None))
+        self.assertIn("JSONDecodeError", bad.error)
+
+
+@override_settings(PAYMENT_GATEWAY_BACKEND="fake")
+class PaymentGatewayTests(TestCase):
+    def test_create_order_uses_one_shared_gateway(self):
+        for _ in range(3):
+            response = self.client.post("/api/projects/payments/create-order/",
+                                        {"amount": "99.50", "category": "film", "project_id": 1},
+                                        content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["order"]["amount"], 9950)
+        self.assertIs(get_gateway(), get_gateway())
+        self.assertEqual(get_gateway().metrics()["create_order"]["count"], 3)
+        order_id = response.json()["order"]["id"]
+        self.assertEqual(Payment.objects.get(pk=response.json()["payment_id"]).razorpay_order_id, order_id)
+
+    def test_fake_gateway_checks_signatures_like_razorpay(self):
+        payment = Payment.objects.create(amount=10, razorpay_order_id="order_x")
+        payload = verify_payload(payment)
+        self.assertEqual(self.client.post("/api/projects/payments/verify/", payload,
+                                          content_type="application/json").status_code, 200)
+        payload["razorpay_signature"] = "0" * 64
+        self.assertEqual(self.client.post("/api/projects/payments/verify/", payload,
+                                          content_type="application/json").status_code, 400)
+
+    def test_latency_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in [1] * 90 + [300] * 10:
+            histogram.observe(ms)
+        self.assertEqual((histogram.percentile(0.5), histogram.percentile(0.95)), (5, 500))
+
+
+@override_settings(PAYMENT_GATEWAY_BACKEND="fake", FAKE_GATEWAY_LATENCY_MS=200)
+class IdempotencyKeyTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("donor", "donor@example.com", "password123")
+
+    def create_order(self, key, amount="50.00", user=None):
+        headers = auth_header(user or self.user) if user is not False else {}
+        try:
+            return Client().post("/api/projects/payments/create-order/",
+                                 {"amount": amount, "category": "film", "project_id": 1},
+                                 content_type="application/json", HTTP_IDEMPOTENCY_KEY=key, **headers)
+        finally:
+            connection.close()
+
+    def gateway_calls(self):
+        return get_gateway().metrics().get("create_order", {}).get("count", 0)
+
+    def test_concurrent_retries_make_one_gateway_call(self):
+        calls_before = self.gateway_calls()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: self.create_order("checkout-1"), range(8)))
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(len({r.json()["payment_id"] for r in responses}), 1)
+        self.assertEqual(sum(r.has_header("Idempotent-Replayed") for r in responses), 7)
+        self.assertEqual(self.gateway_calls() - calls_before, 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_reused_key_with_other_payload_is_rejected(self):
+        self.assertEqual(self.create_order("checkout-2").status_code, 200)
+        self.assertEqual(self.create_order("checkout-2", amount="75.00").status_code, 422)
+        self.assertEqual(self.create_order("checkout-3").status_code, 200)
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def test_keys_are_scoped_per_user_and_need_authentication(self):
+        other = User.objects.create_user("other", "other@example.com", "password123")
+        first = self.create_order("checkout-4")
+        second = self.create_order("checkout-4", user=other)
+        self.assertNotEqual(first.json()["payment_id"], second.json()["payment_id"])
+        self.assertFalse(second.has_header("Idempotent-Replayed"))
+        self.assertEqual(self.create_order("checkout-4", user=False).status_code, 401)
+        self.assertEqual(Payment.objects.count(), 2)
+
+
+class IdempotencyStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_result_is_replayed_by_another_process(self):
+        IdempotencyStore(max_entries=10, ttl=60).run("k", "f", lambda: "first")
+        other_worker = IdempotencyStore(max_entries=10, ttl=60)
+        self.assertEqual(other_worker.run("k", "f", lambda: "second"), ("first", True))
+        with self.assertRaises(IdempotencyConflict):
+            other_worker.run("k", "g", lambda: "second")
+
+    def test_waits_for_another_process_running_the_key(self):
+        cache.add("idempotency:k:inflight", "f")
+        store = IdempotencyStore(max_entries=10, ttl=60, inflight_timeout=0.1)
+        with self.assertRaises(IdempotencyBusy):
+            store.run("k", "f", lambda: "duplicate")
+        cache.delete("idempotency:k:inflight")
+        self.assertEqual(store.run("k", "f", lambda: "done"), ("done", False))
+
+    def test_entries_expire_and_store_stays_bounded(self):
+        store = IdempotencyStore(max_entries=2, ttl=0.05)
+        calls = []
+        for key in ("a", "b", "c"):
+            store.run(key, "", lambda: calls.append(key) or key)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.run("c", "", lambda: "again"), ("c", True))
+        time.sleep(0.06)
+        self.assertEqual(store.run("c", "", lambda: "again"), ("again", False))
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        assert_no_scans(self)
+
+    def test_checker_flags_unindexed_filters(self):
+        problems = find_scans({"by amount": Payment.objects.filter(amount=10)})
+        self.assertIn("by amount", problems)
+
+
+class ProjectSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+
+    def search(self, **params):
+        return self.client.get("/api/projects/search/", params)
+
+    def test_prefix_terms_match_and_title_ranks_first(self):
+        FilmProject.objects.create(
+            title="Quiet harbour", description="A documentary about lighthouses", goal_amount=1000,
+            creator=self.user, poster_image="film_posters/poster.png",
+        )
+        ArtProject.objects.create(title="Lighthouse sketches", description="Charcoal", goal_amount=500, creator=self.user)
+        MusicProject.objects.create(
+            title="Sea shanties", description="Choir", goal_amount=800, creator=self.user,
+            album_cover="music_covers/cover.png",
+        )
+        response = self.search(q="lightho")
+        self.assertEqual(response.status_code, 200)
+        titles = [p["title"] for p in response.json()["results"]]
+        self.assertEqual(titles, ["Lighthouse sketches", "Quiet harbour"])
+        self.assertEqual([p["title"] for p in self.search(q="creat sea").json()["results"]], ["Sea shanties"])
+
+    def test_cursor_pages_cover_every_hit_once(self):
+        make_projects(self.user, 4)
+        seen, cursor = [], None
+        while True:
+            params = {"q": "d", "limit": 5}
+            if cursor:
+                params["cursor"] = cursor
+            body = self.search(**params).json()
+            seen.extend(p["unique_id"] for p in body["results"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len(set(seen)), 12)
+
+    def test_edits_and_deletes_update_the_index(self):
+        art = ArtProject.objects.create(title="Old name", description="x", goal_amount=500, creator=self.user)
+        art.title = "Renamed"
+        art.save()
+        self.assertEqual(self.search(q="old").json()["results"], [])
+        self.assertEqual(len(self.search(q="renamed").json()["results"]), 1)
+        art.delete()
+        self.assertEqual(self.search(q="renamed").json()["results"], [])
+
+    def test_rebuild_command_restores_missing_documents(self):
+        make_projects(self.user, 2)
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM accounts_project_search")
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.search(q="film").json()["results"]), 2)
+
+    def test_empty_query_and_bad_cursor_are_rejected(self):
+        self.assertEqual(self.search(q="  ").status_code, 400)
+        self.assertEqual(self.search(q="film", cursor="!!").status_code, 400)
+
+
+class CountingHasher(MD5PasswordHasher):
+    calls = 0
+
+    def encode(self, password, salt):
+        CountingHasher.calls += 1
+        return super().encode(password, salt)
+
+
+@override_settings(PASSWORD_HASHERS=["accounts.tests.CountingHasher"])
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("backer", "backer@example.com", "password123")
+
+    def login(self, login, password="password123"):
+        CountingHasher.calls = 0
+        return self.client.post("/api/projects/login/", {"username": login, "password": password})
+
+    def test_username_and_email_logins_hash_once(self):
+        for login in ("backer", "backer@example.com"):
+            response = self.login(login)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["username"], "backer")
+            self.assertEqual(CountingHasher.calls, 1)
+
+    def test_failed_logins_cost_one_hash(self):
+        for login, password in (("backer@example.com", "wrong-password"), ("nobody@example.com", "password123")):
+            self.assertEqual(self.login(login, password).status_code, 401)
+            self.assertEqual(CountingHasher.calls, 1)
+
+    def test_shared_email_is_not_a_login(self):
+        User.objects.create_user("twin", "backer@example.com", "password123")
+        self.assertEqual(self.login("backer@example.com").status_code, 401)
+        self.assertEqual(self.login("twin").status_code, 200)
+
+
+class AccountWriteTests(TestCase):
+    def register(self, role):
+        return self.client.post("/api/projects/register/", {
+            "username": f"new_{role}", "email": f"{role}@example.com", "password": "password123", "role": role,
+        })
+
+    def test_register_writes_profile_once_with_the_chosen_role(self):
+        # username check, savepoint, user insert, profile insert, release, outstanding token
+        for role in ("backer", "creator"):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.register(role).status_code, 201)
+            self.assertEqual(len(queries), 6)
+            self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+            self.assertEqual(User.objects.get(username=f"new_{role}").profile.role, role)
+
+    def test_login_and_user_saves_do_not_touch_the_profile(self):
+        user = User.objects.create_user("backer", "backer@example.com", "password123")
+        # user with its profile, outstanding token
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/projects/login/", {"username": "backer", "password": "password123"})
+        self.assertEqual(response.json()["role"], "backer")
+        with CaptureQueriesContext(connection) as queries:
+            user.last_login = timezone.now()
+            user.save(update_fields=["last_login"])
+        self.assertFalse([q for q in queries if "accounts_profile" in q["sql"]])
+
+
+class CachedPrincipalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("backer", "backer@example.com", "password123")
+        self.headers = auth_header(self.user)
+
+    def me(self):
+        return self.client.get("/api/projects/me/", **self.headers)
+
+    def test_repeat_requests_skip_identity_queries(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.me()
+        self.assertEqual(response.json()["profile"]["role"], "backer")
+
+    def test_profile_and_user_changes_are_seen_immediately(self):
+        self.me()
+        self.user.profile.role = "creator"
+        self.user.profile.save()
+        self.assertEqual(self.me().json()["profile"]["role"], "creator")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_logout_drops_the_cached_principal(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.me()
+        before = principal_stats()["database"]
+        response = self.client.post("/api/projects/logout/", {"refresh": str(refresh)}, **self.headers)
+        self.assertEqual(response.status_code, 205)
+        self.me()
+        self.assertEqual(principal_stats()["database"] - before, 1)
+
+
+    @override_settings(AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES=2, AUTH_PRINCIPAL_LOCAL_TTL=5)
+    def test_local_principals_are_bounded_and_expired_ones_dropped(self):
+        users = [self.user] + [User.objects.create_user(f"user{i}", password="password123") for i in range(2)]
+        clock = [1000.0]
+        with mock.patch("accounts.authentication.time.monotonic", lambda: clock[0]):
+            for user in users:
+                load_principal(User, user.pk)
+            self.assertEqual(list(principals._local), [str(users[1].pk), str(users[2].pk)])
+            clock[0] += 10
+            load_principal(User, self.user.pk)
+            self.assertEqual(list(principals._local), [str(self.user.pk)])
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("backer", "backer@example.com", "password123")
+
+    def refresh(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": str(token)})
+
+    def test_rotated_token_is_rejected_and_fresh_ones_skip_the_database(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+        stats = get_blacklist_filter().stats
+        checks, filtered = stats["checks"], stats["filtered"]
+        self.assertEqual(self.refresh(response.json()["refresh"]).status_code, 200)
+        self.assertEqual((stats["checks"] - checks, stats["filtered"] - filtered), (1, 1))
+
+    def test_prune_removes_only_expired_rows_in_batches(self):
+        expired = []
+        for _ in range(5):
+            token = RefreshToken.for_user(self.user)
+            token.blacklist()
+            expired.append(token["jti"])
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(days=1))
+        live = RefreshToken.for_user(self.user)
+
+        out = StringIO()
+        call_command("prune_token_blacklist", batch_size=2, pause=0, stdout=out)
+        self.assertIn("Pruned 5 expired tokens in 3 batches", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_rows_committed_out_of_id_order_are_caught_up(self):
+        first, second = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        outstanding = {t.jti: t for t in OutstandingToken.objects.filter(jti__in=[first["jti"], second["jti"]])}
+        next_id = (BlacklistedToken.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+        blacklist = BlacklistFilter()
+        blacklist.sync()
+        # id next_id + 1 commits first, as a concurrent rotation can on PostgreSQL...
+        BlacklistedToken.objects.create(id=next_id + 1, token=outstanding[second["jti"]])
+        bump_blacklist_version()
+        self.assertTrue(blacklist.is_blacklisted(second["jti"]))
+        self.assertFalse(blacklist.is_blacklisted(first["jti"]))
+        # ...and the lower id becomes visible afterwards.
+        BlacklistedToken.objects.create(id=next_id, token=outstanding[first["jti"]])
+        bump_blacklist_version()
+        self.assertTrue(blacklist.is_blacklisted(first["jti"]))
+        self.assertEqual(blacklist.stats["rebuilds"], 1)
+        self.assertEqual(blacklist.metrics()["filter_entries"], 2)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(ROOT_URLCONF="crowdfunding.urls_asgi")
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.projects = make_projects(self.user, 3)
+
+    async def test_async_endpoints_match_the_sync_views(self):
+        music = self.projects[1]
+        for path, params in (
+            ("/api/projects/", {"limit": 4}),
+            ("/api/projects/films/", {"sort": "most_funded"}),
+            (f"/api/projects/music/{music.id}/", {}),
+        ):
+            with override_settings(ROOT_URLCONF="crowdfunding.urls"):
+                expected = (await self.async_client.get(path, params)).json()
+            cache.clear()
+            response = await self.async_client.get(path, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(response.json(), expected)
+
+        self.assertEqual((await self.async_client.get("/api/projects/", {"sort": "oldest"})).status_code, 400)
+        self.assertEqual((await self.async_client.get("/api/projects/film/999/")).status_code, 404)
+        self.assertEqual((await self.async_client.post("/api/projects/films/")).status_code, 405)
+
+    async def test_me_resolves_the_cached_principal(self):
+        header = (await sync_to_async(auth_header)(self.user))["HTTP_AUTHORIZATION"]
+        response = await self.async_client.get("/api/projects/me/", headers={"Authorization": header})
+        self.assertEqual(response.json()["user"]["username"], "creator")
+        self.assertEqual(response.json()["profile"]["role"], "backer")
+        self.assertEqual((await self.async_client.get("/api/projects/me/")).status_code, 401)
+        bad = await self.async_client.get("/api/projects/me/", headers={"Authorization": "Bearer nope"})
+        self.assertEqual(bad.status_code, 401)
+        self.assertEqual(bad.json()["code"], "token_not_valid")
+
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+
+    def test_project_reads_go_to_one_replica_per_request(self):
+        self.assertIsNone(self.router.db_for_read(FilmProject))  # outside a request
+        with replica_routing(RequestFactory().get("/api/projects/")):
+            replica = self.router.db_for_read(FilmProject)
+            self.assertIn(replica, ["replica1", "replica2"])
+            self.assertEqual(self.router.db_for_read(ProjectIndex), replica)
+            self.assertEqual(self.router.db_for_read(ArtworkImage), replica)
+            self.assertIsNone(self.router.db_for_read(Payment))
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_writes_and_unsafe_requests_read_the_primary(self):
+        with replica_routing(RequestFactory().get("/api/projects/")):
+            self.assertEqual(self.router.db_for_write(Payment), "default")
+            self.assertEqual(self.router.db_for_read(FilmProject), "default")
+        with replica_routing(RequestFactory().put("/api/projects/my/film/1/update/")):
+            self.assertEqual(self.router.db_for_read(FilmProject), "default")
+
+    def test_pinned_user_reads_the_primary(self):
+        request = RequestFactory().get("/api/projects/")
+        request.user = self.user
+        pin_user(self.user.pk)
+        with replica_routing(request):
+            self.assertEqual(self.router.db_for_read(FilmProject), "default")
+        cache.clear()
+        with replica_routing(RequestFactory().get("/api/projects/")) as state:
+            state.request.user = self.user
+            self.assertIn(self.router.db_for_read(FilmProject), ["replica1", "replica2"])
+
+    @override_settings(DATABASE_REPLICAS=["default"])
+    def test_middleware_pins_users_after_a_write(self):
+        film = make_projects(self.user, 1)[0]
+        self.client.get("/api/projects/", **auth_header(self.user))
+        self.assertIsNone(cache.get(f"db:pinned:{self.user.pk}"))
+        response = self.client.put(
+            f"/api/projects/my/film/{film.id}/update/",
+            {"title": "Renamed"}, content_type="application/json", **auth_header(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache.get(f"db:pinned:{self.user.pk}"), 1)
+
+
+
+class LaggingReplicaTests(TransactionTestCase):
+    """Reads against a real second SQLite database that only has the rows
+    ``replicate`` copied, so the primary and the replica disagree."""
+
+    # Resolved in setUpClass, once "lagging" exists (the runner only sets up "default").
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        cls.replica_path = os.path.join(cls.replica_dir.name, "replica.sqlite3")
+        connections.settings["lagging"] = {**connections.settings["default"], "NAME": cls.replica_path}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["lagging"].close()
+        del connections.settings["lagging"]
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.film = make_projects(self.user, 1)[0]
+        self.replicate()
+        override = override_settings(DATABASE_REPLICAS=["lagging"])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def replicate(self):
+        """Copy the primary, as it is now, onto the replica."""
+        connections["lagging"].close()
+        replica = sqlite3.connect(self.replica_path)
+        try:
+            connections["default"].connection.backup(replica)
+        finally:
+            replica.close()
+
+    def rename_on_the_primary(self):
+        response = self.client.put(
+            f"/api/projects/my/film/{self.film.id}/update/",
+            {"title": "Renamed"}, content_type="application/json", **auth_header(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_pinned_reads_hit_the_primary_and_others_the_replica(self):
+        FilmProject.objects.filter(pk=self.film.pk).update(title="Renamed")
+        token = auth_header(self.user)["HTTP_AUTHORIZATION"]
+        with replica_routing(RequestFactory().get("/api/projects/", HTTP_AUTHORIZATION=token)):
+            self.assertEqual(FilmProject.objects.get(pk=self.film.pk).title, "Film 0")
+        pin_user(self.user.pk)
+        # No request.user (as in async views): the pin is found from the token.
+        with replica_routing(RequestFactory().get("/api/projects/", HTTP_AUTHORIZATION=token)):
+            self.assertEqual(FilmProject.objects.get(pk=self.film.pk).title, "Renamed")
+        with replica_routing(RequestFactory().get("/api/projects/")):
+            self.assertEqual(FilmProject.objects.get(pk=self.film.pk).title, "Film 0")
+
+    def test_anonymous_misses_are_computed_on_the_replica_and_kept_briefly(self):
+        path = f"/api/projects/film/{self.film.id}/"
+        FilmProject.objects.filter(pk=self.film.pk).update(title="Renamed")
+        bump_version("film")
+        first, second = self.client.get(path), self.client.get(path)
+        self.assertEqual((first["X-Cache"], first.json()["title"]), ("MISS", "Film 0"))
+        self.assertEqual((second["X-Cache"], second.json()["title"]), ("HIT", "Film 0"))
+        # Replica-computed entries live no longer than the assumed replica lag.
+        cache.clear()
+        with override_settings(DB_REPLICA_STICKY_SECONDS=0):
+            self.assertEqual(self.client.get(path)["X-Cache"], "MISS")
+            self.assertEqual(self.client.get(path)["X-Cache"], "MISS")
+
+    def test_writer_reads_their_write_after_an_anonymous_read(self):
+        path = f"/api/projects/film/{self.film.id}/"
+        self.rename_on_the_primary()
+        anonymous = self.client.get(path)
+        self.assertEqual((anonymous["X-Cache"], anonymous.json()["title"]), ("MISS", "Film 0"))
+        writer = self.client.get(path, **auth_header(self.user))
+        self.assertEqual((writer["X-Cache"], writer.json()["title"]), ("BYPASS", "Renamed"))
+
+    @override_settings(ROOT_URLCONF="crowdfunding.urls_asgi")
+    async def test_async_views_pin_by_the_token_subject(self):
+        path = f"/api/projects/film/{self.film.id}/"
+        await sync_to_async(self.rename_on_the_primary)()
+        anonymous = await self.async_client.get(path)
+        self.assertEqual((anonymous["X-Cache"], anonymous.json()["title"]), ("MISS", "Film 0"))
+        header = (await sync_to_async(auth_header)(self.user))["HTTP_AUTHORIZATION"]
+        writer = await self.async_client.get(path, headers={"Authorization": header})
+        self.assertEqual((writer["X-Cache"], writer.json()["title"]), ("BYPASS", "Renamed"))
+
+
+class SeedDatasetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+
+    def test_seeded_projects_match_their_payments_and_every_route_is_benchmarked(self):
+        with override_settings(MEDIA_ROOT=self.media.name, PASSWORD_HASHERS=["accounts.tests.CountingHasher"]):
+            call_command("seed_dataset", users=10, projects=4, payments=40, stdout=StringIO())
+            self.assertEqual(ProjectIndex.objects.count(), 12)
+            self.assertGreater(AudioSample.objects.count(), 0)
+            self.assertGreater(ArtworkImage.objects.count(), 0)
+            for row in ProjectIndex.objects.all():
+                paid = Payment.objects.filter(project_category=row.category, project_id=row.project_id, status="paid")
+                self.assertEqual(row.raised_amount, sum((p.amount for p in paid), Decimal(0)))
+
+            report_path = os.path.join(self.media.name, "report.json")
+            call_command("benchmark_endpoints", iterations=1, output=report_path, stdout=StringIO())
+        with open(report_path) as f:
+            routes = json.load(f)["routes"]
+        self.assertEqual(len(routes), 23)
+        for name, result in routes.items():
+            self.assertNotIn("skipped", result, name)
+            self.assertTrue(all(int(code) < 400 for code in result["statuses"]), (name, result["statuses"]))
+        self.assertEqual(ProjectIndex.objects.count(), 12)  # benchmark writes were rolled back
+
+
+
+# Queries per request with cold caches; raise a budget only with a reason.
+ENDPOINT_QUERY_BUDGETS = {
+    "/api/projects/": 9,  # feed page, then stamps + projects per category, media prefetches
+    "/api/projects/films/": 3,
+    "/api/projects/music/?sort=most_funded": 4,
+    "/api/projects/art/?sort=closest_to_goal": 4,
+    "/api/projects/search/?q=film": 3,
+    "/api/projects/film/{film}/": 2,
+    "/api/projects/my/": 10,  # the principal, then the feed
+    "/api/projects/me/": 1,
+}
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.projects = make_projects(self.user, 5)
+        self.headers = auth_header(self.user)
+
+    @override_settings(AUTH_PRINCIPAL_LOCAL_TTL=0)
+    def test_endpoints_stay_within_their_query_budgets(self):
+        for path, budget in ENDPOINT_QUERY_BUDGETS.items():
+            cache.clear()
+            headers = self.headers if "/my/" in path or "/me/" in path else {}
+            with self.subTest(path=path), query_budget(budget, max_duplicates=0):
+                response = self.client.get(path.format(film=self.projects[0].pk), **headers)
+                self.assertEqual(response.status_code, 200)
+
+    def test_budget_failure_lists_the_statements(self):
+        with self.assertRaisesRegex(AssertionError, r"2 queries, over the budget of 1:\n2x SELECT"):
+            with query_budget(1):
+                list(User.objects.filter(pk=self.user.pk))
+                list(User.objects.filter(pk=self.user.pk))
+        with self.assertRaisesRegex(AssertionError, "1 duplicate queries"):
+            with query_budget(5, max_duplicates=0):
+                list(User.objects.filter(pk=self.user.pk))
+                list(User.objects.filter(pk=self.user.pk))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_requests_are_logged_and_timed(self):
+        with self.assertLogs("accounts.requests", "INFO") as logs:
+            response = self.client.get("/api/projects/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, app;dur=')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/api/projects/")
+        self.assertEqual(record["response_bytes"], len(response.content))
+        self.assertGreater(record["db_queries"], 0)
+        self.assertEqual(logs.records[0].levelname, "INFO")
+
+        with self.assertLogs("accounts.requests", "WARNING") as logs, \
+                override_settings(REQUEST_REPEATED_QUERY_THRESHOLD=1):
+            self.client.get("/api/projects/", {"limit": 5})
+        self.assertEqual(json.loads(logs.records[0].getMessage())["repeated_queries"][0]["count"], 1)
+
+
+
+def png_upload(name, size):
+    buffer = BytesIO()
+    PILImage.new("RGB", size, (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(THUMBNAIL_WORKERS=0, THUMBNAIL_WIDTHS=[320, 640, 1280], THUMBNAIL_FORMATS=["webp", "jpeg"],
+                   MEDIA_ORIGIN="http://127.0.0.1:8000")
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+
+    def test_upload_gets_content_hashed_thumbnails_below_its_width(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            film = FilmProject.objects.create(title="F", description="d", goal_amount=1000, creator=self.user,
+                                              poster_image=png_upload("poster.png", (1000, 600)))
+        film.refresh_from_db()
+        data = self.client.get(f"/api/projects/film/{film.pk}/").json()
+        self.assertEqual([t["width"] for t in data["poster_image_thumbnails"]["webp"]], [320, 640])
+        self.assertIn("640w", data["poster_image_srcset"]["jpeg"])
+        # Absolute: the SPA runs on its own origin and srcset resolves against the page.
+        for candidate in data["poster_image_srcset"]["webp"].split(", "):
+            self.assertRegex(candidate, r"^http://127\.0\.0\.1:8000/media/\S+ \d+w$")
+        digest = film.poster_image_thumbnails["sha256"]
+        name = derivative_name(film.poster_image.name, digest, 320, "webp")
+        self.assertEqual(film.poster_image_thumbnails["webp"]["320"], name)
+        self.assertRegex(name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/thumbs/[0-9a-f]{64}\.[0-9a-f]{16}\.320w\.webp$")
+        with PILImage.open(os.path.join(self.media.name, name)) as thumb:
+            self.assertEqual(thumb.size, (320, 192))
+
+        # A replaced image hides the old thumbnails until its own are rendered.
+        film.poster_image = png_upload("other.png", (200, 100))
+        with self.captureOnCommitCallbacks() as callbacks:
+            film.save()
+        cache.clear()
+        self.assertEqual(self.client.get(f"/api/projects/film/{film.pk}/").json()["poster_image_thumbnails"], {})
+        callbacks[0]()
+        cache.clear()
+        data = self.client.get(f"/api/projects/film/{film.pk}/").json()
+        self.assertEqual([t["width"] for t in data["poster_image_thumbnails"]["jpeg"]], [200])
+
+    def test_unreadable_image_is_saved_without_thumbnails(self):
+        with self.assertLogs("accounts.thumbnails", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            film = FilmProject.objects.create(title="F", description="d", goal_amount=1000, creator=self.user,
+                                              poster_image=SimpleUploadedFile("bad.png", b"not an image"))
+        film.refresh_from_db()
+        self.assertEqual(film.poster_image_thumbnails, {})
+
+    def test_backfill_renders_shared_images_once_and_resumes(self):
+        art = ArtProject.objects.create(title="A", description="d", goal_amount=1000, creator=self.user)
+        with self.captureOnCommitCallbacks(execute=False):
+            image = ArtworkImage.objects.create(project=art, image=png_upload("art.png", (800, 800)))
+        ArtworkImage.objects.bulk_create([ArtworkImage(project=art, image=image.image.name) for _ in range(3)])
+        ArtworkImage.objects.create(project=art, image="artworks/missing.png")
+
+        out = StringIO()
+        call_command("generate_thumbnails", workers=1, stdout=out)
+        self.assertIn("Thumbnails for 4 rows from 1 images", out.getvalue())
+        self.assertIn("1 rows with missing files", out.getvalue())
+        self.assertEqual(len({tuple(sorted(i.image_thumbnails["webp"].items()))
+                              for i in ArtworkImage.objects.exclude(image="artworks/missing.png")}), 1)
+
+        out = StringIO()
+        call_command("generate_thumbnails", workers=1, stdout=out)
+        self.assertIn("Thumbnails for 0 rows from 0 images", out.getvalue())
+
+
+@override_settings(THUMBNAIL_WORKERS=0, UPLOAD_CHUNK_SIZE=1024)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name,
+                                           CHUNKED_UPLOAD_DIR=os.path.join(self.media.name, "parts"))
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.auth = auth_header(self.user)
+
+    def start(self, data, kind="artwork", sha256=None):
+        response = self.client.post("/api/projects/uploads/", {
+            "kind": kind, "filename": "../my art.png", "size": len(data),
+            "sha256": sha256 or hashlib.sha256(data).hexdigest(),
+        }, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def put(self, upload_id, data, start):
+        return self.client.put(
+            f"/api/projects/uploads/{upload_id}/", data[start:start + 1024], content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{min(start + 1024, len(data)) - 1}/{len(data)}", **self.auth,
+        )
+
+    def test_resume_waits_for_a_draining_chunk_and_completion_runs_once(self):
+        data = os.urandom(3000)
+        upload = ChunkedUpload.objects.get(token=self.start(data, kind="audio"))
+        uploads.append_chunk(upload, 0, 1000, BytesIO(data[:1000]))
+        outcome = []
+
+        def resume():
+            try:
+                outcome.append(uploads.append_chunk(upload, 1000, 3000, BytesIO(data[1000:])))
+            except uploads.OffsetMismatch as e:
+                outcome.append(e.received)
+
+        # A dropped request still draining on another worker holds the part file.
+        with open(uploads.part_path(upload), "ab") as draining:
+            locks.lock(draining, locks.LOCK_EX)
+            thread = threading.Thread(target=resume)
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            draining.write(data[1000:1500])
+            draining.flush()
+            locks.unlock(draining)
+        thread.join()
+        self.assertEqual(outcome, [1500])
+        uploads.append_chunk(upload, 1500, 3000, BytesIO(data[1500:]))
+
+        stale = ChunkedUpload.objects.get(pk=upload.pk)
+        self.assertEqual(uploads.complete_upload(upload).status, "complete")
+        self.assertEqual(uploads.complete_upload(stale).status, "complete")  # no part file left to remove
+
+    def test_resume_after_dropped_chunk_then_attach_in_one_insert(self):
+        buffer = BytesIO()
+        PILImage.effect_noise((64, 64), 80).save(buffer, "PNG")  # noise: several chunks
+        data = buffer.getvalue()
+        self.assertGreater(len(data), 2048)
+        upload_id = self.start(data)
+        self.assertEqual(self.put(upload_id, data, 0).json()["received"], 1024)
+
+        # The connection drops 100 bytes into the second chunk: those bytes are kept.
+        upload = ChunkedUpload.objects.get(token=upload_id)
+        uploads.append_chunk(upload, 1024, 2048, BytesIO(data[1024:1124]))
+        received = self.client.get(f"/api/projects/uploads/{upload_id}/", **self.auth).json()["received"]
+        self.assertEqual(received, 1124)
+        conflict = self.put(upload_id, data, 1024)
+        self.assertEqual((conflict.status_code, conflict.json()["received"]), (409, 1124))
+        while received < len(data):
+            received = self.put(upload_id, data, received).json()["received"]
+
+        done = self.client.post(f"/api/projects/uploads/{upload_id}/complete/", **self.auth).json()
+        self.assertEqual(done["status"], "complete")
+        upload.refresh_from_db()
+        self.assertEqual(upload.file.name, blob_name(hashlib.sha256(data).hexdigest(), ".png"))
+        with open(os.path.join(self.media.name, upload.file.name), "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(settings.CHUNKED_UPLOAD_DIR), [])
+
+        second = self.start(data)
+        self.put(second, data, 0)
+        self.assertEqual(self.client.post(f"/api/projects/uploads/{second}/complete/", **self.auth).status_code, 409)
+        for start in range(1024, len(data), 1024):
+            self.put(second, data, start)
+        self.client.post(f"/api/projects/uploads/{second}/complete/", **self.auth)
+
+        art = ArtProject.objects.create(title="A", description="d", goal_amount=1000, creator=self.user)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/projects/my/art/{art.pk}/media/", {"uploads": [upload_id, second]},
+                                        content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        inserts = [q["sql"] for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "accounts_artworkimage"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(art.artwork_images.count(), 2)
+        self.assertTrue(all(image.image_thumbnails for image in art.artwork_images.all()))
+        self.assertEqual(set(ChunkedUpload.objects.values_list("status", flat=True)), {"attached"})
+        again = self.client.post(f"/api/projects/my/art/{art.pk}/media/", {"uploads": [upload_id]},
+                                 content_type="application/json", **self.auth)
+        self.assertEqual(again.status_code, 400)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        data = os.urandom(1500)
+        upload_id = self.start(data, kind="audio", sha256="0" * 64)
+        self.put(upload_id, data, 0)
+        self.put(upload_id, data, 1024)
+        response = self.client.post(f"/api/projects/uploads/{upload_id}/complete/", **self.auth)
+        self.assertEqual((response.status_code, response.json()["received"]), (400, 0))
+        self.assertEqual(ChunkedUpload.objects.get(token=upload_id).status, "uploading")
+
+    def test_other_users_uploads_and_projects_are_not_found(self):
+        upload_id = self.start(b"x" * 10, kind="audio")
+        other = auth_header(User.objects.create_user("other", "other@example.com", "password123"))
+        self.assertEqual(self.client.get(f"/api/projects/uploads/{upload_id}/", **other).status_code, 404)
+        music = MusicProject.objects.create(title="M", description="d", goal_amount=1000, creator=self.user)
+        response = self.client.post(f"/api/projects/my/music/{music.pk}/media/", {"uploads": [upload_id]},
+                                    content_type="application/json", **other)
+        self.assertEqual(response.status_code, 404)
+
+    def test_prune_removes_stale_uploads(self):
+        upload_id = self.start(b"x" * 10, kind="audio")
+        self.put(upload_id, b"x" * 10, 0)
+        ChunkedUpload.objects.update(created_at=timezone.now() - timedelta(hours=48))
+        out = StringIO()
+        call_command("prune_uploads", stdout=out)
+        self.assertIn("Pruned 1 stale uploads", out.getvalue())
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.CHUNKED_UPLOAD_DIR), [])
+
+
+def wav_upload(name, seconds, rate=44100, channels=2):
+    samples = (0.5 * np.sin(2 * np.pi * 440 * np.arange(int(seconds * rate)) / rate) * 32767).astype("<i2")
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(np.repeat(samples, channels).tobytes())
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="audio/wav")
+
+
+@override_settings(AUDIO_PREVIEW_WORKERS=0, AUDIO_PREVIEW_SECONDS=2, AUDIO_PREVIEW_SAMPLE_RATE=8000,
+                   AUDIO_WAVEFORM_PEAKS=100, MEDIA_ORIGIN="http://127.0.0.1:8000")
+class AudioPreviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        user = User.objects.create_user("creator", "creator@example.com", "password123")
+        self.music = MusicProject.objects.create(title="M", description="d", goal_amount=1000, creator=user,
+                                                 album_cover="music_covers/cover.png")
+
+    def test_sample_gets_a_short_preview_and_peaks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sample = AudioSample.objects.create(project=self.music, file=wav_upload("take.wav", 5))
+        sample = self.client.get(f"/api/projects/music/{self.music.pk}/").json()["audio_samples"][0]
+        self.assertEqual(sample["duration"], 5.0)
+        self.assertEqual(len(sample["peaks"]), 100)
+        self.assertTrue(all(120 <= peak <= 130 for peak in sample["peaks"]))  # a sine at half scale
+        self.assertRegex(sample["preview_url"], r"^http://127\.0\.0\.1:8000/media/blobs/[0-9a-f]{2}/[0-9a-f]{2}/previews/[0-9a-f]{64}\.[0-9a-f]{16}\.(wav|mp3)$")
+        preview_path = os.path.join(self.media.name, sample["preview_url"].split("/media/", 1)[1])
+        if preview_path.endswith(".wav"):
+            with wave.open(preview_path) as preview:
+                self.assertEqual((preview.getnchannels(), preview.getframerate()), (1, 8000))
+                self.assertAlmostEqual(preview.getnframes() / 8000, 2, places=2)
+
+    def test_wav_is_decoded_block_by_block_from_its_path(self):
+        path = os.path.join(self.media.name, "take.wav")
+        with open(path, "wb") as f:
+            f.write(wav_upload("take.wav", 3, rate=8000).read())
+        whole = analyse_audio(path, 1, 8000, 64, 50)
+        with mock.patch("accounts.audio.BLOCK_FRAMES", 1000):
+            blocked = analyse_audio(path, 1, 8000, 64, 50)
+        self.assertEqual(blocked["peaks"], whole["peaks"])
+        self.assertEqual((blocked["duration"], blocked["sha256"]), (3.0, whole["sha256"]))
+        with wave.open(BytesIO(blocked["preview"])) as preview:
+            self.assertEqual(preview.getnframes(), 8000)
+
+    def test_undecodable_sample_is_saved_without_a_preview_and_backfill_reports_it(self):
+        with self.assertLogs("accounts.audio_previews", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            AudioSample.objects.create(project=self.music, file=SimpleUploadedFile("take.mp3", b"ID3 not audio"))
+        AudioSample.objects.create(project=self.music, file="music_samples/missing.wav")
+        sample = self.client.get(f"/api/projects/music/{self.music.pk}/").json()["audio_samples"][0]
+        self.assertEqual((sample["preview_url"], sample["peaks"]), (None, None))
+
+        with self.captureOnCommitCallbacks(execute=False):
+            good = AudioSample.objects.create(project=self.music, file=wav_upload("good.wav", 1))
+        out, err = StringIO(), StringIO()
+        call_command("generate_audio_previews", workers=1, stdout=out, stderr=err)
+        self.assertIn("Previews for 1 samples from 1 files", out.getvalue())
+        self.assertIn("1 samples with missing files, 1 failed", out.getvalue())
+        good.refresh_from_db()
+        self.assertEqual(good.preview["source"], good.file.name)
+
+
+@override_settings(THUMBNAIL_WORKERS=0, AUDIO_PREVIEW_WORKERS=0)
+class ContentAddressedMediaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user("creator", "creator@example.com", "password123")
+
+    def refcount(self, name):
+        return MediaBlob.objects.filter(name=name).values_list("refcount", flat=True).first()
+
+    def stored_files(self):
+        return sorted(os.path.relpath(os.path.join(d, f), self.media.name)
+                      for d, _, files in os.walk(self.media.name) for f in files)
+
+    def film(self, poster):
+        with self.captureOnCommitCallbacks(execute=True):
+            return FilmProject.objects.create(title="F", description="d", goal_amount=1000, creator=self.user,
+                                              poster_image=poster)
+
+    def test_same_content_is_stored_once_and_counted(self):
+        first = self.film(png_upload("poster.png", (400, 300)))
+        second = self.film(png_upload("copy of poster.png", (400, 300)))
+        self.assertEqual(first.poster_image.name, second.poster_image.name)
+        self.assertRegex(first.poster_image.name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual(self.refcount(first.poster_image.name), 2)
+        art = ArtProject.objects.create(title="A", description="d", goal_amount=1000, creator=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ArtworkImage.objects.create(project=art, image=png_upload("art.png", (400, 300)))
+        self.assertEqual(image.image.name, first.poster_image.name)  # shared across models too
+        self.assertEqual(self.refcount(first.poster_image.name), 3)
+        self.assertEqual(len([f for f in self.stored_files() if "thumbs" not in f]), 1)
+
+    def test_edits_and_deletes_release_files_for_gc(self):
+        kept = self.film(png_upload("kept.png", (400, 300)))
+        film = self.film(png_upload("old.png", (500, 300)))
+        old_name = film.poster_image.name
+        film.poster_image = png_upload("new.png", (600, 300))
+        with self.captureOnCommitCallbacks(execute=True):
+            film.save()
+        self.assertEqual((self.refcount(old_name), self.refcount(film.poster_image.name)), (0, 1))
+
+        music = MusicProject.objects.create(title="M", description="d", goal_amount=1000, creator=self.user,
+                                            album_cover=kept.poster_image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioSample.objects.create(project=music, file=wav_upload("take.wav", 1))
+        response = self.client.delete(f"/api/projects/my/music/{music.pk}/delete/", **auth_header(self.user))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refcount(kept.poster_image.name), 1)
+
+        # Rows written without signals are counted by the recount; files nobody
+        # refers to (here a leaked legacy upload) are removed with their derivatives.
+        os.makedirs(os.path.join(self.media.name, "film_posters"))
+        for legacy in ("film_posters/used.png", "film_posters/leaked.png"):
+            with open(os.path.join(self.media.name, legacy), "wb") as f:
+                f.write(b"legacy")
+        FilmProject.objects.bulk_create([FilmProject(title="L", description="d", goal_amount=1000,
+                                                     creator=self.user, poster_image="film_posters/used.png")])
+        before = self.stored_files()
+        out = StringIO()
+        call_command("gc_media", grace_hours=0, dry_run=True, stdout=out)
+        self.assertEqual(self.stored_files(), before)
+
+        call_command("gc_media", grace_hours=0, batch_size=2, stdout=out)
+        remaining = self.stored_files()
+        referenced = {kept.poster_image.name, film.poster_image.name, "film_posters/used.png"}
+        self.assertEqual({name for name in remaining if "/thumbs/" not in name}, referenced)
+        self.assertEqual(len([name for name in remaining if "/thumbs/" in name]), 4)  # 320w webp + jpeg, two posters
+        self.assertFalse(MediaBlob.objects.filter(name=old_name).exists())
+        self.assertIn("Removed", out.getvalue())
+
+        # A recent file is kept whatever its references.
+        with open(os.path.join(self.media.name, "film_posters/fresh.png"), "wb") as f:
+            f.write(b"fresh")
+        call_command("gc_media", stdout=StringIO())
+        self.assertIn("film_posters/fresh.png", self.stored_files())
+
+    def test_non_seekable_content_is_read_once(self):
+        class Stream(io.RawIOBase):
+            def __init__(self, data):
+                self.data = BytesIO(data)
+
+            def readable(self):
+                return True
+
+            def readinto(self, buffer):
+                chunk = self.data.read(len(buffer))
+                buffer[:len(chunk)] = chunk
+                return len(chunk)
+
+        data = b"not seekable" * 10000
+        storage = select_media_storage()
+        name = storage.save("film_posters/stream.bin", File(Stream(data), name="stream.bin"))
+        self.assertEqual(name, blob_name(hashlib.sha256(data).hexdigest(), ".bin"))
+        self.assertEqual(storage.save("film_posters/again.bin", File(Stream(data), name="again.bin")), name)
+        with storage.open(name) as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(self.stored_files(), [name])
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        os.makedirs(os.path.join(self.media.name, "music_samples"))
+        self.data = bytes(range(256)) * 40
+        with open(os.path.join(self.media.name, "music_samples", "take 1.wav"), "wb") as f:
+            f.write(self.data)
+        self.url = "/media/music_samples/take%201.wav"
+
+    def test_full_file_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+        self.assertEqual((response["Content-Length"], response["Accept-Ranges"]), (str(len(self.data)), "bytes"))
+        self.assertEqual(response["Content-Type"], "audio/x-wav")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+        head = self.client.head(self.url)
+        self.assertEqual((head.status_code, head["Content-Length"]), (200, str(len(self.data))))
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/music_samples/").status_code, 404)
+
+    def test_ranges(self):
+        etag = self.client.head(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_RANGE="bytes=1000-1999", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 1000-1999/{len(self.data)}")
+        self.assertEqual(response["Content-Length"], "1000")
+        self.assertEqual(b"".join(response.streaming_content), self.data[1000:2000])
+        # What wsgi.file_wrapper gets: sendfile copies from the file's own offset.
+        direct = serve_media(RequestFactory().get(self.url, HTTP_RANGE="bytes=1000-1999"), "music_samples/take 1.wav")
+        self.assertEqual(direct.file_to_stream.tell(), 1000)
+        self.assertGreater(direct.file_to_stream.fileno(), 2)
+        direct.close()
+
+        suffix = self.client.get(self.url, HTTP_RANGE="bytes=-100")
+        self.assertEqual(b"".join(suffix.streaming_content), self.data[-100:])
+        open_ended = self.client.get(self.url, HTTP_RANGE="bytes=10000-")
+        self.assertEqual(b"".join(open_ended.streaming_content), self.data[10000:])
+
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"other"')
+        self.assertEqual((stale.status_code, stale["Content-Length"]), (200, str(len(self.data))))
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.data)}-")
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable["Content-Range"]), (416, f"bytes */{len(self.data)}"))
+
+    @override_settings(MEDIA_ACCEL="x-accel", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_accel_redirect_hands_off_the_file(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 200)  # nginx applies the range
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/music_samples/take%201.wav")
+        self.assertEqual(response.content, b"")
+        with override_settings(MEDIA_ACCEL="x-sendfile"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.media.name, "music_samples", "take 1.wav"))
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite connection profile")
+class DatabaseProfileTests(TestCase):
+    def test_connections_open_in_wal_mode(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertGreater(cursor.execute("PRAGMA mmap_size").fetchone()[0], 0)
+            self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 20_000)
@@ -0,0 +1,187 @@
+"""Responsive thumbnails for posters, album covers and artwork images.
+
+After an image is saved (see ``signals.py``), ``schedule_thumbnails`` renders
+it at ``THUMBNAIL_WIDTHS`` in ``THUMBNAIL_FORMATS`` on a process pool of
+``THUMBNAIL_WORKERS`` spawned workers (0 renders inline after commit). The
+derivatives are stored next to the original, under names that include a hash
+of its content::
+
+    film_posters/thumbs/poster.3f2a9c1e5b7d8a60.320w.webp
+
+and recorded on the row's ``<field>_thumbnails`` JSON, together with the
+original's name. The serializers only expose entries whose source is still the
+current image, so a new upload never shows the previous image's thumbnails.
+
+``generate_thumbnails`` backfills existing rows and can be re-run: rows that
+are already up to date are skipped and existing derivative files are reused.
+"""
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .imaging import FORMATS, render_thumbnails
+from .models import ArtProject, ArtworkImage, FilmProject, MusicProject
+from .response_cache import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+# model -> (image field, category whose cached responses embed it)
+THUMBNAIL_SOURCES = {
+    FilmProject: ("poster_image", "film"),
+    MusicProject: ("album_cover", "music"),
+    ArtworkImage: ("image", "art"),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def thumbnails_field(model):
+    return f"{THUMBNAIL_SOURCES[model][0]}_thumbnails"
+
+
+def derivative_name(source, digest, width, format_name):
+    directory, filename = posixpath.split(source)
+    stem = filename.rsplit(".", 1)[0]
+    extension = FORMATS[format_name][1]
+    return posixpath.join(directory, "thumbs", f"{stem}.{digest[:16]}.{width}w.{extension}")
+
+
+def is_current(instance):
+    image_field, _category = THUMBNAIL_SOURCES[type(instance)]
+    source = getattr(instance, image_field).name
+    return bool(source) and getattr(instance, thumbnails_field(type(instance))).get("source") == source
+
+
+def render_args():
+    return settings.THUMBNAIL_WIDTHS, settings.THUMBNAIL_FORMATS, settings.THUMBNAIL_QUALITY
+
+
+def store_thumbnails(model, pk, source, digest, rendered):
+    """Save rendered derivatives and record them on the row, unless its image
+    was replaced in the meantime. Returns True if the row was updated."""
+    entries = {}
+    for width, format_name, data in rendered:
+        name = derivative_name(source, digest, width, format_name)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(data))
+        entries.setdefault(format_name, {})[str(width)] = name
+
+    image_field, category = THUMBNAIL_SOURCES[model]
+    fields = {thumbnails_field(model): {"source": source, "sha256": digest, **entries}}
+    if model is not ArtworkImage:
+        fields["updated_at"] = timezone.now()  # moves the cached fragment's key
+    updated = model.objects.filter(pk=pk, **{image_field: source}).update(**fields)
+    if updated and model is ArtworkImage:
+        parent_id = model.objects.filter(pk=pk).values_list("project_id", flat=True).first()
+        ArtProject.objects.filter(pk=parent_id).update(updated_at=timezone.now())
+    if updated:
+        bump_version(category)
+    return bool(updated)
+
+
+def media_url(name):
+    """Absolute URL of a stored derivative (see ``MEDIA_ORIGIN``)."""
+    return settings.MEDIA_ORIGIN.rstrip("/") + default_storage.url(name)
+
+
+def source_path(name):
+    """Local path of a stored original, or None if it is missing. Workers get
+    the path and read the file themselves, so a large upload is never loaded
+    into (and pickled from) the process that saved it."""
+    if not name or not default_storage.exists(name):
+        return None
+    return default_storage.path(name)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers never inherit the server's threads or DB connections
+            _pool = ProcessPoolExecutor(settings.THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def generate(model, pk):
+    """Render and store thumbnails for one row, on this thread or the pool."""
+    image_field, _category = THUMBNAIL_SOURCES[model]
+    source = model.objects.filter(pk=pk).values_list(image_field, flat=True).first()
+    path = source_path(source)
+    if path is None:
+        return
+
+    def finish(result):
+        try:
+            digest, rendered = result
+            store_thumbnails(model, pk, source, digest, rendered)
+        finally:
+            if settings.THUMBNAIL_WORKERS:
+                connection.close()  # the pool's callback thread
+
+    if not settings.THUMBNAIL_WORKERS:
+        try:
+            finish(render_thumbnails(path, *render_args()))
+        except Exception:  # an unreadable image must not fail the request that saved it
+            logger.exception("Thumbnails failed for %s %s (%s)", model.__name__, pk, source)
+        return
+
+    def done(future):
+        try:
+            finish(future.result())
+        except Exception:
+            logger.exception("Thumbnails failed for %s %s (%s)", model.__name__, pk, source)
+
+    get_pool().submit(render_thumbnails, path, *render_args()).add_done_callback(done)
+
+
+def schedule_thumbnails(instance):
+    """Generate thumbnails for ``instance`` once the current transaction commits."""
+    if is_current(instance):
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: generate(model, pk))
+
+
+def thumbnail_urls(instance):
+    """``{format: [{"width", "url"}, ...]}`` for the current image, smallest first."""
+    image_field, _category = THUMBNAIL_SOURCES[type(instance)]
+    recorded = getattr(instance, thumbnails_field(type(instance)))
+    if not recorded or recorded.get("source") != getattr(instance, image_field).name:
+        return {}
+    return {
+        format_name: [
+            {"width": int(width), "url": media_url(name)}
+            for width, name in sorted(recorded[format_name].items(), key=lambda item: int(item[0]))
+        ]
+        for format_name in FORMATS if format_name in recorded
+    }
+
+
+def srcsets(urls):
+    """``{format: "url 320w, url 640w"}`` from ``thumbnail_urls``."""
+    return {
+        format_name: ", ".join(f"{entry['url']} {entry['width']}w" for entry in entries)
+        for format_name, entries in urls.items()
+    }
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting == "THUMBNAIL_WORKERS":
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
@@ -0,0 +1,221 @@
+"""Chunked, resumable uploads for audio samples and artwork images.
+
+1. ``start_upload`` records the file's name, size and SHA-256.
+2. The client PUTs chunks with ``Content-Range: bytes <start>-<end>/<size>``.
+   Each chunk is streamed in ``BLOCK_SIZE`` pieces onto a part file in
+   ``CHUNKED_UPLOAD_DIR``, so memory stays bounded whatever the chunk size.
+   The part file's length is the resume point: after a dropped connection
+   the client asks for ``received`` and continues from there (whatever
+   arrived of the interrupted chunk is kept).
+3. ``complete_upload`` checks the size and checksum and saves the file
+   through the media fields' (content-addressed) storage.
+4. ``attach_uploads`` adds completed uploads to an existing project with one
+   ``bulk_create``.
+
+A chunk that does not start at the current length is refused with the
+length to resume from. The check and the write happen under an exclusive
+lock on the part file, so a resumed request waits for a dropped one that is
+still being drained on another worker and then gets the new length.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File, locks
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from PIL import Image
+
+from .models import ArtProject, ArtworkImage, AudioSample, ChunkedUpload, MusicProject
+from .response_cache import bump_version
+from .thumbnails import schedule_thumbnails
+from .audio_previews import schedule_preview
+
+
+BLOCK_SIZE = 64 * 1024
+
+# kind -> (project category, project model, media model, media file field)
+UPLOAD_KINDS = {
+    "audio": ("music", MusicProject, AudioSample, "file"),
+    "artwork": ("art", ArtProject, ArtworkImage, "image"),
+}
+
+
+class UploadError(Exception):
+    """The request cannot be applied to the upload in its current state."""
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, received):
+        super().__init__(f"Chunk must start at byte {received}")
+        self.received = received
+
+
+class ChecksumMismatch(UploadError):
+    pass
+
+
+def part_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{upload.token.hex}.part")
+
+
+def received(upload):
+    try:
+        return os.path.getsize(part_path(upload))
+    except FileNotFoundError:
+        return 0
+
+
+def start_upload(user, kind, filename, size, sha256):
+    if kind not in UPLOAD_KINDS:
+        raise UploadError(f"Invalid kind, expected one of: {', '.join(UPLOAD_KINDS)}")
+    if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes")
+    if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256.lower()):
+        raise UploadError("sha256 must be 64 hex digits")
+    filename = get_valid_filename(os.path.basename(filename or ""))
+    if not filename:
+        raise UploadError("Invalid filename")
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    return ChunkedUpload.objects.create(user=user, kind=kind, filename=filename, size=size, sha256=sha256.lower())
+
+
+def parse_content_range(header, size):
+    """``(start, end)`` (end exclusive) from ``bytes <start>-<last>/<size>``."""
+    try:
+        unit, _, spec = header.partition(" ")
+        span, _, total = spec.partition("/")
+        start, _, last = span.partition("-")
+        start, end = int(start), int(last) + 1
+    except ValueError:
+        raise UploadError("Content-Range must look like 'bytes <start>-<end>/<size>'") from None
+    if unit != "bytes" or total not in ("*", str(size)) or not 0 <= start < end <= size:
+        raise UploadError(f"Content-Range must cover bytes within 0-{size - 1}/{size}")
+    if end - start > settings.UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunks are limited to {settings.UPLOAD_CHUNK_SIZE} bytes")
+    return start, end
+
+
+def append_chunk(upload, start, end, stream):
+    """Append ``stream`` (``end - start`` bytes) at ``start``; return the new length.
+
+    Blocks are flushed as they arrive, so a connection dropped mid-chunk
+    still moves the resume point forward.
+    """
+    if upload.status != "uploading":
+        raise UploadError("Upload is already complete")
+    with open(part_path(upload), "ab") as part:
+        locks.lock(part, locks.LOCK_EX)  # released when the file is closed
+        current = part.seek(0, os.SEEK_END)  # may have grown while we waited
+        if start != current:
+            raise OffsetMismatch(current)
+        remaining = end - start
+        while remaining:
+            block = stream.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            part.write(block)
+            part.flush()
+            remaining -= len(block)
+        return part.tell()
+
+
+def _checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """Verify the part file and move it into storage. Idempotent once complete."""
+    with transaction.atomic():
+        # Concurrent calls queue here; the later ones see the new status.
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != "uploading":
+            return upload
+        path = part_path(upload)
+        length = received(upload)
+        if length != upload.size:
+            raise OffsetMismatch(length)
+        if _checksum(path) != upload.sha256:
+            os.remove(path)  # corrupt: start over
+            raise ChecksumMismatch("Checksum mismatch: the upload was discarded, start again from byte 0")
+        if upload.kind == "artwork":
+            try:
+                with Image.open(path) as image:
+                    image.verify()
+            except Exception:
+                os.remove(path)
+                raise UploadError("Not an image") from None
+
+        _category, _project_model, media_model, field_name = UPLOAD_KINDS[upload.kind]
+        upload_to = media_model._meta.get_field(field_name).upload_to
+        with open(path, "rb") as f:
+            # The media fields' storage: the name is the one the project row will hold.
+            upload.file = upload.file.storage.save(os.path.join(upload_to, upload.filename), File(f))
+        upload.status = "complete"
+        upload.save(update_fields=["file", "status"])
+    os.remove(path)
+    return upload
+
+
+def attach_uploads(user, category, project_id, tokens):
+    """Create the media rows for completed uploads on ``user``'s project in
+    one ``bulk_create``; returns them. Raises ``LookupError`` for a project
+    that is not the user's."""
+    kind = next((k for k, (c, *_rest) in UPLOAD_KINDS.items() if c == category), None)
+    if kind is None:
+        raise UploadError(f"{category} projects take no chunked media")
+    _category, project_model, media_model, field_name = UPLOAD_KINDS[kind]
+    tokens = set(tokens)
+    with transaction.atomic():
+        project = project_model.objects.filter(pk=project_id, creator=user).first()
+        if project is None:
+            raise LookupError("Project not found")
+        uploads = list(
+            ChunkedUpload.objects.select_for_update()
+            .filter(user=user, kind=kind, status="complete", token__in=tokens)
+            .order_by("id")
+        )
+        missing = tokens - {upload.token for upload in uploads}
+        if missing:
+            raise UploadError(f"Not completed {kind} uploads of yours: {', '.join(sorted(map(str, missing)))}")
+        media = media_model.objects.bulk_create([
+            media_model(project=project, **{field_name: upload.file.name}) for upload in uploads
+        ])
+        # The file's reference moves from the upload to the media row, so its
+        # count in MediaBlob stays as it is.
+        ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).update(status="attached", file="")
+        # bulk_create sends no signals: do what the per-row receivers would.
+        project_model.objects.filter(pk=project.pk).update(updated_at=timezone.now())
+        transaction.on_commit(lambda: bump_version(category))
+        for item in media:
+            if media_model is ArtworkImage:
+                schedule_thumbnails(item)
+            else:
+                schedule_preview(item)
+    return media
+
+
+def prune_uploads(max_age):
+    """Delete uploads that were never attached within ``max_age`` (a
+    timedelta) and their part files. Returns how many.
+
+    A completed upload's stored file may be shared with other rows; deleting
+    the upload releases its reference and ``gc_media`` removes the file once
+    nothing refers to it."""
+    stale = ChunkedUpload.objects.filter(
+        status__in=("uploading", "complete"), created_at__lt=timezone.now() - max_age,
+    ).order_by("created_at")
+    count = 0
+    for upload in stale.iterator():
+        try:
+            os.remove(part_path(upload))
+        except FileNotFoundError:
+            pass
+        upload.delete()
+        count += 1
+    return count
@@ -9,12 +9,19 @@ urlpatterns = [
     path('me/', views.me_view, name='me'),
 
     path('', views.get_all_projects, name='get_all_projects'),
+    path('search/', views.search_projects, name='search_projects'),
 
     path('<str:category>/<int:id>/', views.get_project_by_id, name='get_project_by_id'),
 
     path("my/", views.get_my_projects, name="get_my_projects"),
     path("my/<str:category>/<int:id>/update/", views.update_project, name="update_project"),
     path("my/<str:category>/<int:id>/delete/", views.delete_project, name="delete_project"),
+    path("my/<str:category>/<int:id>/media/", views.attach_media, name="attach_media"),
+
+    # Chunked, resumable media uploads
+    path('uploads/', views.start_upload, name='start_upload'),
+    path('uploads/<uuid:token>/', views.upload_detail, name='upload_detail'),
+    path('uploads/<uuid:token>/complete/', views.complete_upload, name='complete_upload'),
 
 
     path('film/create/', views.create_film_project, name='create_film_project'),
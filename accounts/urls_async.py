@@ -0,0 +1,14 @@
+from django.urls import path
+from . import async_views
+
+
+# Async read endpoints for the ASGI profile (crowdfunding/urls_asgi.py). Same
+# paths and names as in urls.py, which handles every other route.
+urlpatterns = [
+    path('me/', async_views.me_view, name='me'),
+    path('', async_views.get_all_projects, name='get_all_projects'),
+    path('<str:category>/<int:id>/', async_views.get_project_by_id, name='get_project_by_id'),
+    path("films/", async_views.get_all_films, name="get_all_films"),
+    path("music/", async_views.get_all_music, name="get_all_music"),
+    path("art/", async_views.get_all_art, name="get_all_art"),
+]
@@ -3,22 +3,31 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
 from rest_framework.permissions import IsAuthenticated
-from .serializers import RegisterSerializer, UserSerializer, ProjectSerializer, ProfileSerializer,  FilmProjectSerializer, MusicProjectSerializer, ArtProjectSerializer    
-from django.contrib.auth.models import User
+from .serializers import RegisterSerializer, UserSerializer, ProjectSerializer, ProfileSerializer,  FilmProjectSerializer, MusicProjectSerializer, ArtProjectSerializer, AudioSampleSerializer, ArtworkImageSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
-from .models import FilmProject, MusicProject, ArtProject, ArtworkImage, AudioSample
+from .models import FilmProject, MusicProject, ArtProject, ArtworkImage, AudioSample, ChunkedUpload
+from .feed import InvalidFeedRequest, hydrate, parse_feed_params, parse_page_size, project_feed
+from .projects import PROJECT_CATEGORIES, serialize_projects, stamps
+from .project_index import sync_project_index, remove_from_project_index
+from .response_cache import cached_response
+from .payments import fail_payment, settle_order, settle_payment
+from .webhooks import enqueue, event_id_for
+from .gateway import GatewayUnavailable, SignatureError, get_gateway
+from .idempotency import IdempotencyBusy, IdempotencyConflict, get_store as get_idempotency_store
+from .blacklist import FilteredRefreshToken
+from .search import InvalidSearchCursor, decode_cursor as decode_search_cursor, search as search_index
+from . import uploads
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse
 import hmac
+import uuid
 import hashlib
-import json
 from decimal import Decimal
+import logging
 
-try:
-    import razorpay
-except Exception:
-    razorpay = None
+logger = logging.getLogger(__name__)
 
 
 @api_view(['POST'])
@@ -53,14 +62,8 @@ def login_view(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    user = None
-    user = authenticate(username=username_or_email, password=password)
-    if user is None:
-        try:
-            u = User.objects.get(email=username_or_email)
-            user = authenticate(username=u.username, password=password)
-        except User.DoesNotExist:
-            user = None
+    # EmailOrUsernameBackend accepts either and hashes the password once.
+    user = authenticate(request, username=username_or_email, password=password)
 
     if user is None:
         return Response(
@@ -89,7 +92,7 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data['refresh']
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -113,7 +116,8 @@ def me_view(request):
 def create_film_project(request):
     serializer = FilmProjectSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(creator=request.user)
+        project = serializer.save(creator=request.user)
+        sync_project_index("film", project)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -127,10 +131,11 @@ def create_music_project(request):
         # Handle multiple audio file uploads
         for file in request.FILES.getlist("audio_samples"):
             AudioSample.objects.create(project=project, file=file)
+        sync_project_index("music", project)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    print("❌ Serializer errors:", serializer.errors)
+    logger.info("Project serializer errors: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
@@ -143,83 +148,89 @@ def create_art_project(request):
         # Handle multiple image files
         for img in request.FILES.getlist('artwork_images'):
             ArtworkImage.objects.create(project=project, image=img)
+        sync_project_index("art", project)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
-    print("❌ Serializer errors:", serializer.errors)
+    logger.info("Project serializer errors: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+
+def feed_page_response(request, **filters):
+    """Return one page of the feed for ``?cursor=&limit=&sort=`` and the list
+    filters (see ``feed.parse_feed_params``)."""
+    try:
+        params = parse_feed_params(request.query_params, **filters)
+    except InvalidFeedRequest as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    results, next_cursor = project_feed(**params)
+    return Response({"results": results, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
 # Get all projects
 @api_view(["GET"])
+@cached_response("film", "music", "art")
 def get_all_projects(request):
-    film_projects = FilmProject.objects.all()
-    music_projects = MusicProject.objects.all()
-    art_projects = ArtProject.objects.all()
+    """Feed of every category, newest first unless ``?sort=`` says otherwise,
+    paginated with ``?cursor=&limit=``."""
+    return feed_page_response(request)
 
-    all_projects = []
 
-    for p in film_projects:
-        serialized = FilmProjectSerializer(p).data
-        serialized["category"] = "film"
-        serialized["unique_id"] = f"film-{p.id}"  # 👈 important
-        all_projects.append(serialized)
+@api_view(["GET"])
+def search_projects(request):
+    """Ranked full-text search over every category: ``?q=&cursor=&limit=``.
 
-    for p in music_projects:
-        serialized = MusicProjectSerializer(p).data
-        serialized["category"] = "music"
-        serialized["unique_id"] = f"music-{p.id}"
-        all_projects.append(serialized)
+    Every term matches as a prefix of a word in the title, description,
+    creator username or reward tiers.
+    """
+    q = request.query_params.get("q", "").strip()
+    if not q:
+        return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = parse_page_size(request.query_params.get("limit"))
+    except ValueError:
+        return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
 
-    for p in art_projects:
-        serialized = ArtProjectSerializer(p).data
-        serialized["category"] = "art"
-        serialized["unique_id"] = f"art-{p.id}"
-        all_projects.append(serialized)
+    cursor = request.query_params.get("cursor")
+    try:
+        cursor = decode_search_cursor(cursor) if cursor else None
+    except InvalidSearchCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
 
-    all_projects.sort(key=lambda x: x["created_at"], reverse=True)
-    return Response(all_projects, status=status.HTTP_200_OK)
+    hits, next_cursor = search_index(q, limit, after=cursor)
+    return Response({"results": hydrate(hits), "next_cursor": next_cursor}, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
+@cached_response()
 def get_project_by_id(request, category, id):
-    try:
-        if category == "film":
-            project = FilmProject.objects.get(id=id)
-            serializer = FilmProjectSerializer(project)
-        elif category == "music":
-            project = MusicProject.objects.get(id=id)
-            serializer = MusicProjectSerializer(project)
-        elif category == "art":
-            project = ArtProject.objects.get(id=id)
-            serializer = ArtProjectSerializer(project)
-        else:
-            return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    if category not in PROJECT_CATEGORIES:
+        return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
 
-    except Exception as e:
-        print("Error fetching project:", e)
+    serialized = serialize_projects(category, stamps(category, id=id))
+    if id not in serialized:
         return Response({"error": "Project not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    return Response(serialized[id], status=status.HTTP_200_OK)
 
 
+
+# Per-category lists take the same sort/filter/cursor parameters as the feed.
 @api_view(['GET'])
+@cached_response("film")
 def get_all_films(request):
-    projects = FilmProject.objects.all().order_by('-created_at')
-    serializer = FilmProjectSerializer(projects, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return feed_page_response(request, category="film")
 
 @api_view(['GET'])
+@cached_response("music")
 def get_all_music(request):
-    projects = MusicProject.objects.all().order_by('-created_at')
-    serializer = MusicProjectSerializer(projects, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return feed_page_response(request, category="music")
 
 @api_view(['GET'])
+@cached_response("art")
 def get_all_art(request):
-    projects = ArtProject.objects.all().order_by('-created_at')
-    serializer = ArtProjectSerializer(projects, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return feed_page_response(request, category="art")
 
 
 @api_view(['POST'])
@@ -241,10 +252,10 @@ def create_order(request):
     category = data.get('category')
     project_id = data.get('project_id')
 
-    if razorpay is None:
-        return Response({'error': 'Razorpay library not installed on server'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+    try:
+        gateway = get_gateway()
+    except GatewayUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     order_payload = {
         'amount': amount_paise,
@@ -252,26 +263,57 @@ def create_order(request):
         'receipt': f"project_{category}_{project_id}",
         'payment_capture': 1,
     }
+    user = request.user if request.user and request.user.is_authenticated else None
+
+    def place_order():
+        try:
+            order = gateway.create_order(order_payload)
+            # create local Payment record
+            from .models import Payment
+            payment = Payment.objects.create(
+                user=user,
+                project_category=category or '',
+                project_id=project_id or None,
+                amount=amount,
+                razorpay_order_id=order.get('id')
+            )
+            return status.HTTP_200_OK, {
+                'order': order,
+                'key': settings.RAZORPAY_KEY_ID,
+                'payment_id': payment.id,
+            }
+        except Exception:
+            logger.exception('Error creating razorpay order')
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': 'Failed to create order'}
+
+    # Retries carrying the same Idempotency-Key replay the first response
+    # instead of creating another order. Keys are scoped to the user, so
+    # anonymous callers (who would all share one namespace) can't send one.
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if not idempotency_key:
+        code, body = place_order()
+        return Response(body, status=code)
+    if user is None:
+        return Response({'error': 'Idempotency-Key requires authentication'},
+                        status=status.HTTP_401_UNAUTHORIZED)
+
     try:
-        order = client.order.create(data=order_payload)
-        # create local Payment record
-        from .models import Payment
-        payment = Payment.objects.create(
-            user=request.user if request.user and request.user.is_authenticated else None,
-            project_category=category or '',
-            project_id=project_id or None,
-            amount=amount,
-            razorpay_order_id=order.get('id')
+        (code, body), replayed = get_idempotency_store().run(
+            f"create_order:{user.id}:{idempotency_key}",
+            f"{amount}|{category}|{project_id}",
+            place_order,
+            cacheable=lambda result: result[0] == status.HTTP_200_OK,
         )
-
-        return Response({
-            'order': order,
-            'key': settings.RAZORPAY_KEY_ID,
-            'payment_id': payment.id,
-        })
-    except Exception as e:
-        print('Error creating razorpay order:', e)
-        return Response({'error': 'Failed to create order'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except IdempotencyConflict:
+        return Response({'error': 'Idempotency-Key was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except IdempotencyBusy:
+        return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                        status=status.HTTP_409_CONFLICT)
+    response = Response(body, status=code)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
 
 
 @api_view(['POST'])
@@ -289,36 +331,30 @@ def verify_payment(request):
     if not (razorpay_order_id and razorpay_payment_id and razorpay_signature):
         return Response({'error': 'Missing parameters'}, status=status.HTTP_400_BAD_REQUEST)
 
-    if razorpay is None:
-        return Response({'error': 'Razorpay library not installed on server'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    try:
+        gateway = get_gateway()
+    except GatewayUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
     try:
-        client.utility.verify_payment_signature({
+        gateway.verify_payment_signature({
             'razorpay_order_id': razorpay_order_id,
             'razorpay_payment_id': razorpay_payment_id,
             'razorpay_signature': razorpay_signature,
         })
-    except Exception as e:
-        print('Signature verification failed:', e)
-        # mark local payment as failed if exists
-        from .models import Payment
+    except SignatureError as e:
+        logger.warning('Signature verification failed: %s', e)
+        # mark local payment as failed if exists (never downgrades a settled one)
         if payment_local_id:
-            Payment.objects.filter(id=payment_local_id).update(status='failed')
+            fail_payment(payment_local_id)
         return Response({'error': 'Signature verification failed'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # signature is valid — update payment
-    from .models import Payment
-    payment = None
+    # signature is valid — settle the payment (credits the project exactly once)
+    fields = {'razorpay_payment_id': razorpay_payment_id, 'razorpay_signature': razorpay_signature}
     if payment_local_id:
-        try:
-            payment = Payment.objects.get(id=payment_local_id)
-            payment.razorpay_payment_id = razorpay_payment_id
-            payment.razorpay_signature = razorpay_signature
-            payment.status = 'paid'
-            payment.save()
-        except Payment.DoesNotExist:
-            payment = None
+        settle_payment(payment_local_id, razorpay_order_id=razorpay_order_id, **fields)
+    else:
+        settle_order(razorpay_order_id, **fields)
 
     return Response({'message': 'Payment verified', 'payment': payment_local_id})
 
@@ -327,7 +363,8 @@ def verify_payment(request):
 def razorpay_webhook(request):
     """Endpoint to receive Razorpay webhooks. Configure the webhook URL and secret in Razorpay dashboard.
 
-    Verifies the signature sent in header 'X-Razorpay-Signature'.
+    Verifies the signature sent in header 'X-Razorpay-Signature', stores the raw
+    event in the WebhookEvent inbox (duplicates are dropped) and returns 200.
     """
     # raw body required for signature verification
     body = request.body
@@ -335,37 +372,17 @@ def razorpay_webhook(request):
     secret = getattr(settings, 'RAZORPAY_WEBHOOK_SECRET', None)
 
     if not secret:
-        return Response({'error': 'Webhook secret not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({'error': 'Webhook secret not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
 
     if not hmac.compare_digest(expected, signature):
-        print('Webhook signature mismatch')
-        return Response({'error': 'Invalid signature'}, status=status.HTTP_400_BAD_REQUEST)
+        logger.warning('Webhook signature mismatch')
+        return JsonResponse({'error': 'Invalid signature'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        payload = json.loads(body.decode('utf-8'))
-    except Exception:
-        payload = {}
-
-    # Basic handling: log and optionally update Payment model based on event
-    print('Razorpay webhook received:', payload.get('event'))
-    # Example: payment.captured
-    event = payload.get('event')
-    if event == 'payment.captured':
-        data = payload.get('payload', {}).get('payment', {}).get('entity', {})
-        razorpay_payment_id = data.get('id')
-        razorpay_order_id = data.get('order_id')
-        amount = Decimal(data.get('amount') or 0) / 100
-        # update matching payment
-        from .models import Payment
-        Payment.objects.filter(razorpay_order_id=razorpay_order_id).update(
-            razorpay_payment_id=razorpay_payment_id,
-            amount=amount,
-            status='paid'
-        )
-
-    return Response({'status': 'ok'})
+    # Ack fast: the event is applied later by `manage.py process_webhook_inbox`.
+    enqueue(event_id_for(request.META, body), body)
+    return JsonResponse({'status': 'ok'})
 
 @api_view(['GET'])
 def get_film_by_id(request, id):
@@ -381,39 +398,10 @@ def get_film_by_id(request, id):
 @permission_classes([IsAuthenticated])
 def get_my_projects(request):
     """
-    Return all projects created by the authenticated user (film, music, art).
+    Return the projects created by the authenticated user (film, music, art),
+    newest first and paginated with ``?cursor=&limit=`` like the main feed.
     """
-    user = request.user
-    all_projects = []
-
-    # 🎬 Film projects
-    film_projects = FilmProject.objects.filter(creator=user)
-    for p in film_projects:
-        serialized = FilmProjectSerializer(p).data
-        serialized["category"] = "film"
-        serialized["unique_id"] = f"film-{p.id}"
-        all_projects.append(serialized)
-
-    # 🎵 Music projects
-    music_projects = MusicProject.objects.filter(creator=user)
-    for p in music_projects:
-        serialized = MusicProjectSerializer(p).data
-        serialized["category"] = "music"
-        serialized["unique_id"] = f"music-{p.id}"
-        all_projects.append(serialized)
-
-    # 🎨 Art projects
-    art_projects = ArtProject.objects.filter(creator=user)
-    for p in art_projects:
-        serialized = ArtProjectSerializer(p).data
-        serialized["category"] = "art"
-        serialized["unique_id"] = f"art-{p.id}"
-        all_projects.append(serialized)
-
-    # Sort newest first
-    all_projects.sort(key=lambda x: x["created_at"], reverse=True)
-
-    return Response(all_projects, status=status.HTTP_200_OK)
+    return feed_page_response(request, creator=request.user)
 
 
 @api_view(["PUT"])
@@ -445,7 +433,8 @@ def update_project(request, category, id):
 
     serializer = serializer_class(project, data=data, partial=True)
     if serializer.is_valid():
-        serializer.save()
+        project = serializer.save()
+        sync_project_index(category.lower(), project)
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -453,8 +442,8 @@ def update_project(request, category, id):
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def delete_project(request, category, id):
-    print(f"🟢 DELETE endpoint hit: category={category}, id={id}, user={request.user}")
-    
+    logger.debug("Delete project: category=%s, id=%s, user=%s", category, id, request.user.id)
+
     model_map = {
         "film": FilmProject,
         "music": MusicProject,
@@ -462,19 +451,117 @@ def delete_project(request, category, id):
     }
     model = model_map.get(category.lower())
     if not model:
-        print("❌ Invalid category")
         return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
 
     project = model.objects.filter(id=id).first()
     if not project:
-        print(f"❌ No project found for id={id} in {category}")
         return Response({"error": "Project not found"}, status=status.HTTP_404_NOT_FOUND)
 
     if project.creator != request.user:
-        print(f"⚠️ Unauthorized delete: {request.user} ≠ {project.creator}")
+        logger.warning("Unauthorized delete of %s project %s by user %s", category, id, request.user.id)
         return Response({"error": "You are not allowed to delete this project"}, status=status.HTTP_403_FORBIDDEN)
 
     project.delete()
-    print("✅ Project deleted successfully!")
+    remove_from_project_index(category.lower(), id)
+    logger.info("Deleted %s project %s", category, id)
     return Response({"message": "Project deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
+
+
+# Chunked uploads (accounts/uploads.py): start, PUT chunks, complete, then
+# attach to a project created without its media.
+
+def upload_state(upload):
+    return {
+        "id": str(upload.token),
+        "kind": upload.kind,
+        "filename": upload.filename,
+        "size": upload.size,
+        "received": upload.size if upload.status != "uploading" else uploads.received(upload),
+        "status": upload.status,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+    }
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def start_upload(request):
+    try:
+        size = int(request.data.get("size", 0))
+        upload = uploads.start_upload(
+            request.user,
+            request.data.get("kind"),
+            request.data.get("filename"),
+            size,
+            str(request.data.get("sha256", "")),
+        )
+    except (TypeError, ValueError):
+        return Response({"error": "size must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    except uploads.UploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {**upload_state(upload), "max_size": settings.UPLOAD_MAX_SIZE},
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["GET", "PUT"])
+@permission_classes([IsAuthenticated])
+def upload_detail(request, token):
+    """GET: how much has arrived (where to resume). PUT: append one chunk,
+    sent as the raw body with a ``Content-Range`` header."""
+    upload = ChunkedUpload.objects.filter(token=token, user=request.user).first()
+    if not upload:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == "GET":
+        return Response(upload_state(upload))
+
+    try:
+        start, end = uploads.parse_content_range(request.headers.get("Content-Range", ""), upload.size)
+        if int(request.headers.get("Content-Length") or 0) != end - start:
+            return Response({"error": "Content-Length does not match Content-Range"}, status=status.HTTP_400_BAD_REQUEST)
+        # The raw stream, never request.data: the chunk is not buffered in memory.
+        uploads.append_chunk(upload, start, end, request.stream)
+    except uploads.OffsetMismatch as e:
+        return Response({"error": str(e), "received": e.received}, status=status.HTTP_409_CONFLICT)
+    except uploads.UploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(upload_state(upload))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def complete_upload(request, token):
+    upload = ChunkedUpload.objects.filter(token=token, user=request.user).first()
+    if not upload:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        upload = uploads.complete_upload(upload)
+    except uploads.OffsetMismatch as e:
+        return Response({"error": f"Only {e.received} of {upload.size} bytes received", "received": e.received},
+                        status=status.HTTP_409_CONFLICT)
+    except uploads.UploadError as e:
+        return Response({"error": str(e), "received": uploads.received(upload)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(upload_state(upload))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def attach_media(request, category, id):
+    """Attach completed uploads (``{"uploads": [id, ...]}``) to one of the
+    user's projects: audio samples to music, images to art."""
+    tokens = request.data.get("uploads")
+    if not isinstance(tokens, list) or not tokens:
+        return Response({"error": "uploads must be a non-empty list of upload ids"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        tokens = [uuid.UUID(str(token)) for token in tokens]
+    except ValueError:
+        return Response({"error": "Invalid upload id"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        media = uploads.attach_uploads(request.user, category.lower(), id, tokens)
+    except LookupError as e:
+        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except uploads.UploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = AudioSampleSerializer if category.lower() == "music" else ArtworkImageSerializer
+    return Response(serializer_class(media, many=True).data, status=status.HTTP_201_CREATED)
@@ -11,6 +11,8 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+# The async read views are opt-in: DJANGO_SETTINGS_MODULE=crowdfunding.settings_asgi
+# (see that module, and benchmark_read_path to compare it with these settings).
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crowdfunding.settings')
 
 application = get_asgi_application()
@@ -18,6 +18,25 @@ import os
 RAZORPAY_KEY_ID = os.environ.get("RAZORPAY_KEY_ID", "rzp_test_RdWlPy047cGI63")
 RAZORPAY_KEY_SECRET = os.environ.get("RAZORPAY_KEY_SECRET", "0e2HIls0PgfdNMR2v558x4GS")
 RAZORPAY_WEBHOOK_SECRET = os.environ.get("RAZORPAY_WEBHOOK_SECRET", "your_razorpay_webhook_secret_here")
+# Payment gateway: "razorpay" talks to the real API through one pooled client;
+# "fake" is an in-process stand-in for offline load tests.
+PAYMENT_GATEWAY_BACKEND = os.environ.get("PAYMENT_GATEWAY_BACKEND", "razorpay")
+RAZORPAY_CONNECT_TIMEOUT = float(os.environ.get("RAZORPAY_CONNECT_TIMEOUT", 3.05))
+RAZORPAY_READ_TIMEOUT = float(os.environ.get("RAZORPAY_READ_TIMEOUT", 10))
+RAZORPAY_MAX_RETRIES = int(os.environ.get("RAZORPAY_MAX_RETRIES", 2))
+RAZORPAY_RETRY_BACKOFF = float(os.environ.get("RAZORPAY_RETRY_BACKOFF", 0.2))  # seconds, doubled per retry
+RAZORPAY_POOL_SIZE = int(os.environ.get("RAZORPAY_POOL_SIZE", 10))
+FAKE_GATEWAY_LATENCY_MS = float(os.environ.get("FAKE_GATEWAY_LATENCY_MS", 0))
+# create-order responses are replayed for a repeated Idempotency-Key for this
+# many seconds. Results are shared through the default cache; the per-process
+# layer in front of it keeps at most IDEMPOTENCY_MAX_KEYS keys.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 3600))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", 10000))
+# Seconds a retry waits for another worker still running the same key (and the
+# lifetime of that worker's in-flight marker) before answering 409.
+IDEMPOTENCY_INFLIGHT_TIMEOUT = int(os.environ.get("IDEMPOTENCY_INFLIGHT_TIMEOUT", 30))
+# Webhook inbox events that failed this many times are left for inspection.
+WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_INBOX_MAX_ATTEMPTS", 5))
 ALLOWED_HOSTS = []
 
 
@@ -40,10 +59,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'accounts.instrumentation.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,14 +92,176 @@ WSGI_APPLICATION = 'crowdfunding.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Seconds a database connection is reused across requests (0 closes it after
+# every request). Reused connections are health-checked before each request.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+if os.environ.get("DB_ENGINE") == "postgresql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("POSTGRES_DB", "crowdfunding"),
+            'USER': os.environ.get("POSTGRES_USER", "crowdfunding"),
+            'PASSWORD': os.environ.get("POSTGRES_PASSWORD", ""),
+            'HOST': os.environ.get("POSTGRES_HOST", "localhost"),
+            'PORT': os.environ.get("POSTGRES_PORT", "5432"),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
+    # POSTGRES_POOL_MAX_SIZE > 0 switches to psycopg's connection pool
+    # (psycopg[pool]), which replaces persistent connections.
+    if int(os.environ.get("POSTGRES_POOL_MAX_SIZE", 0)):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            'max_size': int(os.environ["POSTGRES_POOL_MAX_SIZE"]),
+            'timeout': float(os.environ.get("POSTGRES_POOL_TIMEOUT", 10)),  # seconds to wait for a free connection
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # busy_timeout: wait for the write lock instead of failing when
+                # payments settle concurrently.
+                'timeout': float(os.environ.get("SQLITE_BUSY_TIMEOUT", 20)),
+                # IMMEDIATE takes the write lock at BEGIN so a transaction that
+                # reads before writing (the webhook inbox drain) cannot deadlock
+                # on upgrade.
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets readers run alongside the single writer; NORMAL only
+                # fsyncs at checkpoints (a power loss can drop the last commits,
+                # never corrupt the file); reads are served from a memory map.
+                'init_command': (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))};"
+                ),
+            },
+            # A file-backed test database so concurrency tests get real locking
+            # (the shared-cache in-memory database raises "table is locked").
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+# Read replicas for project and media reads (see accounts/routers.py):
+# comma-separated SQLite files, or PostgreSQL hosts, each added as "replicaN".
+# Replication itself happens outside Django; tests mirror the primary.
+for _i, _target in enumerate(filter(None, os.environ.get("DB_REPLICAS", "").split(",")), 1):
+    DATABASES[f'replica{_i}'] = {
+        **DATABASES['default'],
+        'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST': _target.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['accounts.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write, so they see their
+# own change while the replicas catch up. Also the longest a response cached
+# from a replica is kept.
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS", 10))
+
+
+# Cache
+# Local memory by default; set CACHE_URL (e.g. redis://127.0.0.1:6379/1) to share
+# the project response cache and its version counters between processes.
+
+if os.environ.get("CACHE_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ["CACHE_URL"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'crowdfunding',
+        }
+    }
+
+# Seconds a cached project list/detail response may live; entries are also
+# invalidated as soon as a project, its media or a payment changes.
+PROJECT_RESPONSE_CACHE_TIMEOUT = int(os.environ.get("PROJECT_RESPONSE_CACHE_TIMEOUT", 300))
+
+# Seconds a per-project serialized fragment may live. Keys include the
+# project's updated_at, so this only bounds how long superseded copies linger.
+PROJECT_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get("PROJECT_FRAGMENT_CACHE_TIMEOUT", 3600))
+
+
+# Authenticated requests resolve the user and profile from the cache instead of
+# the database: each process trusts its own copy for AUTH_PRINCIPAL_LOCAL_TTL
+# seconds (and keeps at most AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES users), the shared
+# copy lives for AUTH_PRINCIPAL_CACHE_TIMEOUT seconds, and both are invalidated
+# when the user, profile or one of its tokens changes.
+AUTH_PRINCIPAL_LOCAL_TTL = float(os.environ.get("AUTH_PRINCIPAL_LOCAL_TTL", 5))
+AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES = int(os.environ.get("AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES", 10000))
+AUTH_PRINCIPAL_CACHE_TIMEOUT = int(os.environ.get("AUTH_PRINCIPAL_CACHE_TIMEOUT", 300))
+
+
+# Per-request SQL count/time, duplicate and repeated (N+1) queries, spans and
+# response size (accounts/instrumentation.py), logged as one JSON line per
+# request on "accounts.requests": INFO normally, WARNING when queries repeat.
+REQUEST_METRICS = os.environ.get("REQUEST_METRICS", "1") == "1"
+# Also return them as a Server-Timing header (shown in browser devtools).
+SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "1" if DEBUG else "0") == "1"
+# A statement run this many times in one request is logged as repeated.
+REQUEST_REPEATED_QUERY_THRESHOLD = int(os.environ.get("REQUEST_REPEATED_QUERY_THRESHOLD", 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # REQUEST_LOG_LEVEL=INFO logs every request, not only the ones with repeats.
+        'accounts.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get("REQUEST_LOG_LEVEL", "WARNING"),
+            'propagate': False,
+        },
+    },
 }
 
 
+# Thumbnails for posters, album covers and artwork images (accounts/thumbnails.py):
+# each width below the original's, in each format, rendered after upload on
+# THUMBNAIL_WORKERS spawned processes (0 renders inline once the write commits).
+THUMBNAIL_WIDTHS = [int(w) for w in os.environ.get("THUMBNAIL_WIDTHS", "320,640,1280").split(",")]
+THUMBNAIL_FORMATS = os.environ.get("THUMBNAIL_FORMATS", "webp,jpeg").split(",")
+THUMBNAIL_QUALITY = int(os.environ.get("THUMBNAIL_QUALITY", 80))
+THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", 2))
+
+
+# Audio sample previews (accounts/audio_previews.py): the first
+# AUDIO_PREVIEW_SECONDS as a mono clip (MP3 at AUDIO_PREVIEW_BITRATE kbps with
+# ffmpeg, 16-bit WAV without it) and AUDIO_WAVEFORM_PEAKS waveform peaks,
+# computed on AUDIO_PREVIEW_WORKERS spawned processes (0 runs inline).
+AUDIO_PREVIEW_SECONDS = int(os.environ.get("AUDIO_PREVIEW_SECONDS", 30))
+AUDIO_PREVIEW_SAMPLE_RATE = int(os.environ.get("AUDIO_PREVIEW_SAMPLE_RATE", 22050))
+AUDIO_PREVIEW_BITRATE = int(os.environ.get("AUDIO_PREVIEW_BITRATE", 64))
+AUDIO_WAVEFORM_PEAKS = int(os.environ.get("AUDIO_WAVEFORM_PEAKS", 200))
+AUDIO_PREVIEW_WORKERS = int(os.environ.get("AUDIO_PREVIEW_WORKERS", 1))
+
+
+# Chunked uploads (accounts/uploads.py): the largest chunk one PUT may carry,
+# the largest file, and how long an unattached upload is kept before
+# prune_uploads removes it. Parts are assembled outside MEDIA_ROOT so partial
+# files are never served.
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024))
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 500 * 1024 * 1024))
+UPLOAD_TTL_HOURS = int(os.environ.get("UPLOAD_TTL_HOURS", 24))
+CHUNKED_UPLOAD_DIR = os.environ.get("CHUNKED_UPLOAD_DIR", str(BASE_DIR / "upload_parts"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,7 +310,7 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -141,8 +324,20 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.FilteredTokenRefreshSerializer",
 }
+# Refresh/logout blacklist checks go through an in-memory Bloom filter of
+# blacklisted JTIs (see accounts/blacklist.py), fully rebuilt this often
+# (seconds) and sized for this false-positive rate. Expired rows are removed
+# by `python manage.py prune_token_blacklist`, e.g. hourly from cron.
+TOKEN_BLACKLIST_FILTER_REFRESH = int(os.environ.get("TOKEN_BLACKLIST_FILTER_REFRESH", 300))
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.environ.get("TOKEN_BLACKLIST_FILTER_ERROR_RATE", 0.001))
+# Ids below the newest one seen that every catch-up reads again, for rows
+# that commit out of id order (concurrent rotations on PostgreSQL).
+TOKEN_BLACKLIST_FILTER_RESCAN = int(os.environ.get("TOKEN_BLACKLIST_FILTER_RESCAN", 1000))
 AUTH_USER_MODEL = 'auth.User'
+# Log in with a username or an email address in one lookup and one hash.
+AUTHENTICATION_BACKENDS = ['accounts.backends.EmailOrUsernameBackend']
 
 import os
 from pathlib import Path
@@ -151,5 +346,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Origin prefixed to the derivative URLs the API embeds (thumbnail srcsets,
+# audio previews). The SPA is served from another origin, and browsers resolve
+# srcset candidates against the page, so they must be absolute. Empty keeps
+# them relative (media on the same origin as the frontend).
+MEDIA_ORIGIN = os.environ.get("MEDIA_ORIGIN", "http://127.0.0.1:8000")
+# Uploaded files are served by accounts.media.serve_media (byte ranges, ETag,
+# Last-Modified). MEDIA_ACCEL hands the transfer to the front server:
+# "x-accel" for nginx (an `internal` location at MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT) or "x-sendfile" for Apache/lighttpd. Left empty, Django streams
+# the file and WSGI servers with wsgi.file_wrapper use os.sendfile.
+SERVE_MEDIA = os.environ.get("SERVE_MEDIA", "1") == "1"
+MEDIA_ACCEL = os.environ.get("MEDIA_ACCEL", "")
+MEDIA_ACCEL_PREFIX = os.environ.get("MEDIA_ACCEL_PREFIX", "/protected-media/")
+MEDIA_CACHE_MAX_AGE = int(os.environ.get("MEDIA_CACHE_MAX_AGE", 3600))
 
 DEBUG = True
\ No newline at end of file
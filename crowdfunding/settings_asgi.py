@@ -0,0 +1,12 @@
+"""
+ASGI deployment profile: the base settings with the async read endpoints.
+
+Opt-in; crowdfunding/asgi.py defaults to crowdfunding.settings and the sync
+views. Select it through the environment, e.g.
+    DJANGO_SETTINGS_MODULE=crowdfunding.settings_asgi uvicorn crowdfunding.asgi:application --workers 4
+and compare with ``python manage.py benchmark_read_path`` before switching:
+on cache hits the sync views have measured faster.
+"""
+from .settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = 'crowdfunding.urls_asgi'
@@ -15,9 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from accounts.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +27,12 @@ urlpatterns = [
     # /api/auth/... and /api/projects/... as expected by the frontend code.
     path('api/auth/', include('accounts.urls')),
     path('api/projects/', include('accounts.urls')),
+    # Serializer from SIMPLE_JWT["TOKEN_REFRESH_SERIALIZER"]: rotates and
+    # blacklists the refresh token.
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.SERVE_MEDIA:
+    # Ranges, validators and sendfile/X-Accel-Redirect: see accounts/media.py.
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"),
+    ]
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+URL configuration for the ASGI deployment profile (crowdfunding.settings_asgi).
+
+The read-heavy project endpoints resolve to the async views in
+accounts/async_views.py; every other URL falls through to crowdfunding/urls.py.
+"""
+from django.urls import path, include
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/auth/', include('accounts.urls_async')),
+    path('api/projects/', include('accounts.urls_async')),
+] + sync_urlpatterns
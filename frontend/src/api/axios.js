@@ -29,6 +29,8 @@ api.interceptors.response.use(
             refresh,
           });
           localStorage.setItem("access", res.data.access);
+          // Refresh tokens are rotated: the old one is now blacklisted
+          if (res.data.refresh) localStorage.setItem("refresh", res.data.refresh);
           api.defaults.headers.common["Authorization"] = `Bearer ${res.data.access}`;
           return api(originalRequest);
         } catch (refreshError) {
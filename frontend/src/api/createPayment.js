@@ -1,8 +1,12 @@
 import api from "./axios";
 
-export async function createOrder(amount, category, project_id) {
-  // amount in rupees (decimal/number)
-  const res = await api.post("payments/create-order/", { amount, category, project_id });
+export async function createOrder(amount, category, project_id, idempotencyKey) {
+  // amount in rupees (decimal/number). Reuse idempotencyKey when retrying the
+  // same checkout so the server returns the original order instead of a new one.
+  // Keys are per user, so guests checking out anonymously don't send one.
+  const signedIn = Boolean(localStorage.getItem("access"));
+  const headers = idempotencyKey && signedIn ? { "Idempotency-Key": idempotencyKey } : {};
+  const res = await api.post("payments/create-order/", { amount, category, project_id }, { headers });
   return res.data;
 }
 
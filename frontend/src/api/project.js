@@ -21,21 +21,28 @@ const fixMediaUrls = (project) => ({
   album_cover: fixUrl(project.album_cover),
   short_video_url: fixUrl(project.short_video_url),
   trailer_url: fixUrl(project.trailer_url),
+  // Kept as objects: cards also need each image's srcset.
   artwork_images: Array.isArray(project.artwork_images)
-    ? project.artwork_images.map((img) => fixUrl(img.image || img))
+    ? project.artwork_images.map((img) =>
+        typeof img === "string" ? { image: fixUrl(img) } : { ...img, image: fixUrl(img.image) }
+      )
     : [],
   audio_samples: Array.isArray(project.audio_samples)
     ? project.audio_samples.map((sample) => fixUrl(sample.file || sample))
     : [],
 });
 
-// ✅ Get all projects
-export const getAllProjects = async () => {
+// ✅ Get one page of all projects (pass the previous page's nextCursor to continue).
+// `filters` is sent as-is: sort (newest | most_funded | closest_to_goal), category,
+// creator, min_goal, max_goal, min_funded, max_funded (percent).
+export const getAllProjects = async (cursor = null, limit = 20, filters = {}) => {
   try {
-    const response = await axios.get(`${API_BASE_URL}/projects/`);
+    const params = { ...filters, limit };
+    if (cursor) params.cursor = cursor;
+    const response = await axios.get(`${API_BASE_URL}/projects/`, { params });
     // Fix URLs for each project
-    const projects = response.data.map((proj) => fixMediaUrls(proj));
-    return projects;
+    const projects = response.data.results.map((proj) => fixMediaUrls(proj));
+    return { projects, nextCursor: response.data.next_cursor };
   } catch (error) {
     console.error("Error fetching projects:", error);
     throw error;
@@ -55,10 +62,20 @@ export const getProjectById = async (category, id) => {
 
 export const getMyProjects = async (token) => {
   try {
-    const response = await axios.get(`${API_BASE_URL}/projects/my/`, {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-    return response.data.map(fixMediaUrls);
+    // A creator's own list is short, so follow the cursor until the last page
+    const projects = [];
+    let cursor = null;
+    do {
+      const params = { limit: 100 };
+      if (cursor) params.cursor = cursor;
+      const response = await axios.get(`${API_BASE_URL}/projects/my/`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params,
+      });
+      projects.push(...response.data.results.map(fixMediaUrls));
+      cursor = response.data.next_cursor;
+    } while (cursor);
+    return projects;
   } catch (error) {
     console.error("Error fetching my projects:", error);
     throw error;
@@ -95,34 +112,26 @@ export const deleteProject = async (category, id, token) => {
   }
 };
 
-export const getAllFilms = async () => {
+// ✅ One page of a single category; same cursor/limit/filters as getAllProjects
+const getCategoryPage = async (path, label, cursor, limit, filters) => {
   try {
-    const res = await axios.get(`${BASE_URL}/projects/films/`);
-    return res.data;
+    const params = { ...filters, limit };
+    if (cursor) params.cursor = cursor;
+    const res = await axios.get(`${API_BASE_URL}/projects/${path}/`, { params });
+    return { projects: res.data.results.map(fixMediaUrls), nextCursor: res.data.next_cursor };
   } catch (error) {
-    console.error("Error fetching films:", error);
+    console.error(`Error fetching ${label}:`, error);
     throw error;
   }
 };
 
+export const getAllFilms = (cursor = null, limit = 20, filters = {}) =>
+  getCategoryPage("films", "films", cursor, limit, filters);
+
 // ✅ Get all music projects
-export const getAllMusic = async () => {
-  try {
-    const res = await axios.get(`${BASE_URL}/projects/music/`);
-    return res.data;
-  } catch (error) {
-    console.error("Error fetching music:", error);
-    throw error;
-  }
-};
+export const getAllMusic = (cursor = null, limit = 20, filters = {}) =>
+  getCategoryPage("music", "music", cursor, limit, filters);
 
 // ✅ Get all art projects
-export const getAllArt = async () => {
-  try {
-    const res = await axios.get(`${BASE_URL}/projects/art/`);
-    return res.data;
-  } catch (error) {
-    console.error("Error fetching art:", error);
-    throw error;
-  }
-};
\ No newline at end of file
+export const getAllArt = (cursor = null, limit = 20, filters = {}) =>
+  getCategoryPage("art", "art", cursor, limit, filters);
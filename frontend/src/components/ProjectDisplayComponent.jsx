@@ -3,6 +3,11 @@ import { useNavigate } from "react-router-dom";
 import { getProjectById } from "../api/project";
 import ProjectModal from "./ProjectModal"; // ✅ new file
 
+// Cards are full width on phones and a third of the row from md up.
+const CARD_SIZES = "(min-width: 768px) 33vw, 100vw";
+// WebP thumbnails, or JPEG ones; undefined until the backend has rendered them.
+const cardSrcSet = (srcset) => srcset?.webp || srcset?.jpeg || undefined;
+
 const ProjectDisplayComponent = ({ project }) => {
   const [showModal, setShowModal] = useState(false);
   const [selectedProject, setSelectedProject] = useState(null);
@@ -34,10 +39,13 @@ const ProjectDisplayComponent = ({ project }) => {
         <p className="text-sm text-gray-500 mb-1">Goal: ₹{project.goal_amount}</p>
         <p className="text-sm text-gray-500 mb-4">Raised: ₹{project.raised_amount}</p>
 
-        {/* Thumbnail */}
+        {/* Thumbnail: the browser picks the smallest derivative that fits */}
         {project.poster_image && (
           <img
             src={project.poster_image}
+            srcSet={cardSrcSet(project.poster_image_srcset)}
+            sizes={CARD_SIZES}
+            loading="lazy"
             alt={project.title}
             className="w-full h-40 object-cover rounded-xl mb-2"
           />
@@ -45,13 +53,19 @@ const ProjectDisplayComponent = ({ project }) => {
         {project.album_cover && (
           <img
             src={project.album_cover}
+            srcSet={cardSrcSet(project.album_cover_srcset)}
+            sizes={CARD_SIZES}
+            loading="lazy"
             alt={project.title}
             className="w-full h-40 object-cover rounded-xl mb-2"
           />
         )}
         {project.artwork_images?.length > 0 && (
           <img
-            src={project.artwork_images[0]}
+            src={project.artwork_images[0].image}
+            srcSet={cardSrcSet(project.artwork_images[0].image_srcset)}
+            sizes={CARD_SIZES}
+            loading="lazy"
             alt={project.title}
             className="w-full h-40 object-cover rounded-xl mb-2"
           />
@@ -76,7 +76,7 @@ const ProjectModal = ({ project, onClose }) => {
             {project.artwork_images.map((img, i) => (
               <img
                 key={i}
-                src={img}
+                src={img.image}
                 alt={`Artwork ${i}`}
                 className="w-full h-40 object-cover rounded-xl"
               />
@@ -2,16 +2,31 @@ import React, { useEffect, useState } from "react";
 import { getAllProjects } from "../api/project";
 import ProjectDisplayComponent from "../components/ProjectDisplayComponent";
 
+const SORTS = [
+  { value: "newest", label: "Newest" },
+  { value: "most_funded", label: "Most funded" },
+  { value: "closest_to_goal", label: "Closest to goal" },
+];
+
 export default function AllProjects() {
+  const [sort, setSort] = useState("newest");
+  const [category, setCategory] = useState("");
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Filtering and sorting happen on the server; only the current page is loaded.
+  const filters = category ? { sort, category } : { sort };
 
   useEffect(() => {
     const fetchProjects = async () => {
+      setLoading(true);
       try {
-        const data = await getAllProjects();
-        setProjects(data);
+        const data = await getAllProjects(null, 20, filters);
+        setProjects(data.projects);
+        setNextCursor(data.nextCursor);
       } catch (err) {
         console.error(err);
         setError("Failed to load projects.");
@@ -20,7 +35,21 @@ export default function AllProjects() {
       }
     };
     fetchProjects();
-  }, []);
+  }, [sort, category]);
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getAllProjects(nextCursor, 20, filters);
+      setProjects((prev) => [...prev, ...data.projects]);
+      setNextCursor(data.nextCursor);
+    } catch (err) {
+      console.error(err);
+      setError("Failed to load projects.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   if (loading) {
     return <p className="text-center text-gray-500 mt-10">Loading projects...</p>;
@@ -33,6 +62,19 @@ export default function AllProjects() {
   return (
     <div className="min-h-screen bg-site-bg p-6">
       <h2 className="text-3xl font-bold text-center mb-8">All Projects</h2>
+      <div className="flex justify-center gap-4 mb-6">
+        <select value={category} onChange={(e) => setCategory(e.target.value)} className="border rounded px-3 py-2">
+          <option value="">All categories</option>
+          <option value="film">Film</option>
+          <option value="music">Music</option>
+          <option value="art">Art</option>
+        </select>
+        <select value={sort} onChange={(e) => setSort(e.target.value)} className="border rounded px-3 py-2">
+          {SORTS.map((s) => (
+            <option key={s.value} value={s.value}>{s.label}</option>
+          ))}
+        </select>
+      </div>
       <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
         {projects.length > 0 ? (
           projects.map((project) => (
@@ -44,6 +86,17 @@ export default function AllProjects() {
           </p>
         )}
       </div>
+      {nextCursor && (
+        <div className="text-center mt-8">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-6 py-2 rounded bg-gray-800 text-white disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { createOrder, verifyPayment } from "../api/createPayment";
 
@@ -20,18 +20,24 @@ export default function Payment() {
   const [amount, setAmount] = useState(100);
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState("");
+  // One key per checkout attempt: resubmitting the same amount reuses the order
+  const idempotencyKey = useRef(crypto.randomUUID());
 
   useEffect(() => {
     loadRazorpayScript();
   }, []);
 
+  useEffect(() => {
+    idempotencyKey.current = crypto.randomUUID();
+  }, [amount]);
+
   const handleDonate = async (e) => {
     e.preventDefault();
     setLoading(true);
     setMessage("");
 
     try {
-      const orderResp = await createOrder(amount, category, id);
+      const orderResp = await createOrder(amount, category, id, idempotencyKey.current);
       const { order, key, payment_id } = orderResp;
 
       const options = {
@@ -49,6 +55,7 @@ export default function Payment() {
               response.razorpay_signature,
               payment_id
             );
+            idempotencyKey.current = crypto.randomUUID();
             setMessage("✅ Payment successful! Thank you for your donation.");
             setTimeout(() => navigate(`/project/${category}/${id}`), 1800);
           } catch (err) {